@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+DEFAULT_CACHE_DIR = os.environ.get('ANALYSIS_CACHE_DIR', '.analysis_cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+HASH_CHUNK = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    hash TEXT NOT NULL,
+    analyzer TEXT NOT NULL,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (hash, analyzer, version)
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+"""
+
+
+def content_hash(path):
+    """BLAKE2b digest of a file's contents"""
+    return hash_with_stat(path)[0]
+
+
+def hash_with_stat(path):
+    """Content hash plus the (size, mtime_ns, inode) key of the file that was read
+
+    The key comes from fstat() on the open file before reading, so a later
+    rewrite can never be recorded against the old digest.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        key = _stat_key(os.fstat(f.fileno()))
+        while True:
+            chunk = f.read(HASH_CHUNK)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest(), key
+
+
+def _stat_key(stat):
+    if isinstance(stat, os.stat_result):
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+    return tuple(stat)
+
+
+class AnalysisCache:
+    """Persistent analysis results keyed by file content hash and analyzer version
+
+    Results live in a SQLite database and are evicted least-recently-used
+    first once their total size exceeds max_bytes.  A (size, mtime, inode)
+    record per path lets unchanged files skip hashing entirely.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, readonly=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.readonly = readonly
+        self.path = os.path.join(cache_dir, 'analysis.sqlite')
+
+        if readonly:
+            self._db = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._db = sqlite3.connect(self.path)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(SCHEMA)
+
+    def known_hash(self, path, stat=None):
+        """Return the stored hash if the file is unchanged since it was hashed"""
+        stat = stat or os.stat(path)
+        row = self._db.execute('SELECT size, mtime_ns, inode, hash FROM files WHERE path = ?',
+                               (os.path.abspath(path),)).fetchone()
+        if row and tuple(row[:3]) == _stat_key(stat):
+            return row[3]
+        return None
+
+    def file_hash(self, path):
+        """Content hash of path, computed only when its stat record changed"""
+        digest = self.known_hash(path)
+        if digest is None:
+            digest, key = hash_with_stat(path)
+            if not self.readonly:
+                self.remember(path, digest, key)
+        return digest
+
+    def remember(self, path, digest, stat=None):
+        """Record the hash of path with a stat result or hash_with_stat key
+
+        Without one the file is stat()ed now, which is only safe if it
+        cannot have changed since it was hashed.
+        """
+        stat = stat or os.stat(path)
+        with self._db:
+            self._db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)',
+                             (os.path.abspath(path),) + _stat_key(stat) + (digest,))
+
+    def get(self, digest, analyzer, version):
+        """Return the cached result or None; hits are marked as recently used"""
+        row = self._db.execute('SELECT data FROM results WHERE hash = ? AND analyzer = ? AND version = ?',
+                               (digest, analyzer, version)).fetchone()
+        if row is None:
+            return None
+        if not self.readonly:
+            self.touch(digest, analyzer, version)
+        return json.loads(row[0])
+
+    def touch(self, digest, analyzer, version):
+        with self._db:
+            self._db.execute('UPDATE results SET last_used = ? WHERE hash = ? AND analyzer = ? AND version = ?',
+                             (time.time(), digest, analyzer, version))
+
+    def put(self, digest, analyzer, version, result):
+        """Store a JSON-serializable result and evict old entries if over budget"""
+        data = json.dumps(result, separators=(',', ':'))
+        with self._db:
+            self._db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)',
+                             (digest, analyzer, version, data, len(data), time.time()))
+        self.evict()
+
+    def total_bytes(self):
+        return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+    def evict(self):
+        """Drop least-recently-used results until the cache fits in max_bytes"""
+        excess = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return 0
+        removed = 0
+        freed = 0
+        rows = self._db.execute('SELECT hash, analyzer, version, size FROM results ORDER BY last_used').fetchall()
+        with self._db:
+            for digest, analyzer, version, size in rows:
+                if freed >= excess:
+                    break
+                self._db.execute('DELETE FROM results WHERE hash = ? AND analyzer = ? AND version = ?',
+                                 (digest, analyzer, version))
+                freed += size
+                removed += 1
+        return removed
+
+    def stats(self):
+        entries = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        files = self._db.execute('SELECT COUNT(*) FROM files').fetchone()[0]
+        return {'entries': entries, 'files': files, 'bytes': self.total_bytes(), 'max_bytes': self.max_bytes}
+
+    def clear(self):
+        with self._db:
+            self._db.execute('DELETE FROM results')
+            self._db.execute('DELETE FROM files')
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the analysis cache")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--clear', action='store_true', help="remove every cached entry")
+    args = parser.parse_args()
+
+    with AnalysisCache(args.cache_dir) as cache:
+        if args.clear:
+            cache.clear()
+            print("Cache cleared")
+        stats = cache.stats()
+        print(f"Cache: {cache.path}")
+        print(f"  Entries: {stats['entries']} ({stats['bytes']} / {stats['max_bytes']} bytes)")
+        print(f"  Tracked files: {stats['files']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,544 @@
+import os
+import re
+import json
+import time
+
+from analysis_profiler import span, tally
+from bone_classifier import GLB_BONE_KEYWORDS, BoneClassifier
+from fbx_parser import FBXError, read_fbx_version
+from fbx_scanner import scan_fbx
+from glb_reader import GLBError, read_glb_json
+
+# Only the standard library and the pure-Python readers are imported here;
+# NumPy-backed modules are imported inside the stages that need them.
+
+BONE_CLASSIFIER = BoneClassifier(GLB_BONE_KEYWORDS)
+
+# A non-empty "skins" array, found without parsing the JSON document.
+# The pattern starts with a literal so the regex engine can skip ahead;
+# each match is then confirmed to be a key of the top-level object.
+SKINS_KEY = re.compile(rb'"skins"\s*:\s*\[\s*[^\]\s]')
+JSON_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+
+FBX_RIG_KEYWORDS = ['Deformer', 'Cluster', 'Bone', 'Joint', 'Skeleton',
+                    'Weight', 'Skin', 'Armature', 'BindPose', 'Animation',
+                    'Curve', 'Model', 'Geometry', 'NodeAttribute']
+
+
+class StageError(ValueError):
+    """Raised for unknown stages or stages not available for a format"""
+
+
+# File sections a stage can read: a GLB's JSON or BIN chunk, or the whole file
+SECTIONS = ('json', 'bin', 'file')
+
+
+class Stage:
+    """One named analysis step for a file format"""
+
+    __slots__ = ('format', 'name', 'requires', 'reads', 'function', 'description')
+
+    def __init__(self, format, name, requires, reads, function, description):
+        self.format = format
+        self.name = name
+        self.requires = requires
+        self.reads = reads
+        self.function = function
+        self.description = description
+
+    def __repr__(self):
+        return f"Stage({self.format!r}, {self.name!r}, requires={self.requires!r})"
+
+
+# (format, name) -> Stage
+STAGES = {}
+
+
+def stage(format, name, requires=(), reads=('file',)):
+    """Register a stage function; its docstring becomes the description
+
+    `reads` names the file sections the stage itself looks at (see
+    SECTIONS), so callers can tell which results a change invalidates.
+    """
+    def register(function):
+        description = (function.__doc__ or '').strip().split('\n')[0]
+        STAGES[(format, name)] = Stage(format, name, tuple(requires), tuple(reads), function, description)
+        return function
+    return register
+
+
+def asset_format(path):
+    """'glb' or 'fbx' from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.glb':
+        return 'glb'
+    if extension == '.fbx':
+        return 'fbx'
+    raise StageError(f"Unsupported asset type: {path}")
+
+
+class AssetContext:
+    """Per-asset state: computed stage results and lazily opened resources
+
+    get() runs a stage (and, first, everything it requires) the first time
+    its result is asked for.  The mapped GLB/FBX files and the accessor
+    decoder are only opened when a stage touches them.
+    """
+
+    def __init__(self, path, format=None, stages=STAGES):
+        self.path = path
+        self.format = format or asset_format(path)
+        self.stages = stages
+        self.results = {}
+        self.timings = {}
+        self._glb = None
+        self._accessors = None
+        self._fbx = None
+        self._running = set()
+
+    def stage(self, name):
+        found = self.stages.get((self.format, name))
+        if found is None:
+            raise StageError(f"No {name!r} stage for {self.format} assets")
+        return found
+
+    def get(self, name):
+        """Return the result of a stage, running it on first use"""
+        if name in self.results:
+            return self.results[name]
+        if name in self._running:
+            raise StageError(f"Stage {name!r} depends on itself")
+        found = self.stage(name)
+        self._running.add(name)
+        try:
+            for requirement in found.requires:
+                self.get(requirement)
+            start = time.perf_counter()
+            with span(name, 'stage') as timed:
+                result = found.function(self)
+                if isinstance(result, list):
+                    timed.add('items', len(result))
+            self.timings[name] = time.perf_counter() - start
+        finally:
+            self._running.discard(name)
+        self.results[name] = result
+        return result
+
+    @property
+    def glb(self):
+        """The memory-mapped GLBFile (opened on first access)"""
+        if self._glb is None:
+            from glb_reader import open_glb
+            self._glb = open_glb(self.path)
+            tally('mapped_bytes', self._glb.length)
+        return self._glb
+
+    @property
+    def accessors(self):
+        """GLTFAccessors over the BIN chunk (imports NumPy on first access)"""
+        if self._accessors is None:
+            from gltf_accessors import GLTFAccessors
+            self._accessors = GLTFAccessors(self.get('json'), self.glb.bin_chunk,
+                                            os.path.dirname(os.path.abspath(self.path)))
+        return self._accessors
+
+    @property
+    def fbx(self):
+        """The memory-mapped FBXFile (opened on first access)"""
+        if self._fbx is None:
+            from fbx_parser import open_fbx
+            self._fbx = open_fbx(self.path)
+            tally('mapped_bytes', self._fbx.size)
+        return self._fbx
+
+    def close(self):
+        self._accessors = None
+        if self._glb is not None:
+            self._glb.close()
+            self._glb = None
+        if self._fbx is not None:
+            self._fbx.close()
+            self._fbx = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Pipeline:
+    """Run only the stages needed for the requested outputs
+
+    Stages declare what they always need in `requires`; a stage may also
+    call context.get() for another stage only on some inputs (has_rig
+    parses the JSON only when no skin is declared), so plan() lists the
+    static dependencies and the run may stop short of them.
+    """
+
+    def __init__(self, stages=STAGES):
+        self.stages = stages
+
+    def plan(self, outputs, format):
+        """Stage names in execution order for the given outputs"""
+        order = []
+
+        def visit(name, chain):
+            if name in order:
+                return
+            if name in chain:
+                raise StageError(f"Stage {name!r} depends on itself")
+            found = self.stages.get((format, name))
+            if found is None:
+                raise StageError(f"No {name!r} stage for {format} assets")
+            for requirement in found.requires:
+                visit(requirement, chain + (name,))
+            order.append(name)
+
+        for output in outputs:
+            visit(output, ())
+        return order
+
+    def reads(self, output, format):
+        """File sections an output depends on, through everything it requires"""
+        sections = set()
+        for name in self.plan([output], format):
+            sections.update(self.stages[(format, name)].reads)
+        return sections
+
+    def affected(self, outputs, format, changed):
+        """Outputs whose results may differ after the given sections changed"""
+        changed = set(changed)
+        return [output for output in outputs
+                if 'file' in changed or self.reads(output, format) & (changed | {'file'})]
+
+    def run(self, path, outputs):
+        """Compute the requested outputs for one asset; returns {output: result}"""
+        with AssetContext(path, stages=self.stages) as context:
+            return {output: context.get(output) for output in outputs}
+
+    def run_context(self, path, outputs):
+        """Like run() but returns the closed AssetContext with all results and timings"""
+        with AssetContext(path, stages=self.stages) as context:
+            for output in outputs:
+                context.get(output)
+        return context
+
+    def available(self, format=None):
+        return sorted((stage for stage in self.stages.values()
+                       if format is None or stage.format == format),
+                      key=lambda stage: (stage.format, stage.name))
+
+
+# --- GLB stages ------------------------------------------------------------
+
+@stage('glb', 'json_chunk', reads=('json',))
+def glb_json_chunk(context):
+    """Header fields and raw JSON chunk, read without mapping the BIN chunk"""
+    version, length, data = read_glb_json(context.path)
+    tally('bytes', len(data))
+    return {'version': version, 'length': length, 'data': data}
+
+
+@stage('glb', 'header', requires=('json_chunk',), reads=())
+def glb_header(context):
+    """GLB container version and declared length"""
+    chunk = context.get('json_chunk')
+    return {'version': chunk['version'], 'length': chunk['length'], 'json_bytes': len(chunk['data'])}
+
+
+def _top_level_key(data, start):
+    """Whether the quote at start opens a key of the outermost JSON object"""
+    prefix = JSON_STRING.sub(b'', data[:start])
+    if b'"' in prefix:
+        # An unterminated string: start is inside a string value
+        return False
+    depth = prefix.count(b'{') + prefix.count(b'[') - prefix.count(b'}') - prefix.count(b']')
+    return depth == 1
+
+
+@stage('glb', 'has_skin', requires=('json_chunk',), reads=())
+def glb_has_skin(context):
+    """Whether the document declares a non-empty skins array (no JSON parse)"""
+    data = context.get('json_chunk')['data']
+    return any(_top_level_key(data, match.start()) for match in SKINS_KEY.finditer(data))
+
+
+@stage('glb', 'json', requires=('json_chunk',), reads=())
+def glb_json(context):
+    """Parsed glTF document"""
+    data = context.get('json_chunk')['data'].rstrip(b' \x00')
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        raise GLBError(f"Failed to parse JSON: {e}") from e
+
+
+@stage('glb', 'bone_nodes', requires=('json',), reads=())
+def glb_bone_nodes(context):
+    """Nodes whose names look like bones"""
+    return [{'index': i, 'name': node['name']}
+            for i, node in enumerate(context.get('json').get('nodes', []))
+            if node.get('name') and BONE_CLASSIFIER.is_bone(node['name'])]
+
+
+@stage('glb', 'has_rig', requires=('has_skin',), reads=('json',))
+def glb_has_rig(context):
+    """Skins or bone-like nodes; parses the JSON only when no skin is declared"""
+    return context.get('has_skin') or bool(context.get('bone_nodes'))
+
+
+@stage('glb', 'structure', requires=('json',), reads=())
+def glb_structure(context):
+    """Element counts of the glTF document"""
+    gltf = context.get('json')
+    return {name: len(gltf.get(name, [])) for name in
+            ('nodes', 'meshes', 'skins', 'animations', 'materials', 'accessors', 'bufferViews')}
+
+
+@stage('glb', 'joints', requires=('json',), reads=())
+def glb_joints(context):
+    """Joint names and parents per skin"""
+    gltf = context.get('json')
+    nodes = gltf.get('nodes', [])
+    parents = {child: i for i, node in enumerate(nodes) for child in node.get('children', [])}
+
+    def name(index):
+        return nodes[index].get('name', f'node{index}') if index is not None else None
+
+    return [{'skin': i, 'name': skin.get('name', ''),
+             'joints': {name(joint): name(parents.get(joint)) for joint in skin.get('joints', [])}}
+            for i, skin in enumerate(gltf.get('skins', []))]
+
+
+@stage('glb', 'skins', requires=('json',), reads=('bin',))
+def glb_skins(context):
+    """Skin validation of every skinned primitive (reads the BIN chunk)"""
+    from skin_analysis import analyze_skins
+
+    report = analyze_skins(context.get('json'), context.accessors)
+    return {
+        'valid': all(result['valid'] for result in report['primitives']),
+        'primitives': [{key: result[key] for key in
+                        ('mesh', 'primitive', 'skin', 'vertex_count', 'influences',
+                         'bad_weight_sums', 'negative_weights', 'out_of_range_joints',
+                         'unweighted_vertices', 'valid')}
+                       for result in report['primitives']],
+        'skins': [{'skin': result['skin'], 'name': result['name'],
+                   'joint_count': result['joint_count'],
+                   'unused_joints': result['unused_joints'].tolist()}
+                  for result in report['skins']],
+    }
+
+
+@stage('glb', 'geometry', requires=('json',), reads=('bin',))
+def glb_geometry(context):
+    """Vertex/triangle counts and bounds per primitive, from accessor metadata where present"""
+    gltf = context.get('json')
+    accessors = gltf.get('accessors', [])
+    primitives = []
+    for i, mesh in enumerate(gltf.get('meshes', [])):
+        for j, primitive in enumerate(mesh.get('primitives', [])):
+            position = primitive.get('attributes', {}).get('POSITION')
+            indices = primitive.get('indices')
+            record = {'mesh': i, 'primitive': j, 'vertices': 0, 'triangles': None,
+                      'min': None, 'max': None}
+            if position is not None:
+                accessor = accessors[position]
+                record['vertices'] = accessor['count']
+                if 'min' in accessor and 'max' in accessor:
+                    record['min'], record['max'] = accessor['min'], accessor['max']
+                else:
+                    array = context.accessors.read(position)
+                    record['min'] = array.min(axis=0).tolist()
+                    record['max'] = array.max(axis=0).tolist()
+            if primitive.get('mode', 4) == 4:
+                count = accessors[indices]['count'] if indices is not None else record['vertices']
+                record['triangles'] = count // 3
+            primitives.append(record)
+    return primitives
+
+
+@stage('glb', 'animation', requires=('json',), reads=('bin',))
+def glb_animation(context):
+    """Duration, keys and redundant keys per animation (reads the BIN chunk)"""
+    from animation_analysis import animation_key_stats
+
+    gltf = context.get('json')
+    stats = animation_key_stats(gltf, context.accessors)
+    return [dict(stat, index=i, name=animation.get('name', ''))
+            for i, (stat, animation) in enumerate(zip(stats, gltf.get('animations', [])))]
+
+
+@stage('glb', 'pose', requires=('json',), reads=('bin',))
+def glb_pose(context):
+    """Rest-pose deviation from the bind pose per skin"""
+    from forward_kinematics import ForwardKinematics, bind_pose_error
+
+    gltf = context.get('json')
+    kinematics = ForwardKinematics(gltf, context.accessors)
+    return [{'skin': i, 'name': skin.get('name', ''), 'bind_pose_error': bind_pose_error(kinematics, i)}
+            for i, skin in enumerate(gltf.get('skins', []))]
+
+
+@stage('glb', 'posed_bounds', requires=('json',), reads=('bin',))
+def glb_posed_bounds(context):
+    """Skinned AABB over all frames per primitive and animation"""
+    from skinning import analyze_posed_bounds
+
+    return [{'mesh': result['mesh'], 'primitive': result['primitive'],
+             'animation': result['animation'], 'frames': result['frames'],
+             'min': result['minimum'].min(axis=0).tolist(),
+             'max': result['maximum'].max(axis=0).tolist()}
+            for result in analyze_posed_bounds(context.get('json'), context.accessors)]
+
+
+@stage('glb', 'report', requires=('json',))
+def glb_report(context):
+    """Full analyze_glb result"""
+    from analyze_glb import analyze_glb
+
+    return analyze_glb(context.path).to_dict()
+
+
+# --- FBX stages ------------------------------------------------------------
+
+@stage('fbx', 'header')
+def fbx_header(context):
+    """FBX binary version and file size"""
+    return {'version': read_fbx_version(context.path), 'size': os.path.getsize(context.path)}
+
+
+@stage('fbx', 'scan', requires=('header',))
+def fbx_scan(context):
+    """Single-pass keyword scan over the mapped file"""
+    return scan_fbx(context.path)
+
+
+@stage('fbx', 'keywords', requires=('scan',))
+def fbx_keywords(context):
+    """Counts of rig-related keywords"""
+    scan = context.get('scan')
+    return {keyword: scan.count(keyword) for keyword in FBX_RIG_KEYWORDS if scan.count(keyword)}
+
+
+@stage('fbx', 'has_skin', requires=('scan',))
+def fbx_has_skin(context):
+    """Whether skin clusters are present"""
+    return context.get('scan').count('Cluster') > 0
+
+
+@stage('fbx', 'has_rig', requires=('has_skin',))
+def fbx_has_rig(context):
+    """Skin clusters, or failing that deformers or bone-like model names"""
+    if context.get('has_skin'):
+        return True
+    scan = context.get('scan')
+    return scan.count('Deformer') > 0 or bool(context.get('bone_nodes'))
+
+
+@stage('fbx', 'bone_nodes', requires=('header',))
+def fbx_bone_nodes(context):
+    """LimbNode models from the node tree"""
+    from fbx_parser import FBXDocument
+
+    return [{'index': i, 'name': model.name}
+            for i, model in enumerate(FBXDocument(context.fbx).models()) if model.type == 'LimbNode']
+
+
+@stage('fbx', 'structure', requires=('header',))
+def fbx_structure(context):
+    """Object counts by FBX class"""
+    from fbx_parser import FBXDocument
+
+    counts = {}
+    for node in FBXDocument(context.fbx).objects():
+        counts[node.name] = counts.get(node.name, 0) + 1
+    return counts
+
+
+@stage('fbx', 'geometry', requires=('header',))
+def fbx_geometry(context):
+    """Vertex and polygon counts per Geometry object (decodes index arrays)"""
+    from fbx_parser import FBXDocument, split_object_name
+
+    geometries = []
+    for node in FBXDocument(context.fbx).objects('Geometry'):
+        vertices = node.find('Vertices')
+        indices = node.find('PolygonVertexIndex')
+        record = {'name': split_object_name(node.properties[1])[0], 'vertices': 0, 'polygons': 0}
+        if vertices is not None:
+            record['vertices'] = len(vertices.properties[0]) // 3
+        if indices is not None:
+            record['polygons'] = int((indices.properties[0].numpy() < 0).sum())
+        geometries.append(record)
+    return geometries
+
+
+@stage('fbx', 'report', requires=('header',))
+def fbx_report(context):
+    """Full analyze_fbx result"""
+    from comprehensive_rig_analysis import analyze_fbx
+
+    return analyze_fbx(context.path).to_dict()
+
+
+default_pipeline = Pipeline()
+
+
+def has_rig(path):
+    """Cheapest rig check: for GLB files only the header and JSON chunk are read"""
+    return default_pipeline.run(path, ['has_rig'])['has_rig']
+
+
+def _json_default(value):
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'counts'):
+        return dict(value.counts)
+    if isinstance(value, bytes):
+        return len(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def main():
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run selected analysis stages over GLB/FBX assets")
+    parser.add_argument('paths', nargs='*', default=["human_model_sit_possition.glb"])
+    parser.add_argument('-s', '--stages', default='has_rig',
+                        help="comma-separated outputs to compute (default: has_rig)")
+    parser.add_argument('--timings', action='store_true', help="include per-stage seconds")
+    parser.add_argument('--plan', action='store_true', help="print the stages each asset would run")
+    parser.add_argument('--list', action='store_true', help="list the available stages")
+    args = parser.parse_args()
+
+    if args.list:
+        for found in default_pipeline.available():
+            requires = f" (requires {', '.join(found.requires)})" if found.requires else ''
+            print(f"{found.format} {found.name:<13} {found.description}{requires}")
+        return
+
+    outputs = [name.strip() for name in args.stages.split(',') if name.strip()]
+    failures = 0
+    for path in args.paths:
+        record = {'path': path}
+        try:
+            if args.plan:
+                print(f"{path}: {' -> '.join(default_pipeline.plan(outputs, asset_format(path)))}")
+                continue
+            context = default_pipeline.run_context(path, outputs)
+            record.update({output: context.results[output] for output in outputs})
+            if args.timings:
+                record['timings'] = context.timings
+        except (OSError, GLBError, FBXError, StageError) as e:
+            record['error'] = str(e)
+            failures += 1
+        print(json.dumps(record, default=_json_default, ensure_ascii=False))
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
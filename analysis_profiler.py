@@ -0,0 +1,386 @@
+import os
+import sys
+import json
+import time
+import threading
+
+# Standard library only: the readers and the pipeline import span()/tally()
+# from here, so this module must not import any of them at load time, and
+# heavier modules used by the CLI are imported where they are needed.
+
+DEFAULT_TOP = 15
+
+
+class ProfileError(ValueError):
+    """Raised for unknown profiling targets"""
+
+
+class _NullSpan:
+    """Shared no-op span returned while no profiler is active"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, counter, value=1):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+# The Profiler collecting in this process; hooks cost one global lookup when None
+_active = None
+
+
+def span(name, category='code', **counters):
+    """Time a block under the active profiler (a shared no-op when none is active)"""
+    if _active is None:
+        return NULL_SPAN
+    return _active.span(name, category, counters)
+
+
+def tally(counter, value=1):
+    """Add to a counter of the innermost open span (ignored when no profiler is active)"""
+    if _active is not None:
+        _active.tally(counter, value)
+
+
+class Span:
+    """One timed region; counters added while it is innermost land here"""
+
+    __slots__ = ('profiler', 'name', 'category', 'counters', 'start', 'seconds', 'depth', 'thread')
+
+    def __init__(self, profiler, name, category, counters):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.counters = dict(counters)
+        self.thread = threading.get_ident()
+        self.start = None
+        self.seconds = None
+        self.depth = 0
+
+    def add(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.seconds = (time.perf_counter_ns() - self.start) / 1e9
+        stack = self.profiler._stack()
+        stack.pop()
+        if exc_type is not None:
+            self.counters['error'] = exc_type.__name__
+        self.profiler.spans.append(self)
+        return False
+
+    def to_dict(self):
+        return {'name': self.name, 'category': self.category, 'start_ns': self.start,
+                'seconds': self.seconds, 'depth': self.depth, 'thread': self.thread,
+                'counters': self.counters}
+
+
+class Profiler:
+    """Collect spans and counters, optionally with cProfile and tracemalloc
+
+    Use as a context manager: while it is open, span() and tally() calls in
+    the pipeline and readers record into it.  Counters recorded outside any
+    span go to `counters`.
+    """
+
+    def __init__(self, cprofile=False, memory=False, top=DEFAULT_TOP):
+        self.cprofile = cprofile
+        self.memory = memory
+        self.top = top
+        self.spans = []
+        self.counters = {}
+        self.functions = None
+        self.allocations = None
+        self._local = threading.local()
+        self._previous = None
+        self._profile = None
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name, category='code', counters=()):
+        return Span(self, name, category, counters)
+
+    def tally(self, counter, value=1):
+        stack = self._stack()
+        target = stack[-1].counters if stack else self.counters
+        target[counter] = target.get(counter, 0) + value
+
+    def __enter__(self):
+        global _active
+        self._previous, _active = _active, self
+        if self.memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.cprofile:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        if self._profile is not None:
+            self._profile.disable()
+            self.functions = profile_functions(self._profile, self.top)
+            self._profile = None
+        if self.memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self.allocations = {
+                'current_bytes': current, 'peak_bytes': peak,
+                'top': [{'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                         'bytes': stat.size, 'blocks': stat.count}
+                        for stat in snapshot.statistics('lineno')[:self.top]],
+            }
+        _active = self._previous
+        return False
+
+    def totals(self):
+        """{span name: {calls, seconds, self_seconds, counters}} over all spans"""
+        totals = {}
+        children = {}
+        ordered = sorted(self.spans, key=lambda s: (s.thread, s.start))
+        open_spans = []
+        for current in ordered:
+            while open_spans and (open_spans[-1].thread != current.thread or
+                                  open_spans[-1].start + open_spans[-1].seconds * 1e9 <= current.start):
+                open_spans.pop()
+            if open_spans:
+                children[id(open_spans[-1])] = children.get(id(open_spans[-1]), 0) + current.seconds
+            open_spans.append(current)
+        for current in self.spans:
+            entry = totals.setdefault(current.name, {'category': current.category, 'calls': 0,
+                                                     'seconds': 0.0, 'self_seconds': 0.0, 'counters': {}})
+            entry['calls'] += 1
+            entry['seconds'] += current.seconds
+            entry['self_seconds'] += current.seconds - children.get(id(current), 0.0)
+            for counter, value in current.counters.items():
+                if isinstance(value, (int, float)):
+                    entry['counters'][counter] = entry['counters'].get(counter, 0) + value
+        return totals
+
+    def to_dict(self):
+        record = {'spans': [s.to_dict() for s in sorted(self.spans, key=lambda s: s.start)],
+                  'totals': self.totals(), 'counters': self.counters}
+        if self.functions is not None:
+            record['functions'] = self.functions
+        if self.allocations is not None:
+            record['allocations'] = self.allocations
+        return record
+
+
+def profile_functions(profile, top=DEFAULT_TOP):
+    """Heaviest functions of a cProfile.Profile by cumulative time"""
+    import pstats
+
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append({'function': f"{os.path.basename(filename)}:{line}({function})",
+                     'calls': calls, 'seconds': own, 'cumulative': cumulative})
+    rows.sort(key=lambda row: row['cumulative'], reverse=True)
+    return rows[:top]
+
+
+def chrome_trace(records):
+    """Chrome trace-event document ('X' events) for a list of profile_asset records"""
+    starts = [s['start_ns'] for record in records for s in record.get('spans', [])]
+    origin = min(starts) if starts else 0
+    events = []
+    for record in records:
+        pid = record.get('pid', 0)
+        for s in record.get('spans', []):
+            events.append({'name': s['name'], 'cat': s['category'], 'ph': 'X', 'pid': pid,
+                           'tid': s['thread'], 'ts': (s['start_ns'] - origin) / 1000,
+                           'dur': s['seconds'] * 1e6,
+                           'args': dict(s['counters'], path=record['path'])})
+    for pid in sorted({record.get('pid', 0) for record in records}):
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': f'worker {pid}'}})
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def write_chrome_trace(records, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(chrome_trace(records), f)
+
+
+def _target(function):
+    """'module:function' -> callable taking the asset path"""
+    import importlib
+
+    module, _, name = function.partition(':')
+    try:
+        return getattr(importlib.import_module(module), name)
+    except (ImportError, AttributeError) as e:
+        raise ProfileError(f"Cannot load {function!r}: {e}") from None
+
+
+def profile_asset(path, outputs=('report',), cprofile=False, memory=False, top=DEFAULT_TOP, function=None):
+    """Profile one asset through the pipeline (or a 'module:function' taking the path)
+
+    Never raises: failures are reported in the record's 'error' key next to
+    whatever was recorded before them.
+    """
+    from analysis_pipeline import StageError, default_pipeline, asset_format
+
+    record = {'path': path, 'pid': os.getpid(), 'outputs': list(outputs) if function is None else [function]}
+    profiler = Profiler(cprofile, memory, top)
+    start = time.perf_counter()
+    try:
+        size = os.path.getsize(path)
+        record['size'] = size
+        with profiler:
+            with span(os.path.basename(path), 'asset', bytes=size):
+                if function is not None:
+                    _target(function)(path)
+                else:
+                    format = record['format'] = asset_format(path)
+                    # Outputs another format provides are skipped, as in the asset watcher
+                    wanted = [output for output in outputs if (format, output) in default_pipeline.stages]
+                    if not wanted:
+                        raise StageError(f"None of {', '.join(outputs)} is a {format} stage")
+                    default_pipeline.run_context(path, wanted)
+    except (OSError, ValueError, KeyError, IndexError) as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['seconds'] = time.perf_counter() - start
+    record.update(profiler.to_dict())
+    return record
+
+
+def _profile_job(job):
+    return profile_asset(*job)
+
+
+def run_profiles(paths, outputs, cprofile=False, memory=False, top=DEFAULT_TOP, function=None, workers=1):
+    jobs = [(path, outputs, cprofile, memory, top, function) for path in paths]
+    if workers == 1 or len(jobs) <= 1:
+        return [_profile_job(job) for job in jobs]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_profile_job, jobs))
+
+
+def combined_totals(records):
+    """Span totals summed over several assets"""
+    combined = {}
+    for record in records:
+        for name, entry in record['totals'].items():
+            target = combined.setdefault(name, {'category': entry['category'], 'calls': 0,
+                                                'seconds': 0.0, 'self_seconds': 0.0, 'counters': {}})
+            target['calls'] += entry['calls']
+            target['seconds'] += entry['seconds']
+            target['self_seconds'] += entry['self_seconds']
+            for counter, value in entry['counters'].items():
+                target['counters'][counter] = target['counters'].get(counter, 0) + value
+    return combined
+
+
+def _counters(counters):
+    return ', '.join(f"{name}={value:,}" if isinstance(value, int) else f"{name}={value}"
+                     for name, value in sorted(counters.items()))
+
+
+def print_profile_report(records, top=DEFAULT_TOP):
+    print("=== Profile Report ===")
+    totals = combined_totals([record for record in records if 'totals' in record])
+    wall = sum(record['seconds'] for record in records)
+    print(f"{len(records)} asset(s), {wall:.3f}s total")
+
+    print("\nSlowest assets:")
+    for record in sorted(records, key=lambda record: record['seconds'], reverse=True)[:top]:
+        error = f"  ! {record['error']}" if 'error' in record else ''
+        print(f"  {record['seconds'] * 1000:9.1f} ms  {record['path']}{error}")
+
+    print("\nSpans by self time:")
+    for name, entry in sorted(totals.items(), key=lambda item: item[1]['self_seconds'], reverse=True)[:top]:
+        if entry['category'] == 'asset':
+            continue
+        print(f"  {entry['self_seconds'] * 1000:9.1f} ms self {entry['seconds'] * 1000:9.1f} ms total "
+              f"{entry['calls']:6d}x  {entry['category']}:{name}")
+        if entry['counters']:
+            print(f"      {_counters(entry['counters'])}")
+
+    for record in records:
+        if 'functions' in record:
+            print(f"\ncProfile {record['path']}:")
+            for row in record['functions'][:top]:
+                print(f"  {row['cumulative'] * 1000:9.1f} ms cum {row['seconds'] * 1000:9.1f} ms own "
+                      f"{row['calls']:8d}x  {row['function']}")
+        if 'allocations' in record:
+            allocations = record['allocations']
+            print(f"\nMemory {record['path']}: peak {allocations['peak_bytes'] / 1e6:.2f} MB")
+            for row in allocations['top'][:top]:
+                print(f"  {row['bytes'] / 1024:9.1f} KiB {row['blocks']:7d} blocks  {row['location']}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Profile analysis stages per asset: timers, byte/element counters, "
+                    "optional cProfile and tracemalloc")
+    parser.add_argument('paths', nargs='*', default=["human_model_sit_possition.fbx"],
+                        help="files, directories or globs")
+    parser.add_argument('-s', '--stages', default='report',
+                        help="comma-separated pipeline outputs to run (default: %(default)s)")
+    parser.add_argument('--function', metavar='MODULE:NAME',
+                        help="profile a function taking the asset path instead, "
+                             "e.g. detailed_rig_analysis:extract_fbx_rig_details")
+    parser.add_argument('--cprofile', action='store_true', help="capture cProfile statistics per asset")
+    parser.add_argument('--tracemalloc', action='store_true', help="capture peak memory and top allocations")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help="rows per report section")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="worker processes")
+    parser.add_argument('--json', metavar='FILE', help="write the full records as JSON")
+    parser.add_argument('--trace', metavar='FILE', help="write a Chrome trace (chrome://tracing, Perfetto)")
+    args = parser.parse_args()
+
+    from batch_analyze import find_assets
+
+    paths = find_assets(args.paths)
+    if not paths:
+        print("No assets found", file=sys.stderr)
+        sys.exit(1)
+    outputs = [name.strip() for name in args.stages.split(',') if name.strip()]
+    records = run_profiles(paths, outputs, args.cprofile, args.tracemalloc, args.top,
+                           args.function, args.workers)
+    if args.function is not None:
+        # Legacy entry points print their own reports; keep ours separate
+        print()
+    print_profile_report(records, args.top)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=1, default=str)
+        print(f"\nWrote {args.json}")
+    if args.trace:
+        write_chrome_trace(records, args.trace)
+        print(f"Wrote {args.trace}")
+    sys.exit(1 if any('error' in record for record in records) else 0)
+
+
+if __name__ == "__main__":
+    # Run from the importable module: the hooks in the readers and the
+    # pipeline look for the active profiler there, not in __main__
+    import analysis_profiler
+    analysis_profiler.main()
@@ -0,0 +1,373 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+from urllib.parse import parse_qs, urlsplit
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis_cache import DEFAULT_CACHE_DIR, AnalysisCache, hash_with_stat
+from analysis_pipeline import STAGES, AssetContext, StageError, asset_format
+from batch_analyze import ANALYZER_VERSION
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE = 16
+MAX_UPLOAD_BYTES = 256 * 1024 * 1024
+MAX_HEADER_BYTES = 64 * 1024
+READ_CHUNK = 1024 * 1024
+
+# Stages computed when a request does not name any
+DEFAULT_STAGES = {
+    'glb': ['header', 'has_rig', 'skins', 'animation'],
+    'fbx': ['header', 'has_rig', 'keywords', 'structure'],
+}
+
+FILE_MAGIC = {
+    b'glTF': 'glb',
+    b'Kaydara FBX Binary': 'fbx',
+}
+
+STATUS_TEXT = {
+    200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+    405: 'Method Not Allowed', 411: 'Length Required', 413: 'Payload Too Large',
+    415: 'Unsupported Media Type', 500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+
+
+class RequestError(Exception):
+    """An HTTP error response raised while handling a request"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _json_default(value):
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    if hasattr(value, 'counts'):
+        return dict(value.counts)
+    if isinstance(value, bytes):
+        return len(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def rig_problems(results):
+    """Reasons to reject an asset, from the skins stage of a GLB result"""
+    problems = []
+    skins = results.get('skins')
+    if not skins:
+        return problems
+    for primitive in skins['primitives']:
+        label = f"Mesh {primitive['mesh']} primitive {primitive['primitive']}"
+        if primitive['skin'] is None:
+            problems.append(f"{label}: skinned but not bound to a skin")
+        for key, text in (('bad_weight_sums', 'vertices with bad weight sums'),
+                          ('negative_weights', 'negative weights'),
+                          ('out_of_range_joints', 'joint indices out of range')):
+            if primitive[key]:
+                problems.append(f"{label}: {primitive[key]} {text}")
+    return problems
+
+
+def analyze_file(path, format, stages):
+    """Run the requested pipeline stages on one file (executed in a worker process)
+
+    Never raises: failures are reported in the returned record.
+    """
+    start = time.perf_counter()
+    record = {'format': format, 'ok': False}
+    try:
+        with AssetContext(path, format=format) as context:
+            results = {name: context.get(name) for name in stages}
+        record['result'] = json.loads(json.dumps(results, default=_json_default))
+        record['ok'] = True
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['seconds'] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def sniff_format(data):
+    for magic, format in FILE_MAGIC.items():
+        if data.startswith(magic):
+            return format
+    return None
+
+
+class AnalysisService:
+    """Asyncio HTTP front end over a bounded process pool of pipeline runs
+
+    At most `workers` analyses run at once and up to `queue` more wait for
+    a worker; beyond that requests are refused with 503 and Retry-After
+    before their body is read, so a burst of uploads cannot pile up in
+    memory or on disk.  Results are cached by content hash and requested
+    stages.
+    """
+
+    def __init__(self, root='.', workers=None, queue=DEFAULT_QUEUE, cache_dir=DEFAULT_CACHE_DIR,
+                 upload_dir=None, max_upload_bytes=MAX_UPLOAD_BYTES):
+        self.root = os.path.realpath(root)
+        self.workers = workers or os.cpu_count() or 1
+        self.queue = queue
+        self.cache_dir = cache_dir
+        self.upload_dir = upload_dir or tempfile.gettempdir()
+        self.max_upload_bytes = max_upload_bytes
+        self.cache = None
+        self.pool = None
+        self.pending = 0
+        self.stats = {'requests': 0, 'analyses': 0, 'cache_hits': 0, 'rejected_busy': 0}
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        self.cache = AnalysisCache(self.cache_dir) if self.cache_dir else None
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        if unix_path:
+            return await asyncio.start_unix_server(self.handle, path=unix_path)
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+    # --- HTTP plumbing -----------------------------------------------------
+
+    async def handle(self, reader, writer):
+        self.stats['requests'] += 1
+        try:
+            try:
+                method, target, headers = await self._read_head(reader)
+                status, body, extra = await self.dispatch(method, target, headers, reader)
+            except RequestError as e:
+                status, body, extra = e.status, {'error': str(e)}, e.headers
+            except Exception as e:
+                status, body, extra = 500, {'error': f"{type(e).__name__}: {e}"}, {}
+            await self._respond(writer, status, body, extra)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _read_head(self, reader):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            raise RequestError(400, "Request header too large")
+        if len(head) > MAX_HEADER_BYTES:
+            raise RequestError(400, "Request header too large")
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, _ = lines[0].split(' ', 2)
+        except ValueError:
+            raise RequestError(400, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, headers
+
+    async def _respond(self, writer, status, body, extra=None):
+        payload = json.dumps(body, default=_json_default, ensure_ascii=False).encode('utf-8')
+        headers = {
+            'Content-Type': 'application/json; charset=utf-8',
+            'Content-Length': str(len(payload)),
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type',
+            'Connection': 'close',
+        }
+        headers.update(extra or {})
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        await writer.drain()
+
+    async def dispatch(self, method, target, headers, reader):
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if method == 'OPTIONS':
+            return 200, {}, {}
+        if url.path == '/health':
+            return 200, self.health(), {}
+        if url.path == '/stages':
+            return 200, {format: sorted(name for fmt, name in STAGES if fmt == format)
+                         for format in DEFAULT_STAGES}, {}
+        if url.path == '/analyze':
+            if method == 'GET':
+                return 200, await self.analyze_path(query), {}
+            if method == 'POST':
+                return 200, await self.analyze_upload(query, headers, reader), {}
+            raise RequestError(405, "Use GET with ?path= or POST an upload", {'Allow': 'GET, POST'})
+        raise RequestError(404, f"No route for {url.path}")
+
+    # --- Analysis ----------------------------------------------------------
+
+    def health(self):
+        return dict(self.stats, ok=True, workers=self.workers, queue=self.queue, pending=self.pending)
+
+    def _stages(self, query, format):
+        stages = [name.strip() for name in query.get('stages', '').split(',') if name.strip()]
+        stages = stages or DEFAULT_STAGES[format]
+        for name in stages:
+            if (format, name) not in STAGES:
+                raise RequestError(400, f"No {name!r} stage for {format} assets")
+        return stages
+
+    def _acquire_slot(self):
+        """Take a worker/queue slot without waiting, or refuse with 503
+
+        Only the event loop thread touches the counter, so no lock is needed.
+        """
+        if self.pending >= self.workers + self.queue:
+            self.stats['rejected_busy'] += 1
+            raise RequestError(503, "Analysis queue is full", {'Retry-After': '1'})
+        self.pending += 1
+
+    def _release_slot(self):
+        self.pending -= 1
+
+    async def _run(self, path, format, stages, digest):
+        """Answer from the cache or run analyze_file in the pool; releases the slot"""
+        try:
+            version = f"{ANALYZER_VERSION}:{','.join(stages)}"
+            analyzer = f"service-{format}"
+            if self.cache is not None:
+                cached = self.cache.get(digest, analyzer, version)
+                if cached is not None:
+                    self.stats['cache_hits'] += 1
+                    return dict(cached, cached=True)
+            loop = asyncio.get_running_loop()
+            record = await loop.run_in_executor(self.pool, analyze_file, path, format, stages)
+            self.stats['analyses'] += 1
+            record['hash'] = digest
+            record['stages'] = stages
+            problems = rig_problems(record.get('result', {}))
+            record['problems'] = problems
+            record['accepted'] = record['ok'] and not problems
+            if self.cache is not None and record['ok']:
+                self.cache.put(digest, analyzer, version, record)
+            record['cached'] = False
+            return record
+        finally:
+            self._release_slot()
+
+    async def analyze_path(self, query):
+        relative = query.get('path')
+        if not relative:
+            raise RequestError(400, "Missing ?path=")
+        path = os.path.realpath(os.path.join(self.root, relative))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise RequestError(403, "Path is outside the served directory")
+        if not os.path.isfile(path):
+            raise RequestError(404, f"No such asset: {relative}")
+        try:
+            format = asset_format(path)
+        except StageError as e:
+            raise RequestError(415, str(e))
+        stages = self._stages(query, format)
+
+        self._acquire_slot()
+        try:
+            loop = asyncio.get_running_loop()
+            digest = self.cache.known_hash(path) if self.cache is not None else None
+            if digest is None:
+                digest, key = await loop.run_in_executor(None, hash_with_stat, path)
+                if self.cache is not None:
+                    self.cache.remember(path, digest, key)
+        except BaseException:
+            self._release_slot()
+            raise
+        record = await self._run(path, format, stages, digest)
+        return dict(record, path=relative)
+
+    async def analyze_upload(self, query, headers, reader):
+        if 'content-length' not in headers:
+            raise RequestError(411, "Uploads need a Content-Length")
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            raise RequestError(400, "Invalid Content-Length")
+        if length <= 0:
+            raise RequestError(400, "Empty upload")
+        if length > self.max_upload_bytes:
+            raise RequestError(413, f"Upload exceeds {self.max_upload_bytes} bytes")
+
+        self._acquire_slot()
+        path = None
+        try:
+            first = await reader.readexactly(min(length, READ_CHUNK))
+            format = sniff_format(first)
+            if format is None:
+                raise RequestError(415, "Upload is neither a GLB nor a binary FBX file")
+            stages = self._stages(query, format)
+
+            # Stream the body to disk, hashing it on the way
+            digest = hashlib.blake2b(digest_size=20)
+            handle, path = tempfile.mkstemp(suffix=f'.{format}', dir=self.upload_dir)
+            with os.fdopen(handle, 'wb') as f:
+                chunk = first
+                remaining = length - len(first)
+                while True:
+                    digest.update(chunk)
+                    f.write(chunk)
+                    if not remaining:
+                        break
+                    chunk = await reader.readexactly(min(remaining, READ_CHUNK))
+                    remaining -= len(chunk)
+        except BaseException:
+            self._release_slot()
+            if path is not None:
+                os.unlink(path)
+            raise
+
+        try:
+            record = await self._run(path, format, stages, digest.hexdigest())
+        finally:
+            os.unlink(path)
+        return dict(record, name=query.get('name', ''), size=length)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve GLB/FBX analyses over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--root', default='.', help="directory ?path= requests are resolved against")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="analysis processes")
+    parser.add_argument('--queue', type=int, default=DEFAULT_QUEUE,
+                        help="requests allowed to wait for a worker before answering 503")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    service = AnalysisService(args.root, args.workers, args.queue,
+                              None if args.no_cache else args.cache_dir)
+
+    async def serve():
+        server = await service.start(args.host, args.port, args.unix)
+        where = args.unix or f"http://{args.host}:{args.port}"
+        print(f"Analysis service on {where} ({service.workers} workers, queue {service.queue})",
+              file=sys.stderr)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,145 +1,110 @@
 import os
-import json
-import struct
 
-def analyze_glb_file():
-    """Analyze GLB file for rig information"""
+from animation_analysis import animation_key_stats
+from bone_classifier import GLB_BONE_KEYWORDS, BoneClassifier
+from glb_reader import GLBError, open_glb
+from gltf_accessors import glb_accessors
+from skin_analysis import analyze_skins, primitive_result, skin_result
+from rig_results import (AnimationResult, AssetResult, MeshResult, NodeRecord, PrimitiveResult,
+                         RigVerdict, print_asset_result)
+
+BONE_CLASSIFIER = BoneClassifier(GLB_BONE_KEYWORDS)
+
+def find_bone_nodes(nodes):
+    """Return NodeRecords for nodes whose names look like bones"""
+    bone_nodes = []
+    for i, node in enumerate(nodes):
+        node_name = node.get('name')
+        if node_name and BONE_CLASSIFIER.is_bone(node_name):
+            bone_nodes.append(NodeRecord(index=i, name=node_name))
+    return bone_nodes
+
+def analyze_glb(glb_path):
+    """Analyze a GLB file and return an AssetResult (raises GLBError/OSError)"""
+    with open_glb(glb_path) as glb:
+        gltf_data = glb.gltf
+        nodes = gltf_data.get('nodes', [])
+        accessors = glb_accessors(glb)
+        skin_report = analyze_skins(gltf_data, accessors)
+        key_stats = animation_key_stats(gltf_data, accessors)
+
+        skins = [skin_result(gltf_data, result) for result in skin_report['skins']]
+
+        validation = {(result['mesh'], result['primitive']): result for result in skin_report['primitives']}
+        accessor_list = gltf_data.get('accessors', [])
+        meshes = []
+        for i, mesh in enumerate(gltf_data.get('meshes', [])):
+            primitives = []
+            for j, primitive in enumerate(mesh.get('primitives', [])):
+                attributes = primitive.get('attributes', {})
+                position = attributes.get('POSITION')
+                indices = primitive.get('indices')
+                fields = {'attributes': sorted(attributes),
+                          'index_count': accessor_list[indices]['count'] if indices is not None else None}
+                checks = validation.get((i, j))
+                if checks is not None:
+                    primitives.append(primitive_result(checks, **fields))
+                else:
+                    primitives.append(PrimitiveResult(
+                        mesh=i, index=j, skinned=False,
+                        vertex_count=accessor_list[position]['count'] if position is not None else 0,
+                        **fields))
+            meshes.append(MeshResult(index=i, name=mesh.get('name', ''), primitives=primitives))
+
+        animations = [AnimationResult(index=i, name=anim.get('name', ''),
+                                      channels=len(anim.get('channels', [])),
+                                      samplers=len(anim.get('samplers', [])), **key_stats[i])
+                      for i, anim in enumerate(gltf_data.get('animations', []))]
+
+        bone_nodes = find_bone_nodes(nodes)
+
+        # Summary
+        has_rig = False
+        rig_features = []
+
+        if skins:
+            has_rig = True
+            rig_features.append(f"{len(skins)} skin(s)")
+
+        if bone_nodes:
+            has_rig = True
+            rig_features.append(f"{len(bone_nodes)} bone node(s)")
+
+        skinned = skin_report['primitives']
+        broken = sum(not result['valid'] for result in skinned)
+        if broken:
+            rig_features.append(f"{broken} primitive(s) with invalid skinning")
+        elif skinned:
+            rig_features.append(f"{len(skinned)} validated skinned primitive(s)")
+
+        if animations:
+            rig_features.append(f"{len(animations)} animation(s)")
+
+        return AssetResult(path=glb_path, format='glb', size=glb.length, version=glb.version,
+                           node_count=len(nodes), bone_nodes=bone_nodes, skins=skins,
+                           meshes=meshes, animations=animations, keywords=None,
+                           rig=RigVerdict(has_rig=has_rig, valid=has_rig and not broken,
+                                          features=rig_features))
+
+def analyze_glb_file(glb_path="human_model_sit_possition.glb"):
+    """Analyze GLB file for rig information and print the report"""
     try:
         print("=== GLB File Analysis ===")
-        
-        glb_path = "human_model_sit_possition.glb"
-        
+
         if not os.path.exists(glb_path):
             print("GLB file not found!")
             return False
-            
-        with open(glb_path, 'rb') as f:
-            # Read GLB header
-            magic = f.read(4)
-            if magic != b'glTF':
-                print("Not a valid GLB file")
-                return False
-                
-            version = struct.unpack('<I', f.read(4))[0]
-            length = struct.unpack('<I', f.read(4))[0]
-            
-            print(f"✓ Valid GLB file")
-            print(f"Version: {version}")
-            print(f"Total size: {length} bytes")
-            
-            # Read JSON chunk
-            chunk_length = struct.unpack('<I', f.read(4))[0]
-            chunk_type = f.read(4)
-            
-            if chunk_type == b'JSON':
-                json_data = f.read(chunk_length).decode('utf-8')
-                
-                try:
-                    gltf_data = json.loads(json_data)
-                    
-                    print(f"\n=== GLTF Structure Analysis ===")
-                    
-                    # Check for nodes (bones/joints)
-                    if 'nodes' in gltf_data:
-                        nodes = gltf_data['nodes']
-                        print(f"Nodes found: {len(nodes)}")
-                        
-                        bone_nodes = []
-                        for i, node in enumerate(nodes):
-                            if 'name' in node:
-                                node_name = node['name']
-                                # Check if this looks like a bone
-                                bone_keywords = ['bone', 'joint', 'spine', 'neck', 'head', 'arm', 'leg', 
-                                               'hand', 'foot', 'finger', 'thumb', 'shoulder', 'hip', 
-                                               'knee', 'elbow', 'root', 'pelvis', 'chest']
-                                
-                                if any(keyword.lower() in node_name.lower() for keyword in bone_keywords):
-                                    bone_nodes.append((i, node_name))
-                                    
-                        if bone_nodes:
-                            print(f"Found {len(bone_nodes)} bone-like nodes:")
-                            for idx, name in bone_nodes:
-                                print(f"  Node {idx}: {name}")
-                    
-                    # Check for skins (rigging data)
-                    if 'skins' in gltf_data:
-                        skins = gltf_data['skins']
-                        print(f"\n✓ Skins found: {len(skins)}")
-                        
-                        for i, skin in enumerate(skins):
-                            print(f"  Skin {i}:")
-                            if 'name' in skin:
-                                print(f"    Name: {skin['name']}")
-                            if 'joints' in skin:
-                                print(f"    Joints: {len(skin['joints'])}")
-                            if 'inverseBindMatrices' in skin:
-                                print(f"    Has inverse bind matrices: Yes")
-                    
-                    # Check for animations
-                    if 'animations' in gltf_data:
-                        animations = gltf_data['animations']
-                        print(f"\n✓ Animations found: {len(animations)}")
-                        
-                        for i, anim in enumerate(animations):
-                            print(f"  Animation {i}:")
-                            if 'name' in anim:
-                                print(f"    Name: {anim['name']}")
-                            if 'channels' in anim:
-                                print(f"    Channels: {len(anim['channels'])}")
-                            if 'samplers' in anim:
-                                print(f"    Samplers: {len(anim['samplers'])}")
-                    
-                    # Check for meshes
-                    if 'meshes' in gltf_data:
-                        meshes = gltf_data['meshes']
-                        print(f"\nMeshes found: {len(meshes)}")
-                        
-                        for i, mesh in enumerate(meshes):
-                            if 'name' in mesh:
-                                print(f"  Mesh {i}: {mesh['name']}")
-                            
-                            # Check primitives for skinning attributes
-                            if 'primitives' in mesh:
-                                for j, primitive in enumerate(mesh['primitives']):
-                                    if 'attributes' in primitive:
-                                        attrs = primitive['attributes']
-                                        has_weights = any('WEIGHTS' in key for key in attrs.keys())
-                                        has_joints = any('JOINTS' in key for key in attrs.keys())
-                                        
-                                        if has_weights or has_joints:
-                                            print(f"    Primitive {j}: Has skinning data (WEIGHTS: {has_weights}, JOINTS: {has_joints})")
-                    
-                    # Summary
-                    has_rig = False
-                    rig_features = []
-                    
-                    if 'skins' in gltf_data and len(gltf_data['skins']) > 0:
-                        has_rig = True
-                        rig_features.append(f"{len(gltf_data['skins'])} skin(s)")
-                    
-                    if bone_nodes:
-                        has_rig = True
-                        rig_features.append(f"{len(bone_nodes)} bone node(s)")
-                    
-                    if 'animations' in gltf_data and len(gltf_data['animations']) > 0:
-                        rig_features.append(f"{len(gltf_data['animations'])} animation(s)")
-                    
-                    print(f"\n=== GLB RIG SUMMARY ===")
-                    if has_rig:
-                        print(f"✓ RIG DETECTED in GLB file!")
-                        print(f"Features: {', '.join(rig_features)}")
-                    else:
-                        print("✗ No clear rigging data found in GLB")
-                    
-                    return has_rig
-                    
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse JSON: {e}")
-                    return False
-            else:
-                print("GLB format not as expected")
-                return False
-                
+
+        try:
+            result = analyze_glb(glb_path)
+        except GLBError as e:
+            print(e)
+            return False
+
+        print(f"✓ Valid GLB file")
+        print_asset_result(result)
+        return result.rig.has_rig
+
     except Exception as e:
         print(f"GLB analysis failed: {e}")
         return False
@@ -147,8 +112,8 @@ def analyze_glb_file():
 def main():
     print("GLB Rig Detection Analysis")
     print("=" * 50)
-    
+
     analyze_glb_file()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,464 @@
+import numpy as np
+
+from glb_reader import open_glb
+from gltf_accessors import glb_accessors
+
+DEFAULT_SAMPLE_RATE = 30.0
+
+# Components per value for each animated property; 'weights' has one
+# component per morph target and is worked out from the output count.
+PATH_COMPONENTS = {'translation': 3, 'rotation': 4, 'scale': 3}
+
+# Two keys closer than this are considered identical (lossless pass)
+REDUNDANT_KEY_TOLERANCE = 1e-6
+
+# Largest error the lossy key-reduction pass may introduce per property:
+# scene units for translation/scale, radians for rotation.
+REDUCTION_TOLERANCES = {
+    'translation': 1e-4,
+    'rotation': 1e-3,
+    'scale': 1e-4,
+    'weights': 1e-3,
+}
+
+
+class AnimationError(ValueError):
+    """Raised when a sampler's input and output accessors do not agree"""
+
+
+def decode_sampler(accessors, sampler):
+    """Decode a sampler into (times, values, interpolation)
+
+    times has shape (keys,).  values has shape (keys, components), or
+    (keys, 3, components) for CUBICSPLINE where the middle axis holds the
+    in-tangent, value and out-tangent of each key.
+    """
+    interpolation = sampler.get('interpolation', 'LINEAR')
+    times = np.asarray(accessors.read(sampler['input']), dtype=np.float64)
+    values = np.asarray(accessors.read(sampler['output']), dtype=np.float64)
+    keys = len(times)
+    if keys == 0:
+        raise AnimationError("Sampler has no keyframes")
+    if keys > 1 and np.any(np.diff(times) <= 0):
+        raise AnimationError("Sampler input times are not strictly increasing")
+
+    elements = keys * 3 if interpolation == 'CUBICSPLINE' else keys
+    if len(values) % elements:
+        raise AnimationError(f"Sampler output count {len(values)} does not match {keys} keys")
+    if interpolation == 'CUBICSPLINE':
+        return times, values.reshape(keys, 3, -1), interpolation
+    return times, values.reshape(keys, -1), interpolation
+
+
+def decode_animation(accessors, animation):
+    """Decode every channel of an animation into a list of dicts"""
+    samplers = animation.get('samplers', [])
+    decoded = {}
+    channels = []
+    for i, channel in enumerate(animation.get('channels', [])):
+        target = channel.get('target', {})
+        index = channel['sampler']
+        if index not in decoded:
+            decoded[index] = decode_sampler(accessors, samplers[index])
+        times, values, interpolation = decoded[index]
+        path = target.get('path')
+        components = PATH_COMPONENTS.get(path)
+        if components is not None and values.shape[-1] != components:
+            raise AnimationError(f"Channel {i} animates {path} with {values.shape[-1]} components")
+        channels.append({
+            'channel': i,
+            'node': target.get('node'),
+            'path': path,
+            'input': samplers[index]['input'],
+            'interpolation': interpolation,
+            'times': times,
+            'values': values,
+        })
+    return channels
+
+
+def sample_times(start, end, rate=DEFAULT_SAMPLE_RATE):
+    """Evenly spaced times from start to end (inclusive) at `rate` samples per second"""
+    count = max(int(np.ceil((end - start) * rate - 1e-9)), 0) + 1
+    return np.minimum(start + np.arange(count) / rate, end)
+
+
+def _locate(times, t):
+    """Segment index and normalized position of each sample time, clamped to the keys"""
+    index = np.clip(np.searchsorted(times, t, side='right') - 1, 0, len(times) - 2)
+    start = times[index]
+    span = times[index + 1] - start
+    u = np.clip((t - start) / span, 0.0, 1.0)
+    return index, u
+
+
+def _expand(u, ndim):
+    """Reshape per-sample factors so they broadcast over value dimensions"""
+    return u.reshape(u.shape + (1,) * (ndim - 1))
+
+
+def _normalize(quaternions):
+    norm = np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    return quaternions / np.where(norm > 0, norm, 1.0)
+
+
+def slerp(q0, q1, u):
+    """Spherical interpolation along the shortest arc; u broadcasts against (..., 1)"""
+    dot = np.sum(q0 * q1, axis=-1, keepdims=True)
+    q1 = np.where(dot < 0, -q1, q1)
+    dot = np.minimum(np.abs(dot), 1.0)
+    theta = np.arccos(dot)
+    sin = np.sin(theta)
+    # Nearly parallel quaternions fall back to a normalized lerp
+    near = sin < 1e-6
+    safe = np.where(near, 1.0, sin)
+    w0 = np.where(near, 1.0 - u, np.sin((1.0 - u) * theta) / safe)
+    w1 = np.where(near, u, np.sin(u * theta) / safe)
+    return _normalize(w0 * q0 + w1 * q1)
+
+
+def lerp(v0, v1, u, rotation=False):
+    if rotation:
+        return slerp(v0, v1, u)
+    return v0 + (v1 - v0) * u
+
+
+def evaluate(times, values, interpolation, t, rotation=False):
+    """Evaluate a sampler at the sample times t
+
+    values may carry any trailing dimensions (several channels stacked on
+    the same keys); with rotation=True the last axis holds quaternions.
+    Times outside the key range clamp to the first/last key.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    cubic = interpolation == 'CUBICSPLINE'
+    points = values[:, 1] if cubic else values
+
+    if len(times) == 1:
+        return np.repeat(points[:1], len(t), axis=0)
+
+    if interpolation == 'STEP':
+        index = np.clip(np.searchsorted(times, t, side='right') - 1, 0, len(times) - 1)
+        return points[index]
+
+    index, u = _locate(times, t)
+    u = _expand(u, points.ndim)
+    if not cubic:
+        return lerp(points[index], points[index + 1], u, rotation)
+
+    span = _expand(times[index + 1] - times[index], points.ndim)
+    u2 = u * u
+    u3 = u2 * u
+    result = ((2 * u3 - 3 * u2 + 1) * values[index, 1]
+              + (u3 - 2 * u2 + u) * span * values[index, 2]
+              + (-2 * u3 + 3 * u2) * values[index + 1, 1]
+              + (u3 - u2) * span * values[index + 1, 0])
+    return _normalize(result) if rotation else result
+
+
+def channel_groups(channels):
+    """Yield (channel indices, stacked values) for channels sharing keys
+
+    Channels that use the same input accessor and interpolation, animate
+    the same kind of property and have the same component count are
+    stacked along a new second-to-last axis so they can be processed in
+    one vectorized call.
+    """
+    groups = {}
+    for i, channel in enumerate(channels):
+        key = (channel['input'], channel['interpolation'], channel['path'] == 'rotation',
+               channel['values'].shape[-1])
+        groups.setdefault(key, []).append(i)
+    for members in groups.values():
+        yield members, np.stack([channels[i]['values'] for i in members], axis=-2)
+
+
+def sample_animation(channels, rate=DEFAULT_SAMPLE_RATE, times=None):
+    """Evaluate all channels at a common set of sample times
+
+    Channels are evaluated per channel_groups stack, so an exporter that
+    writes one time track per clip costs one search and one blend per
+    property type.  Returns (times,
+    [array of shape (samples, components) per channel]).
+    """
+    if times is None:
+        start = min(channel['times'][0] for channel in channels) if channels else 0.0
+        end = max(channel['times'][-1] for channel in channels) if channels else 0.0
+        times = sample_times(start, end, rate)
+
+    samples = [None] * len(channels)
+    for members, stacked in channel_groups(channels):
+        first = channels[members[0]]
+        result = evaluate(first['times'], stacked, first['interpolation'], times,
+                          first['path'] == 'rotation')
+        for position, i in enumerate(members):
+            samples[i] = result[:, position]
+    return times, samples
+
+
+def value_distance(a, b, rotation=False):
+    """Per-key distance: angle in radians for quaternions, Euclidean otherwise"""
+    if rotation:
+        sign = np.where(np.sum(a * b, axis=-1, keepdims=True) < 0, -1.0, 1.0)
+        b = b * sign
+        return 2 * np.arctan2(np.linalg.norm(a - b, axis=-1), np.linalg.norm(a + b, axis=-1))
+    return np.linalg.norm(a - b, axis=-1)
+
+
+def redundant_keys(times, values, interpolation, rotation=False, tolerance=REDUNDANT_KEY_TOLERANCE):
+    """Boolean mask of keys that can be dropped without changing the curve
+
+    A constant channel keeps only its first key.  Otherwise a STEP key is
+    redundant when it repeats the previous value, a LINEAR key when it lies
+    on the interpolation between its neighbours, and a CUBICSPLINE key when
+    it sits on a flat hold (equal neighbours, zero tangents).
+    """
+    keys = len(times)
+    mask = np.zeros(keys, dtype=bool)
+    if keys < 2:
+        return mask
+
+    cubic = interpolation == 'CUBICSPLINE'
+    points = values[:, 1] if cubic else values
+    flat_tangents = not cubic or not np.any(np.abs(values[:, (0, 2)]) > tolerance)
+    if flat_tangents and np.all(value_distance(points[1:], points[:1], rotation) <= tolerance):
+        mask[1:] = True
+        return mask
+
+    if interpolation == 'STEP':
+        mask[1:] = value_distance(points[1:], points[:-1], rotation) <= tolerance
+        return mask
+    if keys < 3:
+        return mask
+
+    if cubic:
+        same = ((value_distance(points[1:-1], points[:-2], rotation) <= tolerance)
+                & (value_distance(points[1:-1], points[2:], rotation) <= tolerance))
+        tangents = np.abs(np.concatenate([values[1:-1, 0], values[1:-1, 2],
+                                          values[:-2, 2], values[2:, 0]], axis=-1))
+        mask[1:-1] = same & np.all(tangents <= tolerance, axis=-1)
+        return mask
+
+    u = (times[1:-1] - times[:-2]) / (times[2:] - times[:-2])
+    between = lerp(points[:-2], points[2:], _expand(u, points.ndim), rotation)
+    mask[1:-1] = value_distance(between, points[1:-1], rotation) <= tolerance
+    return mask
+
+
+def reduce_keys(times, points, rotation=False, tolerance=REDUCTION_TOLERANCES['translation']):
+    """Select keys to keep for a LINEAR curve within `tolerance` (Douglas-Peucker)
+
+    points is (keys, components), or (keys, channels, components) for
+    several channels stacked on the same key times.  Every span between two
+    kept keys of every channel is refined in the same pass: dropped keys are
+    interpolated from their enclosing kept keys in one vectorized call and
+    the worst key of each span over the tolerance is kept.  Passes repeat
+    until no span needs splitting.  Returns a boolean mask shaped like
+    points without its last axis.
+    """
+    single = points.ndim == 2
+    curves = (points[:, None] if single else points).transpose(1, 0, 2)
+    count, keys = curves.shape[:2]
+    keep = np.zeros((count, keys), dtype=bool)
+    keep[:, 0] = keep[:, -1] = True
+    index = np.arange(keys)
+    rows = np.arange(count)[:, None]
+    flat = curves.reshape(count * keys, -1)
+    while True:
+        before = (rows * keys + np.maximum.accumulate(np.where(keep, index, 0), axis=1)).ravel()
+        after = (rows * keys + np.minimum.accumulate(np.where(keep, index, keys - 1)[:, ::-1],
+                                                     axis=1)[:, ::-1]).ravel()
+        # Only dropped keys can need a split; kept keys are skipped entirely
+        dropped = np.flatnonzero(~keep.ravel())
+        if not len(dropped):
+            break
+        before = before[dropped]
+        after = after[dropped]
+        key_times = times[dropped % keys]
+        start = times[before % keys]
+        u = (key_times - start) / (times[after % keys] - start)
+        between = lerp(flat[before], flat[after], u[:, None], rotation)
+        error = value_distance(between, flat[dropped], rotation)
+
+        # Keys of one span are contiguous, so each span's worst key is a segment max
+        first = np.r_[True, before[1:] != before[:-1]]
+        worst = np.maximum.reduceat(error, np.flatnonzero(first))[np.cumsum(first) - 1]
+        candidates = np.flatnonzero((error > tolerance) & (error == worst))
+        if not len(candidates):
+            break
+        # One split per span per pass
+        split = np.r_[True, before[candidates[1:]] != before[candidates[:-1]]]
+        keep.ravel()[dropped[candidates[split]]] = True
+
+    if keys > 1:
+        constant = ((keep.sum(axis=1) == 2)
+                    & (value_distance(curves[:, -1], curves[:, 0], rotation) <= tolerance))
+        keep[constant, -1] = False
+    return keep[0] if single else keep.T
+
+
+def reduce_animation(channels, tolerances=REDUCTION_TOLERANCES):
+    """Keep masks of the lossy key-reduction pass for every channel
+
+    STEP channels only lose their redundant keys; other channels are
+    reduced to a LINEAR curve with reduce_keys, one call per
+    channel_groups stack and property.
+    """
+    masks = [None] * len(channels)
+    for members, stacked in channel_groups(channels):
+        first = channels[members[0]]
+        rotation = first['path'] == 'rotation'
+        if first['interpolation'] == 'STEP':
+            for i in members:
+                masks[i] = ~redundant_keys(channels[i]['times'], channels[i]['values'], 'STEP', rotation)
+            continue
+        points = stacked[:, 1] if first['interpolation'] == 'CUBICSPLINE' else stacked
+        paths = [channels[i]['path'] for i in members]
+        for path in set(paths):
+            subset = [position for position, name in enumerate(paths) if name == path]
+            tolerance = tolerances.get(path, REDUNDANT_KEY_TOLERANCE)
+            keep = reduce_keys(first['times'], points[:, subset], rotation, tolerance)
+            for column, position in enumerate(subset):
+                masks[members[position]] = keep[:, column]
+    return masks
+
+
+def analyze_channel(channel, keep, check_times, original, tolerances=REDUCTION_TOLERANCES):
+    """Redundant keys and lossy-reduction error for one decoded channel
+
+    keep is the channel's mask from reduce_animation and original its
+    curve evaluated at check_times.  The reduced curve is LINEAR (STEP for
+    STEP channels) over the kept keys; CUBICSPLINE channels are flattened
+    to their key values.
+    """
+    key_times = channel['times']
+    values = channel['values']
+    interpolation = channel['interpolation']
+    rotation = channel['path'] == 'rotation'
+    points = values[:, 1] if interpolation == 'CUBICSPLINE' else values
+
+    redundant = redundant_keys(key_times, values, interpolation, rotation)
+    reduced_interpolation = 'STEP' if interpolation == 'STEP' else 'LINEAR'
+    reduced = evaluate(key_times[keep], points[keep], reduced_interpolation, check_times, rotation)
+    error = value_distance(original, reduced, rotation)
+
+    components = points.shape[-1]
+    return {
+        'channel': channel['channel'],
+        'node': channel['node'],
+        'path': channel['path'],
+        'interpolation': interpolation,
+        'keys': len(key_times),
+        'components': components,
+        'redundant_keys': int(redundant.sum()),
+        'reduced_keys': int(keep.sum()),
+        'tolerance': tolerances.get(channel['path'], REDUNDANT_KEY_TOLERANCE),
+        'max_error': float(error.max()),
+        'rms_error': float(np.sqrt(np.mean(error * error))),
+        'value_bytes': len(key_times) * values[0].size * 4,
+        'reduced_value_bytes': int(keep.sum()) * components * 4,
+    }
+
+
+def analyze_animation(accessors, animation, rate=DEFAULT_SAMPLE_RATE, tolerances=REDUCTION_TOLERANCES):
+    """Decode, resample and key-reduce one animation
+
+    Errors are measured on the union of the resampling grid and every
+    original key time, so no key can hide between samples.
+    """
+    channels = decode_animation(accessors, animation)
+    times, _ = sample_animation(channels, rate)
+    check_times = np.union1d(times, np.concatenate([channel['times'] for channel in channels])
+                             if channels else times)
+    _, originals = sample_animation(channels, times=check_times)
+    masks = reduce_animation(channels, tolerances)
+    results = [analyze_channel(channel, keep, check_times, original, tolerances)
+               for channel, keep, original in zip(channels, masks, originals)]
+    return {
+        'name': animation.get('name', ''),
+        'start': float(times[0]) if len(times) else 0.0,
+        'duration': float(times[-1] - times[0]) if len(times) else 0.0,
+        'samples': len(times),
+        'channel_count': len(results),
+        'keys': sum(result['keys'] for result in results),
+        'redundant_keys': sum(result['redundant_keys'] for result in results),
+        'reduced_keys': sum(result['reduced_keys'] for result in results),
+        'value_bytes': sum(result['value_bytes'] for result in results),
+        'reduced_value_bytes': sum(result['reduced_value_bytes'] for result in results),
+        'max_error': {path: max((r['max_error'] for r in results if r['path'] == path), default=0.0)
+                      for path in sorted({r['path'] for r in results})},
+        'channels': results,
+    }
+
+
+def analyze_animations(gltf, accessors, rate=DEFAULT_SAMPLE_RATE, tolerances=REDUCTION_TOLERANCES):
+    """Run analyze_animation over every animation in the document"""
+    return [dict(analyze_animation(accessors, animation, rate, tolerances), animation=i)
+            for i, animation in enumerate(gltf.get('animations', []))]
+
+
+def animation_key_stats(gltf, accessors):
+    """Cheap lossless statistics per animation: duration, key count, redundant keys"""
+    stats = []
+    for animation in gltf.get('animations', []):
+        channels = decode_animation(accessors, animation)
+        starts = [channel['times'][0] for channel in channels]
+        ends = [channel['times'][-1] for channel in channels]
+        stats.append({
+            'duration': float(max(ends) - min(starts)) if channels else 0.0,
+            'keys': sum(len(channel['times']) for channel in channels),
+            'redundant_keys': sum(int(redundant_keys(channel['times'], channel['values'],
+                                                     channel['interpolation'],
+                                                     channel['path'] == 'rotation').sum())
+                                  for channel in channels),
+        })
+    return stats
+
+
+def print_animation_report(gltf, report, verbose=False):
+    """Print a human-readable summary of analyze_animations output"""
+    nodes = gltf.get('nodes', [])
+    for result in report:
+        saved = result['value_bytes'] - result['reduced_value_bytes']
+        print(f"Animation {result['animation']} ({result['name']}): {result['channel_count']} channels, "
+              f"{result['duration']:.3f}s, {result['samples']} samples")
+        print(f"    Keys: {result['keys']}, redundant: {result['redundant_keys']}, "
+              f"after reduction: {result['reduced_keys']} ({saved} value bytes saved)")
+        for path, error in result['max_error'].items():
+            print(f"    Max {path} error: {error:.6f}")
+        if not verbose:
+            continue
+        for channel in result['channels']:
+            node = channel['node']
+            name = nodes[node].get('name', '') if node is not None and node < len(nodes) else ''
+            print(f"      Channel {channel['channel']} {name}.{channel['path']} "
+                  f"[{channel['interpolation']}]: {channel['keys']} -> {channel['reduced_keys']} keys "
+                  f"({channel['redundant_keys']} redundant), max error {channel['max_error']:.6f}, "
+                  f"rms {channel['rms_error']:.6f}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Decode, resample and key-reduce glTF animations")
+    parser.add_argument('paths', nargs='*', default=["human_model_sit_possition_002.glb"])
+    parser.add_argument('--rate', type=float, default=DEFAULT_SAMPLE_RATE,
+                        help="resampling rate in samples per second")
+    parser.add_argument('--tolerance-scale', type=float, default=1.0,
+                        help="multiply the per-property reduction tolerances")
+    parser.add_argument('-v', '--verbose', action='store_true', help="list every channel")
+    args = parser.parse_args()
+
+    tolerances = {path: value * args.tolerance_scale for path, value in REDUCTION_TOLERANCES.items()}
+    for glb_path in args.paths:
+        print(f"=== Animation Analysis: {glb_path} ===")
+        with open_glb(glb_path) as glb:
+            report = analyze_animations(glb.gltf, glb_accessors(glb), args.rate, tolerances)
+            if not report:
+                print("No animations found")
+            print_animation_report(glb.gltf, report, args.verbose)
+        print()
+
+
+if __name__ == "__main__":
+    main()
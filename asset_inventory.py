@@ -0,0 +1,618 @@
+import os
+import re
+import sys
+import json
+import mmap
+import time
+import struct
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis_cache import DEFAULT_CACHE_DIR
+from analysis_pipeline import AssetContext, asset_format
+from batch_analyze import find_assets
+
+try:
+    import numpy as np
+except ImportError:  # queries and updates fall back to the SQLite store
+    np = None
+
+DEFAULT_INVENTORY = os.environ.get('ASSET_INVENTORY', os.path.join(DEFAULT_CACHE_DIR, 'inventory.idx'))
+
+# Column name -> NumPy dtype character ('S' is UTF-8 text, width chosen on save)
+TABLES = {
+    'assets': (('id', 'i8'), ('path', 'S'), ('format', 'S'), ('size', 'i8'), ('mtime_ns', 'i8'),
+               ('has_rig', '?'), ('nodes', 'i4'), ('meshes', 'i4'), ('skins', 'i4'), ('joints', 'i4'),
+               ('primitives', 'i4'), ('vertices', 'i8'), ('triangles', 'i8'), ('animations', 'i4'),
+               ('keys', 'i8'), ('valid_skins', '?'), ('error', 'S')),
+    'skins': (('asset', 'i8'), ('skin', 'i4'), ('name', 'S'), ('joints', 'i4'),
+              ('unused_joints', 'i4'), ('valid', '?')),
+    'primitives': (('asset', 'i8'), ('mesh', 'i4'), ('primitive', 'i4'), ('vertices', 'i8'),
+                   ('triangles', 'i8'), ('skinned', '?'), ('influences', 'i4'), ('bad_weight_sums', 'i8'),
+                   ('negative_weights', 'i8'), ('out_of_range_joints', 'i8'),
+                   ('unweighted_vertices', 'i8'), ('valid', '?')),
+    'animations': (('asset', 'i8'), ('animation', 'i4'), ('name', 'S'), ('duration', 'f8'),
+                   ('keys', 'i8'), ('redundant_keys', 'i8')),
+}
+CHILD_TABLES = ('skins', 'primitives', 'animations')
+
+# Pipeline outputs behind the rows; the JSON-only set is used without NumPy
+INVENTORY_OUTPUTS = {
+    'glb': ('has_rig', 'structure', 'joints', 'geometry', 'skins', 'animation'),
+    'fbx': ('has_rig', 'structure', 'bone_nodes', 'geometry'),
+}
+JSON_OUTPUTS = {
+    'glb': ('has_rig', 'structure', 'joints'),
+    'fbx': ('has_rig', 'structure', 'bone_nodes'),
+}
+
+INDEX_MAGIC = b'AINV'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sII')
+ALIGNMENT = 8
+
+CONDITION = re.compile(r'^\s*([\w.]+)\s*(==|!=|>=|<=|=|>|<|~)\s*(.*?)\s*$')
+
+
+class InventoryError(ValueError):
+    """Raised for unreadable index files and malformed queries"""
+
+
+def _columns(table):
+    return dict(TABLES[table])
+
+
+# --- Rows from pipeline results ---------------------------------------------
+
+def asset_rows(path, format, results, stat):
+    """Inventory rows for one asset from its pipeline results
+
+    Returns {'assets': row, 'skins': [...], 'primitives': [...],
+    'animations': [...]}; columns a result did not provide stay -1.
+    """
+    structure = results.get('structure', {})
+    asset = {name: -1 for name, kind in TABLES['assets'] if kind in ('i4', 'i8')}
+    asset.update({'path': os.path.abspath(path), 'format': format, 'size': stat.st_size,
+                  'mtime_ns': stat.st_mtime_ns, 'has_rig': bool(results.get('has_rig')),
+                  'valid_skins': True, 'error': ''})
+    rows = {'assets': asset, 'skins': [], 'primitives': [], 'animations': []}
+
+    if format == 'glb':
+        asset.update({'nodes': structure.get('nodes', 0), 'meshes': structure.get('meshes', 0),
+                      'skins': structure.get('skins', 0), 'animations': structure.get('animations', 0)})
+        if 'joints' in results:
+            asset['joints'] = len({joint for skin in results['joints'] for joint in skin['joints']})
+        skinned = {}
+        if 'skins' in results:
+            report = results['skins']
+            asset['valid_skins'] = bool(report['valid'])
+            skinned = {(result['mesh'], result['primitive']): result for result in report['primitives']}
+            validity = {}
+            for result in report['primitives']:
+                validity[result['skin']] = validity.get(result['skin'], True) and bool(result['valid'])
+            rows['skins'] = [{'skin': skin['skin'], 'name': skin['name'], 'joints': skin['joint_count'],
+                              'unused_joints': len(skin['unused_joints']),
+                              'valid': validity.get(skin['skin'], True)}
+                             for skin in report['skins']]
+        if 'geometry' in results:
+            for primitive in results['geometry']:
+                skin = skinned.get((primitive['mesh'], primitive['primitive']))
+                row = {'mesh': primitive['mesh'], 'primitive': primitive['primitive'],
+                       'vertices': primitive['vertices'],
+                       'triangles': primitive['triangles'] if primitive['triangles'] is not None else -1,
+                       'skinned': skin is not None, 'valid': True, 'influences': 0,
+                       'bad_weight_sums': 0, 'negative_weights': 0, 'out_of_range_joints': 0,
+                       'unweighted_vertices': 0}
+                if skin is not None:
+                    row.update({key: skin[key] for key in ('influences', 'bad_weight_sums', 'negative_weights',
+                                                           'out_of_range_joints', 'unweighted_vertices',
+                                                           'valid')})
+                rows['primitives'].append(row)
+        if 'animation' in results:
+            rows['animations'] = [{'animation': animation['index'], 'name': animation['name'],
+                                   'duration': animation['duration'], 'keys': animation['keys'],
+                                   'redundant_keys': animation['redundant_keys']}
+                                  for animation in results['animation']]
+            asset['keys'] = sum(animation['keys'] for animation in results['animation'])
+    else:
+        # Deformer objects mix skins and clusters, so the FBX skin count stays unknown (-1)
+        asset.update({'nodes': structure.get('Model', 0), 'meshes': structure.get('Geometry', 0),
+                      'animations': structure.get('AnimationStack', 0)})
+        if 'bone_nodes' in results:
+            asset['joints'] = len(results['bone_nodes'])
+        if 'geometry' in results:
+            rows['primitives'] = [{'mesh': i, 'primitive': 0, 'vertices': geometry['vertices'],
+                                   'triangles': -1, 'skinned': False, 'influences': 0, 'bad_weight_sums': 0,
+                                   'negative_weights': 0, 'out_of_range_joints': 0,
+                                   'unweighted_vertices': 0, 'valid': True}
+                                  for i, geometry in enumerate(results['geometry'])]
+
+    if rows['primitives']:
+        asset['primitives'] = len(rows['primitives'])
+        asset['vertices'] = sum(row['vertices'] for row in rows['primitives'])
+        triangles = [row['triangles'] for row in rows['primitives']]
+        asset['triangles'] = -1 if -1 in triangles else sum(triangles)
+    return rows
+
+
+def analyze_rows(path):
+    """Run the inventory stages over one asset; never raises
+
+    Failures become an error row; a file that disappeared since it was
+    listed returns None.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    try:
+        format = asset_format(path)
+        outputs = INVENTORY_OUTPUTS[format] if np is not None else JSON_OUTPUTS[format]
+        with AssetContext(path, format) as context:
+            results = {output: context.get(output) for output in outputs}
+        return asset_rows(path, format, results, stat)
+    except (OSError, ValueError, KeyError, IndexError) as e:
+        rows = asset_rows(path, os.path.splitext(path)[1].lstrip('.').lower(), {}, stat)
+        rows['assets']['error'] = f"{type(e).__name__}: {e}"
+        rows['assets']['valid_skins'] = False
+        return rows
+
+
+def parse_condition(text, table):
+    """'joints>60' -> (table, column, operator, typed value); 'asset.x' targets the assets table"""
+    match = CONDITION.match(text)
+    if not match:
+        raise InventoryError(f"Cannot parse condition {text!r} (expected e.g. joints>60)")
+    column, operator, value = match.groups()
+    if column.startswith('asset.'):
+        table, column = 'assets', column[len('asset.'):]
+    kinds = _columns(table)
+    if column not in kinds:
+        raise InventoryError(f"No column {column!r} in {table} (have: {', '.join(kinds)})")
+    kind = kinds[column]
+    operator = '==' if operator == '=' else operator
+    if operator == '~' and kind != 'S':
+        raise InventoryError(f"'~' (contains) needs a text column, not {column!r}")
+    try:
+        if kind == '?':
+            if value.lower() not in ('true', 'false', '1', '0', 'yes', 'no'):
+                raise ValueError(value)
+            value = value.lower() in ('true', '1', 'yes')
+        elif kind == 'f8':
+            value = float(value)
+        elif kind != 'S':
+            value = int(value)
+    except ValueError:
+        raise InventoryError(f"Bad value {value!r} for column {column!r}") from None
+    return table, column, operator, value
+
+
+# --- NumPy columnar store ----------------------------------------------------
+
+class ColumnarStore:
+    """Tables as NumPy column arrays, saved together in one memory-mapped file
+
+    The file is a small header, a JSON directory of (table, column, dtype,
+    offset, rows) and 8-byte aligned raw column blocks, so opening it maps
+    the file and wraps each column without reading or parsing any rows.
+    Text is stored as fixed-width UTF-8 bytes for vectorized comparisons.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.next_id = 1
+        self._file = None
+        self._mmap = None
+        self.tables = {table: {name: np.zeros(0, dtype=kind if kind != 'S' else 'S1')
+                               for name, kind in columns}
+                       for table, columns in TABLES.items()}
+        if os.path.exists(path) and os.path.getsize(path):
+            self._load()
+
+    def _load(self):
+        self._file = open(self.path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, length = INDEX_HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise InventoryError(f"{self.path} is not an inventory index (version {INDEX_VERSION})")
+        directory = json.loads(self._mmap[INDEX_HEADER.size:INDEX_HEADER.size + length])
+        start = INDEX_HEADER.size + length
+        start += -start % ALIGNMENT
+        self.next_id = directory['next_id']
+        for table, columns in directory['tables'].items():
+            if table not in self.tables:
+                continue
+            for name, (dtype, offset, rows) in columns.items():
+                if name in self.tables[table]:
+                    self.tables[table][name] = np.frombuffer(self._mmap, dtype=dtype, count=rows,
+                                                                offset=start + offset)
+
+    def save(self):
+        directory = {'next_id': self.next_id, 'tables': {}}
+        blocks = []
+        position = 0
+        for table, columns in self.tables.items():
+            directory['tables'][table] = {}
+            for name, array in columns.items():
+                data = np.ascontiguousarray(array).tobytes()
+                directory['tables'][table][name] = [array.dtype.str, position, len(array)]
+                blocks.append(data + b'\x00' * (-len(data) % ALIGNMENT))
+                position += len(blocks[-1])
+        # Column offsets are relative to the first aligned byte after the directory
+        header = json.dumps(directory, separators=(',', ':')).encode('utf-8')
+        padding = -(INDEX_HEADER.size + len(header)) % ALIGNMENT
+
+        directory_name = os.path.dirname(self.path)
+        if directory_name:
+            os.makedirs(directory_name, exist_ok=True)
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(header)))
+            f.write(header + b'\x00' * padding)
+            for block in blocks:
+                f.write(block)
+        # Keep the in-memory arrays valid after the old mapping goes away
+        self.tables = {table: {name: np.array(array) for name, array in columns.items()}
+                       for table, columns in self.tables.items()}
+        self.close()
+        os.replace(temporary, self.path)
+
+    def known(self):
+        """{path: (size, mtime_ns)} of every indexed asset"""
+        assets = self.tables['assets']
+        return {path.decode('utf-8'): (int(size), int(mtime))
+                for path, size, mtime in zip(assets['path'], assets['size'], assets['mtime_ns'])}
+
+    def _filter(self, table, keep):
+        self.tables[table] = {name: array[keep] for name, array in self.tables[table].items()}
+
+    def remove(self, paths):
+        """Drop the given assets and their child rows"""
+        if not paths:
+            return
+        assets = self.tables['assets']
+        doomed = np.isin(assets['path'], np.array([path.encode('utf-8') for path in paths]))
+        ids = assets['id'][doomed]
+        self._filter('assets', ~doomed)
+        for table in CHILD_TABLES:
+            self._filter(table, ~np.isin(self.tables[table]['asset'], ids))
+
+    def add(self, batch):
+        """Append the rows of several analyzed assets (lists of asset_rows() dicts)"""
+        if not batch:
+            return
+        self.remove([rows['assets']['path'] for rows in batch])
+        collected = {table: [] for table in TABLES}
+        for rows in batch:
+            rows['assets']['id'] = self.next_id
+            collected['assets'].append(rows['assets'])
+            for table in CHILD_TABLES:
+                for row in rows[table]:
+                    collected[table].append(dict(row, asset=self.next_id))
+            self.next_id += 1
+        for table, columns in TABLES.items():
+            if not collected[table]:
+                continue
+            for name, kind in columns:
+                values = [row[name] for row in collected[table]]
+                if kind == 'S':
+                    array = np.array([str(value).encode('utf-8') for value in values])
+                    if array.dtype.itemsize == 0:
+                        array = array.astype('S1')
+                else:
+                    array = np.array(values, dtype=kind)
+                self.tables[table][name] = np.concatenate([self.tables[table][name], array])
+
+    def _mask(self, table, conditions):
+        count = len(self.tables[table]['asset' if table != 'assets' else 'id'])
+        mask = np.ones(count, dtype=bool)
+        asset_mask = None
+        for condition_table, column, operator, value in conditions:
+            array = self.tables[condition_table][column]
+            if isinstance(value, str):
+                value = value.encode('utf-8')
+            if operator == '~':
+                matched = np.char.find(array, value) >= 0
+            else:
+                matched = {'==': np.equal, '!=': np.not_equal, '>': np.greater, '>=': np.greater_equal,
+                           '<': np.less, '<=': np.less_equal}[operator](array, value)
+            if condition_table == table:
+                mask &= matched
+            else:
+                asset_mask = matched if asset_mask is None else asset_mask & matched
+        if asset_mask is not None:
+            mask &= np.isin(self.tables[table]['asset'], self.tables['assets']['id'][asset_mask])
+        return mask
+
+    def count(self, table, conditions):
+        return int(np.count_nonzero(self._mask(table, conditions)))
+
+    def query(self, table, conditions, columns, sort=None, descending=False, limit=None):
+        """Matching rows as dicts; child-table rows also carry the asset path"""
+        rows = np.flatnonzero(self._mask(table, conditions))
+        data = self.tables[table]
+        if sort:
+            order = np.argsort(data[sort][rows], kind='stable')
+            rows = rows[order[::-1] if descending else order]
+        if limit is not None:
+            rows = rows[:limit]
+        selected = {name: data[name][rows] for name in columns}
+        if table != 'assets':
+            assets = self.tables['assets']
+            positions = np.searchsorted(assets['id'], data['asset'][rows])
+            selected = dict({'path': assets['path'][positions]}, **selected)
+        values = [[text.decode('utf-8') for text in array.tolist()] if array.dtype.kind == 'S'
+                  else array.tolist() for array in selected.values()]
+        return [dict(zip(selected, row)) for row in zip(*values)]
+
+    def stats(self):
+        return {table: len(next(iter(columns.values()))) for table, columns in self.tables.items()}
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Column views still exported; released with the last reference
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# --- SQLite store ------------------------------------------------------------
+
+SQL_TYPES = {'i4': 'INTEGER', 'i8': 'INTEGER', '?': 'INTEGER', 'f8': 'REAL', 'S': 'TEXT'}
+
+
+class SQLiteStore:
+    """The same tables in SQLite, for hosts without NumPy or for concurrent writers"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        with self._db:
+            for table, columns in TABLES.items():
+                definitions = ', '.join(
+                    f'{name} {SQL_TYPES[kind]}' + (' PRIMARY KEY' if name == 'id' else '')
+                    for name, kind in columns)
+                self._db.execute(f'CREATE TABLE IF NOT EXISTS {table} ({definitions})')
+            self._db.execute('CREATE UNIQUE INDEX IF NOT EXISTS assets_path ON assets(path)')
+            for table in CHILD_TABLES:
+                self._db.execute(f'CREATE INDEX IF NOT EXISTS {table}_asset ON {table}(asset)')
+
+    def known(self):
+        return {path: (size, mtime) for path, size, mtime in
+                self._db.execute('SELECT path, size, mtime_ns FROM assets')}
+
+    def remove(self, paths):
+        with self._db:
+            for path in paths:
+                row = self._db.execute('SELECT id FROM assets WHERE path = ?', (path,)).fetchone()
+                if row is None:
+                    continue
+                for table in CHILD_TABLES:
+                    self._db.execute(f'DELETE FROM {table} WHERE asset = ?', row)
+                self._db.execute('DELETE FROM assets WHERE id = ?', row)
+
+    def add(self, batch):
+        self.remove([rows['assets']['path'] for rows in batch])
+        with self._db:
+            for rows in batch:
+                names = [name for name, _ in TABLES['assets'] if name != 'id']
+                cursor = self._db.execute(
+                    f'INSERT INTO assets ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})',
+                    [rows['assets'][name] for name in names])
+                for table in CHILD_TABLES:
+                    names = [name for name, _ in TABLES[table]]
+                    self._db.executemany(
+                        f'INSERT INTO {table} ({", ".join(names)}) VALUES ({", ".join("?" * len(names))})',
+                        [[cursor.lastrowid if name == 'asset' else row[name] for name in names]
+                         for row in rows[table]])
+
+    def _where(self, table, conditions):
+        clauses, parameters = [], []
+        for condition_table, column, operator, value in conditions:
+            alias = 't' if condition_table == table else 'a'
+            if operator == '~':
+                clauses.append(f'instr({alias}.{column}, ?) > 0')
+            else:
+                clauses.append(f'{alias}.{column} {"=" if operator == "==" else operator} ?')
+            parameters.append(value)
+        join = ' JOIN assets a ON a.id = t.asset' if table != 'assets' else ''
+        where = f' WHERE {" AND ".join(clauses)}' if clauses else ''
+        return join + where, parameters
+
+    def count(self, table, conditions):
+        clause, parameters = self._where(table, conditions)
+        return self._db.execute(f'SELECT COUNT(*) FROM {table} t{clause}', parameters).fetchone()[0]
+
+    def query(self, table, conditions, columns, sort=None, descending=False, limit=None):
+        clause, parameters = self._where(table, conditions)
+        names = [f't.{name}' for name in columns]
+        if table != 'assets':
+            names.insert(0, 'a.path')
+            if ' JOIN ' not in clause:
+                clause = ' JOIN assets a ON a.id = t.asset' + clause
+        sql = f'SELECT {", ".join(names)} FROM {table} t{clause}'
+        if sort:
+            sql += f' ORDER BY t.{sort}{" DESC" if descending else ""}'
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        keys = ['path'] + list(columns) if table != 'assets' else list(columns)
+        kinds = _columns(table)
+        return [{key: bool(value) if kinds.get(key) == '?' else value for key, value in zip(keys, row)}
+                for row in self._db.execute(sql, parameters)]
+
+    def stats(self):
+        return {table: self._db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in TABLES}
+
+    def save(self):
+        self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+# --- Inventory ---------------------------------------------------------------
+
+class Inventory:
+    """Per-asset, per-skin, per-primitive and per-animation rows for a library
+
+    update() re-analyzes only assets whose size or mtime changed since they
+    were indexed; replace() takes results the caller already computed (the
+    asset watcher uses it).  Paths ending in .sqlite/.db, or a missing
+    NumPy, select the SQLite store; otherwise the columnar file is used.
+    """
+
+    def __init__(self, path=DEFAULT_INVENTORY, sqlite=None):
+        if sqlite is None:
+            sqlite = np is None or path.endswith(('.sqlite', '.db'))
+        self.path = path
+        self.store = SQLiteStore(path) if sqlite else ColumnarStore(path)
+
+    def update(self, paths, workers=None, prune=False):
+        """Index new or changed assets among paths; returns counts by outcome"""
+        start = time.perf_counter()
+        known = self.store.known()
+        changed, unchanged = [], 0
+        for path in paths:
+            key = os.path.abspath(path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if known.get(key) == (stat.st_size, stat.st_mtime_ns):
+                unchanged += 1
+            else:
+                changed.append(path)
+
+        workers = workers or os.cpu_count() or 1
+        if workers == 1 or len(changed) <= 1:
+            batch = [analyze_rows(path) for path in changed]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                batch = list(executor.map(analyze_rows, changed, chunksize=max(len(changed) // (workers * 4), 1)))
+        batch = [rows for rows in batch if rows is not None]
+        self.store.add(batch)
+
+        removed = []
+        if prune:
+            removed = [path for path in known if not os.path.exists(path)]
+            self.store.remove(removed)
+        self.store.save()
+        indexed = [rows['assets']['path'] for rows in batch]
+        return {'added': sum(1 for path in indexed if path not in known),
+                'updated': sum(1 for path in indexed if path in known),
+                'unchanged': unchanged, 'removed': len(removed),
+                'failed': sum(1 for rows in batch if rows['assets']['error']),
+                'seconds': time.perf_counter() - start}
+
+    def replace(self, path, results):
+        """Store rows built from pipeline results for one asset (or drop it if it no longer exists)"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.store.remove([os.path.abspath(path)])
+            return
+        self.store.add([asset_rows(path, asset_format(path), results, stat)])
+
+    def query(self, table='assets', where=(), columns=None, sort=None, descending=False, limit=None):
+        if table not in TABLES:
+            raise InventoryError(f"Unknown table {table!r} (have: {', '.join(TABLES)})")
+        conditions = [parse_condition(text, table) for text in where]
+        columns = list(columns or [name for name, _ in TABLES[table] if name not in ('id', 'asset')])
+        for name in columns + ([sort] if sort else []):
+            if name not in _columns(table):
+                raise InventoryError(f"No column {name!r} in {table}")
+        return self.store.query(table, conditions, columns, sort, descending, limit)
+
+    def count(self, table='assets', where=()):
+        return self.store.count(table, [parse_condition(text, table) for text in where])
+
+    def stats(self):
+        return self.store.stats()
+
+    def save(self):
+        self.store.save()
+
+    def close(self):
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def print_rows(rows):
+    if not rows:
+        print("No matching rows")
+        return
+    names = list(rows[0])
+    cells = [[f"{value:.3f}" if isinstance(value, float) else str(value) for value in row.values()]
+             for row in rows]
+    widths = [max(len(name), *(len(row[i]) for row in cells)) for i, name in enumerate(names)]
+    print('  '.join(name.ljust(width) for name, width in zip(names, widths)))
+    for row in cells:
+        print('  '.join(cell.ljust(width) for cell, width in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Index GLB/FBX analysis results and query them across the library",
+        epilog="example: asset_inventory.py -w 'joints>60' -w animations=0 -c path,joints")
+    parser.add_argument('paths', nargs='*', help="files, directories or globs to (re-)index first")
+    parser.add_argument('--index', default=DEFAULT_INVENTORY, help="index file (default: %(default)s)")
+    parser.add_argument('--sqlite', action='store_true', help="use the SQLite store")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes for indexing")
+    parser.add_argument('--prune', action='store_true', help="drop indexed assets that no longer exist")
+    parser.add_argument('-t', '--table', default='assets', choices=sorted(TABLES))
+    parser.add_argument('-w', '--where', action='append', default=[],
+                        help="condition such as joints>60, name~idle or asset.format=glb (repeatable, ANDed)")
+    parser.add_argument('-c', '--columns', help="comma-separated columns to show")
+    parser.add_argument('--sort', help="column to sort by")
+    parser.add_argument('--desc', action='store_true', help="sort descending")
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--count', action='store_true', help="print only the number of matching rows")
+    parser.add_argument('--json', action='store_true', help="print one JSON object per row")
+    args = parser.parse_args()
+
+    try:
+        with Inventory(args.index, sqlite=args.sqlite or None) as inventory:
+            if args.paths:
+                summary = inventory.update(find_assets(args.paths), args.workers, args.prune)
+                print(f"Indexed {summary['added']} new, {summary['updated']} changed, "
+                      f"{summary['unchanged']} unchanged, {summary['removed']} removed, "
+                      f"{summary['failed']} failed in {summary['seconds']:.2f}s", file=sys.stderr)
+                if not (args.where or args.columns or args.count or args.sort):
+                    return
+            start = time.perf_counter()
+            if args.count:
+                print(inventory.count(args.table, args.where))
+                return
+            columns = [name.strip() for name in args.columns.split(',')] if args.columns else None
+            rows = inventory.query(args.table, args.where, columns, args.sort, args.desc, args.limit)
+            elapsed = time.perf_counter() - start
+            if args.json:
+                for row in rows:
+                    print(json.dumps(row, ensure_ascii=False))
+            else:
+                print_rows(rows)
+                print(f"{len(rows)} rows in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    except InventoryError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
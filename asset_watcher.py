@@ -0,0 +1,499 @@
+import os
+import sys
+import json
+import time
+import struct
+import hashlib
+import argparse
+
+from analysis_cache import content_hash
+from analysis_pipeline import AssetContext, default_pipeline, asset_format, _json_default
+from batch_analyze import ASSET_EXTENSIONS, SKIP_DIRS, find_assets
+from glb_reader import open_glb
+
+DEFAULT_OUTPUTS = {
+    'glb': ('structure', 'joints', 'skins', 'animation'),
+    'fbx': ('structure', 'bone_nodes'),
+}
+# Blender writes an export in several bursts; wait this long after the last
+# event for a path before analyzing it
+DEFAULT_DEBOUNCE = 0.5
+DEFAULT_INTERVAL = 1.0
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+INOTIFY_EVENT = struct.Struct('iIII')
+
+WEIGHT_ERRORS = ('bad_weight_sums', 'negative_weights', 'out_of_range_joints')
+
+
+class WatchError(ValueError):
+    """Raised when a watch directory is missing or a backend is unavailable"""
+
+
+def _is_asset(path):
+    return path.lower().endswith(ASSET_EXTENSIONS)
+
+
+def _walk_dirs(root):
+    """root and every subdirectory find_assets would descend into"""
+    for directory, dirs, _ in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith('.'))
+        yield directory
+
+
+class InotifyBackend:
+    """Linux inotify over every directory below the roots (via ctypes)
+
+    New subdirectories are watched as they appear and scanned, since files
+    can land in them before the watch is added.  A queue overflow reports
+    every asset under the roots as changed.
+    """
+
+    name = 'inotify'
+
+    def __init__(self, roots):
+        import ctypes
+        import ctypes.util
+
+        self.roots = roots
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise WatchError("inotify is not available")
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise WatchError(f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+        self.directories = {}
+        for root in roots:
+            for directory in _walk_dirs(root):
+                self._add(directory)
+
+    def _add(self, directory):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.directories[wd] = directory
+
+    def _read(self):
+        try:
+            return os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return b''
+
+    def wait(self, timeout):
+        """Paths touched within timeout seconds (None blocks until an event)"""
+        import select
+
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        paths = set()
+        data = self._read()
+        while data:
+            offset = 0
+            while offset + INOTIFY_EVENT.size <= len(data):
+                wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                offset += INOTIFY_EVENT.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\x00'))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    paths.update(os.path.abspath(path) for path in find_assets(self.roots))
+                    continue
+                if mask & IN_IGNORED:
+                    self.directories.pop(wd, None)
+                    continue
+                directory = self.directories.get(wd)
+                if directory is None or not name:
+                    continue
+                path = os.path.join(directory, name)
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and name not in SKIP_DIRS and not name.startswith('.'):
+                        for subdirectory in _walk_dirs(path):
+                            self._add(subdirectory)
+                        paths.update(os.path.abspath(found) for found in find_assets([path]))
+                elif _is_asset(name):
+                    paths.add(os.path.abspath(path))
+            data = self._read()
+        return paths
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class PollingBackend:
+    """Portable fallback: compare (mtime_ns, size) snapshots every interval"""
+
+    name = 'polling'
+
+    def __init__(self, roots, interval=DEFAULT_INTERVAL):
+        self.roots = roots
+        self.interval = interval
+        self.snapshot = self._stat_all()
+
+    def _stat_all(self):
+        snapshot = {}
+        for path in find_assets(self.roots):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            snapshot[os.path.abspath(path)] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        snapshot = self._stat_all()
+        changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(path) != self.snapshot.get(path)}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self):
+        pass
+
+
+def open_backend(roots, poll=False, interval=DEFAULT_INTERVAL):
+    """inotify where the platform has it, otherwise polling"""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyBackend(roots)
+        except (OSError, AttributeError, WatchError):
+            pass
+    return PollingBackend(roots, interval)
+
+
+def section_digests(path, format=None):
+    """BLAKE2b digest per file section a stage can read (see analysis_pipeline.SECTIONS)
+
+    GLB files get separate JSON and BIN digests so a weights-only re-export
+    leaves the JSON-only stages alone; other formats hash the whole file.
+    """
+    if (format or asset_format(path)) != 'glb':
+        return {'file': content_hash(path)}
+    with open_glb(path) as glb:
+        bin_chunk = glb.bin_chunk
+        return {'json': hashlib.blake2b(glb.json_chunk, digest_size=20).hexdigest(),
+                'bin': hashlib.blake2b(bin_chunk if bin_chunk is not None else b'',
+                                       digest_size=20).hexdigest()}
+
+
+# --- Result diffs ----------------------------------------------------------
+
+def _by_key(items, key):
+    return {key(item): item for item in items}
+
+
+def diff_joints(old, new):
+    """Joints added, removed or reparented, per skin name"""
+    changes = []
+    old_skins = _by_key(old, lambda skin: skin['name'] or skin['skin'])
+    new_skins = _by_key(new, lambda skin: skin['name'] or skin['skin'])
+    for name in old_skins.keys() - new_skins.keys():
+        changes.append({'kind': 'skin_removed', 'skin': name})
+    for name in new_skins.keys() - old_skins.keys():
+        changes.append({'kind': 'skin_added', 'skin': name})
+    for name in old_skins.keys() & new_skins.keys():
+        before = old_skins[name]['joints']
+        after = new_skins[name]['joints']
+        for joint in sorted(after.keys() - before.keys()):
+            changes.append({'kind': 'joint_added', 'skin': name, 'joint': joint, 'parent': after[joint]})
+        for joint in sorted(before.keys() - after.keys()):
+            changes.append({'kind': 'joint_removed', 'skin': name, 'joint': joint})
+        for joint in sorted(before.keys() & after.keys()):
+            if before[joint] != after[joint]:
+                changes.append({'kind': 'joint_reparented', 'skin': name, 'joint': joint,
+                                'old': before[joint], 'new': after[joint]})
+    return changes
+
+
+def diff_bone_nodes(old, new):
+    """Bone nodes added or removed, by name"""
+    before = {bone['name'] for bone in old}
+    after = {bone['name'] for bone in new}
+    return ([{'kind': 'joint_added', 'joint': name} for name in sorted(after - before)] +
+            [{'kind': 'joint_removed', 'joint': name} for name in sorted(before - after)])
+
+
+def diff_skins(old, new):
+    """Primitives whose weights became invalid or were fixed"""
+    changes = []
+    before = _by_key(old['primitives'], lambda result: (result['mesh'], result['primitive']))
+    after = _by_key(new['primitives'], lambda result: (result['mesh'], result['primitive']))
+    for key in sorted(after):
+        result = after[key]
+        previous = before.get(key)
+        errors = {name: result[name] for name in WEIGHT_ERRORS if result[name]}
+        if previous is None:
+            if errors:
+                changes.append({'kind': 'weights_broken', 'mesh': key[0], 'primitive': key[1], **errors})
+            continue
+        was_valid = all(not previous[name] for name in WEIGHT_ERRORS)
+        if was_valid and errors:
+            changes.append({'kind': 'weights_broken', 'mesh': key[0], 'primitive': key[1], **errors})
+        elif not was_valid and not errors:
+            changes.append({'kind': 'weights_fixed', 'mesh': key[0], 'primitive': key[1]})
+        elif any(previous[name] != result[name] for name in WEIGHT_ERRORS):
+            changes.append({'kind': 'weights_changed', 'mesh': key[0], 'primitive': key[1],
+                            **{name: [previous[name], result[name]] for name in WEIGHT_ERRORS}})
+    return changes
+
+
+def diff_animations(old, new):
+    """Animations added, removed, or with a different duration or key count"""
+    changes = []
+    before = _by_key(old, lambda animation: animation['name'] or animation['index'])
+    after = _by_key(new, lambda animation: animation['name'] or animation['index'])
+    for name in sorted(after.keys() - before.keys(), key=str):
+        changes.append({'kind': 'animation_added', 'animation': name})
+    for name in sorted(before.keys() - after.keys(), key=str):
+        changes.append({'kind': 'animation_removed', 'animation': name})
+    for name in sorted(before.keys() & after.keys(), key=str):
+        fields = {field: [before[name][field], after[name][field]]
+                  for field in ('duration', 'keys', 'redundant_keys')
+                  if before[name].get(field) != after[name].get(field)}
+        if fields:
+            changes.append({'kind': 'animation_changed', 'animation': name, **fields})
+    return changes
+
+
+DIFFERS = {
+    'joints': diff_joints,
+    'bone_nodes': diff_bone_nodes,
+    'skins': diff_skins,
+    'animation': diff_animations,
+}
+
+
+def _plain(value):
+    """JSON round trip so NumPy values compare like the printed results"""
+    return json.loads(json.dumps(value, default=_json_default))
+
+
+def diff_results(old, new):
+    """Semantic changes between two {stage: result} dicts for the same asset"""
+    changes = []
+    for name in sorted(new.keys() & old.keys()):
+        before, after = _plain(old[name]), _plain(new[name])
+        if before == after:
+            continue
+        differ = DIFFERS.get(name)
+        found = differ(before, after) if differ else []
+        if not found:
+            found = [{'kind': 'changed'}]
+        changes.extend(dict(change, stage=name) for change in found)
+    return changes
+
+
+# --- Watcher ---------------------------------------------------------------
+
+class AssetWatcher:
+    """Keep stage results for every asset under the roots up to date
+
+    Each asset remembers its section digests and results.  refresh()
+    re-hashes the file, asks the pipeline which outputs read a changed
+    section, re-runs only those and diffs them against the previous results.
+    With an Inventory, the stages its rows need are tracked as well and its
+    rows are replaced after every refresh.
+    """
+
+    def __init__(self, roots, outputs=None, debounce=DEFAULT_DEBOUNCE,
+                 poll=False, interval=DEFAULT_INTERVAL, pipeline=default_pipeline, inventory=None):
+        for root in roots:
+            if not os.path.isdir(root):
+                raise WatchError(f"Not a directory: {root}")
+        self.roots = roots
+        self.outputs = outputs or DEFAULT_OUTPUTS
+        self.inventory = inventory
+        if inventory is not None:
+            from asset_inventory import INVENTORY_OUTPUTS
+            self.outputs = {format: tuple(dict.fromkeys(self.outputs.get(format, ()) + extra))
+                            for format, extra in INVENTORY_OUTPUTS.items()}
+        self.debounce = debounce
+        self.poll = poll
+        self.interval = interval
+        self.pipeline = pipeline
+        self.assets = {}
+        self.backend = None
+
+    def _outputs(self, format):
+        return [output for output in self.outputs.get(format, ())
+                if (format, output) in self.pipeline.stages]
+
+    def refresh(self, path):
+        """Re-analyze one asset; returns a record describing what changed"""
+        path = os.path.abspath(path)
+        start = time.perf_counter()
+        record = {'path': path}
+        previous = self.assets.get(path)
+        if not os.path.isfile(path):
+            if previous is None:
+                return None
+            del self.assets[path]
+            if self.inventory is not None:
+                self.inventory.replace(path, None)
+            record['event'] = 'removed'
+            return record
+
+        try:
+            format = asset_format(path)
+            digests = section_digests(path, format)
+            outputs = self._outputs(format)
+            if previous is None:
+                changed = set(digests)
+                stages = outputs
+            else:
+                changed = {section for section in digests
+                           if digests[section] != previous['digests'].get(section)}
+                stages = self.pipeline.affected(outputs, format, changed) if changed else []
+            results = dict(previous['results']) if previous else {}
+            if stages:
+                with AssetContext(path, format, stages=self.pipeline.stages) as context:
+                    results.update({output: context.get(output) for output in stages})
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            # Usually a partially written export (or a malformed one); the next event retries
+            record.update({'event': 'error', 'error': str(e)})
+            return record
+
+        self.assets[path] = {'digests': digests, 'results': results}
+        if self.inventory is not None and stages:
+            self.inventory.replace(path, results)
+        record.update({
+            'event': 'added' if previous is None else ('changed' if changed else 'unchanged'),
+            'sections': sorted(changed),
+            'stages': stages,
+            'changes': diff_results(previous['results'], results) if previous else [],
+            'seconds': round(time.perf_counter() - start, 4),
+        })
+        return record
+
+    def scan(self):
+        """Analyze every asset under the roots; returns one record per asset"""
+        records = [self.refresh(path) for path in find_assets(self.roots)]
+        for path in list(self.assets):
+            if not os.path.isfile(path):
+                records.append(self.refresh(path))
+        if self.inventory is not None:
+            self.inventory.save()
+        return [record for record in records if record is not None]
+
+    def run(self, callback, duration=None):
+        """Watch until interrupted (or for duration seconds), calling back per record"""
+        backend = open_backend(self.roots, self.poll, self.interval)
+        self.backend = backend.name
+        pending = {}
+        stop = time.monotonic() + duration if duration is not None else None
+        try:
+            while stop is None or time.monotonic() < stop:
+                now = time.monotonic()
+                timeout = min(pending.values()) - now if pending else None
+                if stop is not None:
+                    timeout = stop - now if timeout is None else min(timeout, stop - now)
+                for path in backend.wait(max(timeout, 0) if timeout is not None else None):
+                    pending[path] = time.monotonic() + self.debounce
+                now = time.monotonic()
+                for path in sorted(path for path, due in pending.items() if due <= now):
+                    del pending[path]
+                    record = self.refresh(path)
+                    if record is not None:
+                        if self.inventory is not None:
+                            self.inventory.save()
+                        callback(record)
+        finally:
+            backend.close()
+
+
+def _describe(change):
+    details = ', '.join(f"{key}={value}" for key, value in change.items()
+                        if key not in ('kind', 'stage'))
+    return f"{change['stage']}: {change['kind']}" + (f" ({details})" if details else '')
+
+
+def print_record(record):
+    event = record['event']
+    if event == 'removed':
+        print(f"- {record['path']}")
+        return
+    if event == 'error':
+        print(f"! {record['path']}: {record['error']}")
+        return
+    if event == 'unchanged':
+        return
+    marker = '+' if event == 'added' else '~'
+    sections = ','.join(record['sections'])
+    stages = ','.join(record['stages']) or 'none'
+    print(f"{marker} {record['path']} [{sections}] stages: {stages} ({record['seconds']:.3f}s)")
+    for change in record['changes']:
+        print(f"    {_describe(change)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Watch asset directories and re-run only the analysis stages a change affects")
+    parser.add_argument('roots', nargs='*', default=['.'])
+    parser.add_argument('-s', '--stages',
+                        help="comma-separated outputs to track for every format "
+                             "(default: GLB structure,joints,skins,animation; FBX structure,bone_nodes)")
+    parser.add_argument('--poll', action='store_true', help="poll instead of using inotify")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL,
+                        help="polling interval in seconds (default: %(default)s)")
+    parser.add_argument('--debounce', type=float, default=DEFAULT_DEBOUNCE,
+                        help="quiet seconds before a changed file is analyzed (default: %(default)s)")
+    parser.add_argument('--json', action='store_true', help="print one JSON record per event")
+    parser.add_argument('--once', action='store_true', help="scan once and exit")
+    parser.add_argument('--inventory', nargs='?', const='', metavar='INDEX',
+                        help="keep an asset inventory index up to date (default index if no path given)")
+    args = parser.parse_args()
+
+    outputs = None
+    if args.stages:
+        names = tuple(name.strip() for name in args.stages.split(',') if name.strip())
+        outputs = {'glb': names, 'fbx': names}
+
+    def emit(record):
+        if args.json:
+            print(json.dumps(record, default=_json_default, ensure_ascii=False), flush=True)
+        else:
+            print_record(record)
+            sys.stdout.flush()
+
+    inventory = None
+    if args.inventory is not None:
+        from asset_inventory import DEFAULT_INVENTORY, Inventory
+        inventory = Inventory(args.inventory or DEFAULT_INVENTORY)
+
+    try:
+        watcher = AssetWatcher(args.roots, outputs, args.debounce, args.poll, args.interval,
+                               inventory=inventory)
+    except WatchError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    records = watcher.scan()
+    for record in records:
+        emit(record)
+    if args.once:
+        sys.exit(1 if any(record['event'] == 'error' for record in records) else 0)
+
+    if not args.json:
+        print(f"Watching {len(watcher.assets)} assets in {', '.join(args.roots)}; Ctrl+C to stop")
+    try:
+        watcher.run(emit)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
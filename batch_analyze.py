@@ -0,0 +1,233 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis_cache import DEFAULT_CACHE_DIR, AnalysisCache, hash_with_stat
+
+# Bump whenever the structure or meaning of analysis results changes so
+# stale cache entries are ignored
+ANALYZER_VERSION = '5'
+
+ASSET_EXTENSIONS = ('.glb', '.fbx')
+SKIP_DIRS = {'node_modules', '__pycache__'}
+
+
+def find_assets(patterns):
+    """Expand files, directories (recursively) and glob patterns into asset paths"""
+    seen = set()
+    assets = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            candidates = []
+            for root, dirs, files in os.walk(pattern):
+                dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith('.'))
+                candidates.extend(os.path.join(root, name) for name in sorted(files))
+        else:
+            candidates = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for path in candidates:
+            if not path.lower().endswith(ASSET_EXTENSIONS):
+                continue
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                assets.append(path)
+    return assets
+
+
+def analyze_glb_asset(path):
+    """Structured GLB analysis as a JSON-ready dict"""
+    from analyze_glb import analyze_glb
+
+    return analyze_glb(path).to_dict()
+
+
+def analyze_fbx_asset(path):
+    """Structured FBX analysis as a JSON-ready dict"""
+    from comprehensive_rig_analysis import analyze_fbx
+
+    return analyze_fbx(path).to_dict()
+
+
+_worker_caches = {}
+
+
+def _worker_cache(cache_dir):
+    """Read-only cache connection reused across tasks in a worker process"""
+    cache = _worker_caches.get(cache_dir)
+    if cache is None:
+        cache = _worker_caches[cache_dir] = AnalysisCache(cache_dir, readonly=True)
+    return cache
+
+
+def asset_format(path):
+    return os.path.splitext(path)[1].lower().lstrip('.')
+
+
+def analyze_asset(path, cache_dir=None, digest=None, profile=False):
+    """Analyze one asset; never raises so one bad file cannot stop a batch
+
+    With a cache_dir, the file is hashed (unless digest is given) and an
+    existing result for identical content is returned instead of re-running
+    the analysis.  With profile=True the record gains a 'profile' entry of
+    span totals and spans (see analysis_profiler).
+    """
+    if profile:
+        from analysis_profiler import Profiler, span
+
+        with Profiler() as profiler:
+            with span(os.path.basename(path), 'asset'):
+                record = analyze_asset(path, cache_dir, digest)
+        record['profile'] = dict(profiler.to_dict(), pid=os.getpid())
+        return record
+
+    start = time.perf_counter()
+    record = {'path': path, 'format': asset_format(path), 'ok': False}
+    try:
+        record['size'] = os.path.getsize(path)
+        cached = None
+        if cache_dir is not None:
+            if digest is None:
+                # The stat key travels with the hash so the parent records
+                # the file as it was read, not as it is when stored
+                digest, record['stat'] = hash_with_stat(path)
+            record['hash'] = digest
+            cached = _worker_cache(cache_dir).get(digest, record['format'], ANALYZER_VERSION)
+        if cached is not None:
+            record['result'] = _with_path(cached, path)
+            record['cached'] = True
+        elif record['format'] == 'glb':
+            record['result'] = analyze_glb_asset(path)
+        else:
+            record['result'] = analyze_fbx_asset(path)
+        record['ok'] = True
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+    record['seconds'] = round(time.perf_counter() - start, 6)
+    return record
+
+
+def _with_path(result, path):
+    """A cached result attributed to path; entries are shared by identical files"""
+    return dict(result, path=path)
+
+
+def _cached_record(cache, path):
+    """Serve an asset from the cache using only a stat() call, or return None"""
+    start = time.perf_counter()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    digest = cache.known_hash(path, stat)
+    if digest is None:
+        return None
+    result = cache.get(digest, asset_format(path), ANALYZER_VERSION)
+    if result is None:
+        return None
+    return {'path': path, 'format': asset_format(path), 'ok': True, 'size': stat.st_size,
+            'hash': digest, 'result': _with_path(result, path), 'cached': True,
+            'seconds': round(time.perf_counter() - start, 6)}
+
+
+def _store_record(cache, record):
+    """Persist a worker's result and the path's hash in the cache"""
+    stat = record.pop('stat', None)
+    if not record['ok'] or 'hash' not in record:
+        return
+    if stat is not None:
+        cache.remember(record['path'], record['hash'], stat)
+    if record.get('cached'):
+        cache.touch(record['hash'], record['format'], ANALYZER_VERSION)
+    else:
+        result = {key: value for key, value in record['result'].items() if key != 'path'}
+        cache.put(record['hash'], record['format'], ANALYZER_VERSION, result)
+
+
+def run_batch(paths, workers=None, chunksize=None, cache=None, profile=False):
+    """Yield analysis records for paths, fanned out over a process pool
+
+    With an AnalysisCache, unchanged files are answered from the cache in
+    this process and only the remainder is sent to the workers.
+    """
+    pending = paths
+    if cache is not None:
+        pending = []
+        for path in paths:
+            record = _cached_record(cache, path)
+            if record is None:
+                pending.append(path)
+            else:
+                yield record
+
+    analyze = functools.partial(analyze_asset, cache_dir=cache.cache_dir if cache else None,
+                                profile=profile)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pending) <= 1:
+        records = map(analyze, pending)
+        executor = None
+    else:
+        # Small chunks keep workers busy; larger ones cut IPC overhead on big batches
+        chunksize = chunksize or max(1, min(64, len(pending) // (workers * 4)))
+        executor = ProcessPoolExecutor(max_workers=workers)
+        records = executor.map(analyze, pending, chunksize=chunksize)
+
+    try:
+        for record in records:
+            if cache is not None:
+                _store_record(cache, record)
+            yield record
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze GLB/FBX assets in bulk and write JSON Lines")
+    parser.add_argument('paths', nargs='*', default=['.'],
+                        help="files, directories or glob patterns (default: current directory)")
+    parser.add_argument('-o', '--output', help="JSON Lines output file (default: stdout)")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f"analysis cache directory (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument('--no-cache', action='store_true', help="always re-run every analysis")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="profile every analyzed asset: add per-span totals to each record "
+                             "and write a Chrome trace of all workers to FILE")
+    args = parser.parse_args()
+
+    paths = find_assets(args.paths)
+    cache = None if args.no_cache else AnalysisCache(args.cache_dir)
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+
+    start = time.perf_counter()
+    failures = 0
+    traced = []
+    try:
+        for record in run_batch(paths, args.workers, cache=cache, profile=bool(args.trace)):
+            failures += not record['ok']
+            if 'profile' in record:
+                profile = record['profile']
+                traced.append({'path': record['path'], 'pid': profile['pid'], 'spans': profile.pop('spans')})
+            output.write(json.dumps(record, ensure_ascii=False) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if cache is not None:
+            cache.close()
+        if args.trace:
+            from analysis_profiler import write_chrome_trace
+            write_chrome_trace(traced, args.trace)
+
+    elapsed = time.perf_counter() - start
+    print(f"Analyzed {len(paths)} asset(s) in {elapsed:.2f}s, {failures} failed", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
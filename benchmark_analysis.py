@@ -0,0 +1,443 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import argparse
+import statistics
+import tracemalloc
+import contextlib
+
+import numpy as np
+
+from analysis_cache import DEFAULT_CACHE_DIR
+from glb_reader import open_glb, write_glb
+from gltf_accessors import glb_accessors
+from skin_analysis import analyze_skins
+from animation_analysis import analyze_animations
+from forward_kinematics import ForwardKinematics
+from skinning import analyze_posed_bounds
+from fbx_parser import FBXDocument, open_fbx, write_fbx
+from fbx_scanner import FBX_SCANNER, clear_scan_cache
+
+# Kept with the analysis cache, which is already ignored by git
+DEFAULT_BASELINE = os.path.join(DEFAULT_CACHE_DIR, 'benchmark_baseline.json')
+
+# Synthetic asset sizes: skeleton joints, mesh vertices, animation keys per channel
+SIZES = {
+    'small': {'joints': 64, 'vertices': 2000, 'keys': 30},
+    'medium': {'joints': 128, 'vertices': 50000, 'keys': 240},
+    'large': {'joints': 256, 'vertices': 200000, 'keys': 1000},
+}
+
+# Differences below these floors are treated as noise, whatever the ratio
+TIME_NOISE_FLOOR = 0.0005
+MEMORY_NOISE_FLOOR = 64 * 1024
+
+
+def _random_weights(rng, vertices, influences=4):
+    weights = rng.random((vertices, influences), dtype=np.float32)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return weights
+
+
+def _random_quaternions(rng, count):
+    quaternions = rng.normal(size=(count, 4)).astype(np.float32)
+    quaternions /= np.linalg.norm(quaternions, axis=1, keepdims=True)
+    return quaternions
+
+
+def synthesize_glb(path, joints, vertices, keys, seed=0):
+    """Write a skinned, animated GLB with a joint chain of the given size"""
+    rng = np.random.default_rng(seed)
+    gltf = {
+        'asset': {'version': '2.0', 'generator': 'benchmark_analysis'},
+        'scene': 0,
+        'scenes': [{'nodes': [0, joints]}],
+        'nodes': [],
+        'meshes': [],
+        'skins': [],
+        'animations': [],
+        'accessors': [],
+        'bufferViews': [],
+        'buffers': [],
+    }
+    chunks = []
+    offset = 0
+
+    def add_accessor(array, component_type, accessor_type, target=None, **extra):
+        nonlocal offset
+        data = np.ascontiguousarray(array).tobytes()
+        view = {'buffer': 0, 'byteOffset': offset, 'byteLength': len(data)}
+        if target is not None:
+            view['target'] = target
+        gltf['bufferViews'].append(view)
+        chunks.append(data + b'\x00' * (-len(data) % 4))
+        offset += len(chunks[-1])
+        accessor = {'bufferView': len(gltf['bufferViews']) - 1, 'componentType': component_type,
+                    'count': len(array), 'type': accessor_type}
+        accessor.update(extra)
+        gltf['accessors'].append(accessor)
+        return len(gltf['accessors']) - 1
+
+    for i in range(joints):
+        node = {'name': f'bone_{i:03d}', 'translation': [0.0, 0.1, 0.0]}
+        if i + 1 < joints:
+            node['children'] = [i + 1]
+        gltf['nodes'].append(node)
+    gltf['nodes'].append({'name': 'body', 'mesh': 0, 'skin': 0})
+
+    positions = rng.random((vertices, 3), dtype=np.float32)
+    attributes = {
+        'POSITION': add_accessor(positions, 5126, 'VEC3', 34962,
+                                 min=positions.min(axis=0).tolist(), max=positions.max(axis=0).tolist()),
+        'JOINTS_0': add_accessor(rng.integers(0, joints, (vertices, 4), dtype=np.uint16), 5123, 'VEC4', 34962),
+        'WEIGHTS_0': add_accessor(_random_weights(rng, vertices), 5126, 'VEC4', 34962),
+    }
+    triangles = vertices // 3 * 3
+    indices = add_accessor(rng.permutation(vertices)[:triangles].astype(np.uint32), 5125, 'SCALAR', 34963)
+    gltf['meshes'].append({'name': 'body', 'primitives': [{'attributes': attributes, 'indices': indices}]})
+
+    inverse_bind = np.tile(np.eye(4, dtype=np.float32).reshape(1, 16), (joints, 1))
+    gltf['skins'].append({'name': 'rig', 'joints': list(range(joints)),
+                          'inverseBindMatrices': add_accessor(inverse_bind, 5126, 'MAT4')})
+
+    times = np.linspace(0, keys / 30.0, keys, dtype=np.float32)
+    time_accessor = add_accessor(times, 5126, 'SCALAR', min=[float(times[0])], max=[float(times[-1])])
+    samplers = []
+    channels = []
+    for i in range(joints):
+        output = add_accessor(_random_quaternions(rng, keys), 5126, 'VEC4')
+        samplers.append({'input': time_accessor, 'output': output, 'interpolation': 'LINEAR'})
+        channels.append({'sampler': i, 'target': {'node': i, 'path': 'rotation'}})
+    gltf['animations'].append({'name': 'clip', 'samplers': samplers, 'channels': channels})
+
+    gltf['buffers'].append({'byteLength': offset})
+    return write_glb(path, gltf, b''.join(chunks))
+
+
+def synthesize_fbx(path, joints, vertices, keys, seed=0):
+    """Write a binary FBX with a skinned mesh, bind pose and animation curves"""
+    rng = np.random.default_rng(seed)
+    next_id = iter(range(1000, 10 ** 9))
+    objects = []
+    connections = []
+
+    def connect(child, parent, prop=None):
+        connections.append(('C', ['OO' if prop is None else 'OP', child, parent] + ([prop] if prop else []), []))
+
+    identity = np.eye(4).ravel()
+    geometry_id = next(next_id)
+    polygon_indices = np.arange(vertices // 3 * 3, dtype=np.int32)
+    polygon_indices[2::3] = -polygon_indices[2::3] - 1
+    objects.append(('Geometry', [geometry_id, 'body\x00\x01Geometry', 'Mesh'], [
+        ('Vertices', [rng.random(vertices * 3)], []),
+        ('PolygonVertexIndex', [polygon_indices], []),
+    ]))
+    mesh_id = next(next_id)
+    objects.append(('Model', [mesh_id, 'body\x00\x01Model', 'Mesh'], []))
+    connect(geometry_id, mesh_id)
+    connect(mesh_id, 0)
+
+    skin_id = next(next_id)
+    objects.append(('Deformer', [skin_id, 'rig\x00\x01Deformer', 'Skin'], []))
+    connect(skin_id, geometry_id)
+
+    stack_id, layer_id = next(next_id), next(next_id)
+    objects.append(('AnimationStack', [stack_id, 'clip\x00\x01AnimStack', ''], []))
+    objects.append(('AnimationLayer', [layer_id, 'BaseLayer\x00\x01AnimLayer', ''], []))
+    connect(layer_id, stack_id)
+
+    # Each vertex gets one cluster so the Indexes arrays partition the mesh
+    owners = rng.integers(0, joints, vertices)
+    pose_nodes = []
+    key_times = (np.arange(keys, dtype=np.int64) * 1539538600)
+    parent = 0
+    for i in range(joints):
+        model_id = next(next_id)
+        objects.append(('Model', [model_id, f'bone_{i:03d}\x00\x01Model', 'LimbNode'], [
+            ('Properties70', [], [('P', ['Lcl Translation', 'Lcl Translation', '', 'A', 0.0, 0.1, 0.0], [])]),
+        ]))
+        connect(model_id, parent)
+        parent = model_id
+
+        cluster_id = next(next_id)
+        members = np.flatnonzero(owners == i).astype(np.int32)
+        objects.append(('Deformer', [cluster_id, f'bone_{i:03d}\x00\x01SubDeformer', 'Cluster'], [
+            ('Indexes', [members], []),
+            ('Weights', [np.ones(len(members))], []),
+            ('Transform', [identity], []),
+            ('TransformLink', [identity], []),
+        ]))
+        connect(cluster_id, skin_id)
+        connect(model_id, cluster_id)
+        pose_nodes.append(('PoseNode', [], [('Node', [model_id], []), ('Matrix', [identity], [])]))
+
+        curve_node_id = next(next_id)
+        objects.append(('AnimationCurveNode', [curve_node_id, 'R\x00\x01AnimCurveNode', ''], []))
+        connect(curve_node_id, layer_id)
+        connect(curve_node_id, model_id, 'Lcl Rotation')
+        for axis in 'XYZ':
+            curve_id = next(next_id)
+            objects.append(('AnimationCurve', [curve_id, '\x00\x01AnimCurve', ''], [
+                ('Default', [0.0], []),
+                ('KeyTime', [key_times], []),
+                ('KeyValueFloat', [rng.random(keys, dtype=np.float32) * 90], []),
+            ]))
+            connect(curve_id, curve_node_id, f'd|{axis}')
+
+    objects.append(('Pose', [next(next_id), 'rig\x00\x01Pose', 'BindPose'],
+                    [('Type', ['BindPose'], []), ('NbPoseNodes', [('I', joints)], [])] + pose_nodes))
+
+    roots = [
+        ('FBXHeaderExtension', [], [('FBXVersion', [('I', 7400)], [])]),
+        ('Objects', [], objects),
+        ('Connections', [], connections),
+    ]
+    return write_fbx(path, roots, 7400)
+
+
+def _quiet(function, *args):
+    """Call function with stdout discarded (for the printing analyzers)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+def glb_stages(path):
+    """Named callables for each GLB analysis stage"""
+    from analyze_glb import analyze_glb, analyze_glb_file
+
+    def open_only():
+        with open_glb(path):
+            pass
+
+    def parse_json():
+        with open_glb(path) as glb:
+            return glb.gltf
+
+    def decode_accessors():
+        with open_glb(path) as glb:
+            accessors = glb_accessors(glb)
+            for mesh in glb.gltf.get('meshes', []):
+                for primitive in mesh.get('primitives', []):
+                    for array in accessors.primitive_attributes(primitive).values():
+                        array.max()
+
+    def skins():
+        with open_glb(path) as glb:
+            return analyze_skins(glb.gltf, glb_accessors(glb))
+
+    def animations():
+        with open_glb(path) as glb:
+            return analyze_animations(glb.gltf, glb_accessors(glb))
+
+    def poses():
+        with open_glb(path) as glb:
+            kinematics = ForwardKinematics(glb.gltf, glb_accessors(glb))
+            for animation in range(len(glb.gltf.get('animations', []))):
+                _, world = kinematics.world_matrices(animation)
+                for skin in range(len(glb.gltf.get('skins', []))):
+                    kinematics.skin_matrices(skin, world)
+
+    def posed_bounds():
+        with open_glb(path) as glb:
+            return analyze_posed_bounds(glb.gltf, glb_accessors(glb))
+
+    return [
+        ('glb.open', open_only),
+        ('glb.json', parse_json),
+        ('glb.accessors', decode_accessors),
+        ('glb.skins', skins),
+        ('glb.animations', animations),
+        ('glb.pose', poses),
+        ('glb.skinning', posed_bounds),
+        ('glb.analyze', lambda: analyze_glb(path)),
+        ('glb.analyze_glb_file', lambda: _quiet(analyze_glb_file, path)),
+    ]
+
+
+def fbx_stages(path):
+    """Named callables for each FBX analysis stage"""
+    from comprehensive_rig_analysis import analyze_fbx, analyze_fbx_binary
+    from detailed_rig_analysis import extract_fbx_rig_details
+
+    def parse_tree():
+        with open_fbx(path) as fbx:
+            document = FBXDocument(fbx)
+            list(document.models())
+            for cluster in document.clusters():
+                for array in (cluster.indexes, cluster.weights):
+                    if array is not None:
+                        array.numpy()
+            for curve in document.animation_curves():
+                for array in (curve.key_times, curve.key_values):
+                    if array is not None:
+                        array.numpy()
+            list(document.connections())
+
+    def uncached(function):
+        def run():
+            clear_scan_cache()
+            return _quiet(function, path)
+        return run
+
+    return [
+        ('fbx.scan', lambda: FBX_SCANNER.scan_file(path)),
+        ('fbx.parse', parse_tree),
+        ('fbx.analyze', uncached(analyze_fbx)),
+        ('fbx.analyze_fbx_binary', uncached(analyze_fbx_binary)),
+        ('fbx.extract_fbx_rig_details', uncached(extract_fbx_rig_details)),
+    ]
+
+
+def measure(function, repeat):
+    """Time function `repeat` times and measure its peak traced allocation"""
+    function()  # warm-up: imports, page cache, lazy compilation
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {'min': min(timings), 'median': statistics.median(timings), 'peak_bytes': peak}
+
+
+def run_case(path, repeat, params=None):
+    """Benchmark every stage applicable to one file"""
+    stages = glb_stages(path) if path.lower().endswith('.glb') else fbx_stages(path)
+    return {
+        'file': os.path.basename(path),
+        'size': os.path.getsize(path),
+        'params': params or {},
+        'stages': {name: measure(function, repeat) for name, function in stages},
+    }
+
+
+def sample_assets():
+    """Bundled sample models, one per distinct content"""
+    from batch_analyze import find_assets
+    from analysis_cache import content_hash
+
+    seen = set()
+    samples = []
+    for path in find_assets([os.path.dirname(os.path.abspath(__file__))]):
+        digest = content_hash(path)
+        if digest not in seen:
+            seen.add(digest)
+            samples.append(path)
+    return samples
+
+
+def run_benchmarks(sizes, repeat, include_samples=True):
+    cases = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            params = SIZES[size]
+            glb_path = os.path.join(tmp, f'synthetic_{size}.glb')
+            fbx_path = os.path.join(tmp, f'synthetic_{size}.fbx')
+            synthesize_glb(glb_path, **params)
+            synthesize_fbx(fbx_path, **params)
+            cases[f'synthetic_{size}.glb'] = run_case(glb_path, repeat, params)
+            cases[f'synthetic_{size}.fbx'] = run_case(fbx_path, repeat, params)
+
+    if include_samples:
+        for path in sample_assets():
+            cases[f'sample:{os.path.basename(path)}'] = run_case(path, repeat)
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np.__version__,
+        'repeat': repeat,
+        'cases': cases,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages against a baseline result set"""
+    regressions = []
+    for case, data in results['cases'].items():
+        base_case = baseline.get('cases', {}).get(case)
+        if base_case is None:
+            continue
+        for stage, stats in data['stages'].items():
+            base = base_case['stages'].get(stage)
+            if base is None:
+                continue
+            slower = stats['median'] - base['median']
+            if stats['median'] > base['median'] * (1 + tolerance) and slower > TIME_NOISE_FLOOR:
+                regressions.append(f"{case} {stage}: {base['median'] * 1000:.2f} ms -> "
+                                   f"{stats['median'] * 1000:.2f} ms")
+            grown = stats['peak_bytes'] - base['peak_bytes']
+            if stats['peak_bytes'] > base['peak_bytes'] * (1 + tolerance) and grown > MEMORY_NOISE_FLOOR:
+                regressions.append(f"{case} {stage}: peak {base['peak_bytes']} -> "
+                                   f"{stats['peak_bytes']} bytes")
+    return regressions
+
+
+def print_results(results):
+    for case, data in results['cases'].items():
+        print(f"\n{case} ({data['size']} bytes)")
+        for stage, stats in data['stages'].items():
+            print(f"  {stage:<30} median {stats['median'] * 1000:9.3f} ms   "
+                  f"min {stats['min'] * 1000:9.3f} ms   peak {stats['peak_bytes'] / 1024:10.1f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the GLB/FBX analysis stages")
+    parser.add_argument('--sizes', default='small,medium',
+                        help=f"comma-separated synthetic sizes from {', '.join(SIZES)} (default: small,medium)")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per stage (default: 5)")
+    parser.add_argument('--no-samples', action='store_true', help="skip the bundled sample models")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown/growth before flagging (default: 0.25)")
+    parser.add_argument('-o', '--output', help="write results as JSON")
+    args = parser.parse_args()
+
+    sizes = [size for size in args.sizes.split(',') if size]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    print("GLB/FBX Analysis Benchmarks")
+    print("=" * 50)
+    results = run_benchmarks(sizes, args.repeat, not args.no_samples)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\n=== Comparison with {args.baseline} ===")
+        if regressions:
+            print(f"✗ {len(regressions)} regression(s):")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print("✓ No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import re
+from functools import lru_cache
+
+# Union of the name fragments the analyzers have used to spot bones
+BONE_KEYWORDS = ['bone', 'joint', 'spine', 'neck', 'head', 'arm', 'leg',
+                 'hand', 'foot', 'finger', 'thumb', 'shoulder', 'hip',
+                 'knee', 'elbow', 'root', 'pelvis', 'chest', 'back', 'toe']
+
+# Vocabulary the GLB analyzer uses for node names
+GLB_BONE_KEYWORDS = [keyword for keyword in BONE_KEYWORDS if keyword not in ('back', 'toe')]
+
+# Namespaces and rig-layer prefixes that carry no anatomical meaning
+# (Mixamo "mixamorig:", FBX "Armature|", Rigify DEF-/ORG-/MCH-)
+NAME_PREFIX = re.compile(r'^(?:.*[:|])?(?:(?:DEF|ORG|MCH)-)?')
+
+# Side markers: Blender ".L"/"_R", UE "_l", Mixamo "LeftArm", "L_Arm".
+# A trailing ".001"-style segment index is kept apart from the side.
+SIDE_SUFFIX = re.compile(r'[._\- ](l|r|left|right)(?P<segment>[._]\d+)?$', re.IGNORECASE)
+SIDE_PREFIX = re.compile(r'^(left|right|l(?=[._\-])|r(?=[._\-]))[._\- ]?', re.IGNORECASE)
+SEPARATORS = re.compile(r'[._\- ]+')
+
+FINGER_SEGMENTS = {'1': 'Proximal', '2': 'Intermediate', '3': 'Distal'}
+FINGER_NAMES = {'thumb': 'Thumb', 'index': 'Index', 'middle': 'Middle',
+                'ring': 'Ring', 'pinky': 'Little', 'little': 'Little'}
+
+# Canonical humanoid slots (VRM naming) keyed by normalized base name.
+# Center slots apply to side-less names, the others get a left/right prefix.
+CENTER_SLOTS = [
+    ('hips', r'hips|pelvis'),
+    ('spine', r'spine|spine01|spine001'),
+    ('chest', r'chest|spine1|spine02|spine002'),
+    ('upperChest', r'upperchest|spine2|spine03|spine003'),
+    ('neck', r'neck|neck01|neck1'),
+    ('head', r'head'),
+]
+SIDED_SLOTS = [
+    ('Shoulder', r'shoulder|clavicle'),
+    ('UpperArm', r'upperarm|arm'),
+    ('LowerArm', r'forearm|lowerarm'),
+    ('Hand', r'hand|wrist'),
+    ('UpperLeg', r'thigh|upleg|upperleg'),
+    ('LowerLeg', r'shin|calf|leg|lowerleg'),
+    ('Foot', r'foot|ankle'),
+    ('Toes', r'toe|toes|toebase|ball'),
+]
+FINGER_PATTERN = r'(?:hand|f)?(?P<digit>thumb|index|middle|ring|pinky|little)0*(?P<segment>[123])'
+
+
+class BoneClass:
+    """Classification of one node name"""
+
+    __slots__ = ('name', 'is_bone', 'keywords', 'side', 'slot')
+
+    def __init__(self, name, is_bone, keywords, side, slot):
+        self.name = name
+        self.is_bone = is_bone
+        self.keywords = keywords
+        self.side = side
+        self.slot = slot
+
+    def __repr__(self):
+        return f"BoneClass({self.name!r}, is_bone={self.is_bone}, side={self.side!r}, slot={self.slot!r})"
+
+
+def split_side(name):
+    """Return (side, base, segment) for a bone name with its prefixes removed
+
+    side is 'left', 'right' or None; segment is a trailing index such as
+    '001' left after the side marker (Rigify twist/segment bones).
+    """
+    stripped = NAME_PREFIX.sub('', name, count=1)
+    match = SIDE_SUFFIX.search(stripped)
+    if match:
+        side = 'left' if match.group(1).lower() in ('l', 'left') else 'right'
+        segment = match.group('segment')
+        return side, stripped[:match.start()], segment.lstrip('._') if segment else None
+    match = SIDE_PREFIX.match(stripped)
+    if match and len(stripped) > match.end():
+        side = 'left' if match.group(1).lower().startswith('l') else 'right'
+        return side, stripped[match.end():], None
+    return None, stripped, None
+
+
+class BoneClassifier:
+    """Precompiled bone-name vocabulary and humanoid slot mapper
+
+    Keywords are compiled into one case-insensitive alternation, so each
+    name is tested against the whole vocabulary in a single regex call, and
+    results are memoized per name for large batch runs.
+    """
+
+    def __init__(self, keywords=BONE_KEYWORDS, cache_size=65536):
+        self.keywords = list(keywords)
+        ordered = sorted({keyword.lower() for keyword in self.keywords}, key=len, reverse=True)
+        self._keyword_pattern = re.compile('|'.join(map(re.escape, ordered)), re.IGNORECASE)
+
+        center = '|'.join(f'(?P<c_{slot}>{pattern})' for slot, pattern in CENTER_SLOTS)
+        sided = '|'.join(f'(?P<s_{slot}>{pattern})' for slot, pattern in SIDED_SLOTS)
+        self._center_pattern = re.compile(f'^(?:{center})$')
+        self._sided_pattern = re.compile(f'^(?:(?P<finger>{FINGER_PATTERN})|{sided})$')
+
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def is_bone(self, name):
+        """True if any vocabulary keyword occurs in the name (case-insensitive)"""
+        return self._keyword_pattern.search(name) is not None
+
+    def matched_keywords(self, name):
+        """Set of vocabulary keywords found in the name"""
+        return {match.lower() for match in self._keyword_pattern.findall(name)}
+
+    def slot(self, name):
+        return self.classify(name).slot
+
+    def side(self, name):
+        return self.classify(name).side
+
+    def _classify(self, name):
+        keywords = frozenset(self.matched_keywords(name))
+        side, base, segment = split_side(name)
+        base = SEPARATORS.sub('', base).lower()
+
+        slot = None
+        if segment is None:
+            if side is None:
+                match = self._center_pattern.match(base)
+                if match:
+                    slot = match.lastgroup[2:]
+            else:
+                match = self._sided_pattern.match(base)
+                if match:
+                    if match.lastgroup == 'finger':
+                        slot = (side + FINGER_NAMES[match.group('digit')]
+                                + FINGER_SEGMENTS[match.group('segment')])
+                    else:
+                        slot = side + match.lastgroup[2:]
+
+        return BoneClass(name, bool(keywords) or slot is not None, keywords, side, slot)
+
+    def bone_names(self, names):
+        """Unique bone-like names, deduplicated with a set and sorted"""
+        return sorted({name for name in set(names) if self.is_bone(name)})
+
+    def humanoid_map(self, names):
+        """Map canonical slot -> first name assigned to it"""
+        slots = {}
+        for name in names:
+            slot = self.classify(name).slot
+            if slot is not None and slot not in slots:
+                slots[slot] = name
+        return slots
+
+
+default_classifier = BoneClassifier()
+
+
+def main():
+    import sys
+
+    from glb_reader import open_glb
+
+    glb_path = sys.argv[1] if len(sys.argv) > 1 else "human_model_sit_possition.glb"
+    with open_glb(glb_path) as glb:
+        names = [node.get('name', '') for node in glb.gltf.get('nodes', [])]
+
+    print(f"=== Bone Classification: {glb_path} ===")
+    for name in names:
+        result = default_classifier.classify(name)
+        if result.is_bone:
+            side = result.side or '-'
+            print(f"  {name:<20} side={side:<5} slot={result.slot or '-'}")
+
+    mapping = default_classifier.humanoid_map(names)
+    print(f"\nHumanoid slots mapped: {len(mapping)}")
+
+
+if __name__ == "__main__":
+    main()
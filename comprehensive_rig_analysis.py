@@ -1,13 +1,103 @@
 import os
 import struct
 
-def analyze_fbx_binary():
+from analysis_profiler import span
+from bone_classifier import BoneClassifier
+from fbx_parser import FBXDocument, open_fbx, split_object_name
+from fbx_scanner import matching_lines, scan_fbx
+from rig_results import (AnimationResult, AssetResult, JointRecord, MeshResult, NodeRecord,
+                         RigVerdict, SkinResult)
+
+BONE_CLASSIFIER = BoneClassifier(['bone', 'joint', 'spine', 'neck', 'head', 'arm', 'leg',
+                                  'hand', 'foot', 'finger', 'thumb', 'shoulder', 'hip',
+                                  'knee', 'elbow', 'root', 'pelvis', 'chest', 'back'])
+
+RIG_KEYWORDS = ['Deformer', 'Cluster', 'Bone', 'Joint', 'Skeleton',
+                'Weight', 'Skin', 'Armature', 'BindPose', 'Animation',
+                'Curve', 'Model', 'Geometry', 'NodeAttribute']
+
+def analyze_fbx(fbx_path):
+    """Analyze a binary FBX file and return an AssetResult (raises FBXError/OSError)"""
+    scan = scan_fbx(fbx_path)
+    with open_fbx(fbx_path) as fbx, span('fbx_document', 'parse', bytes=fbx.size):
+        document = FBXDocument(fbx)
+        models = list(document.models())
+        deformers = list(document.deformers())
+        poses = list(document.poses())
+        stacks = [(node.properties[0], split_object_name(node.properties[1])[0])
+                  for node in document.objects('AnimationStack')]
+        layers = {node.properties[0] for node in document.objects('AnimationLayer')}
+        curve_nodes = {node.properties[0] for node in document.objects('AnimationCurveNode')}
+        curves = {node.properties[0] for node in document.objects('AnimationCurve')}
+        meshes = [model for model in models if model.type == 'Mesh']
+
+        # Connections: cluster -> skin, bone model -> cluster, and
+        # stack -> layer -> curve node -> curve
+        parents = {}
+        children = {}
+        cluster_bones = {}
+        model_names = {model.id: model.name for model in models}
+        for connection in document.connections():
+            parents.setdefault(connection.child, []).append(connection.parent)
+            children.setdefault(connection.parent, []).append(connection.child)
+        deformer_types = {deformer.id: deformer.type for deformer in deformers}
+        for child, child_parents in parents.items():
+            if child in model_names:
+                for parent in child_parents:
+                    if deformer_types.get(parent) == 'Cluster':
+                        cluster_bones[parent] = child
+
+        has_bind_pose = any(pose.type == 'BindPose' for pose in poses)
+        skins = []
+        for deformer in deformers:
+            if deformer.type != 'Skin':
+                continue
+            clusters = [d.id for d in deformers
+                        if d.type == 'Cluster' and deformer.id in parents.get(d.id, ())]
+            joints = [JointRecord(index=j, node=cluster_bones.get(cluster),
+                                  name=model_names.get(cluster_bones.get(cluster), ''))
+                      for j, cluster in enumerate(clusters)]
+            skins.append(SkinResult(index=len(skins), name=deformer.name, joints=joints,
+                                    has_inverse_bind_matrices=has_bind_pose,
+                                    primitive_count=None, unused_joints=None))
+
+    bone_nodes = [NodeRecord(index=i, name=model.name)
+                  for i, model in enumerate(models) if model.type == 'LimbNode']
+    animations = []
+    for i, (stack, name) in enumerate(stacks):
+        stack_layers = [child for child in children.get(stack, ()) if child in layers]
+        stack_nodes = {child for layer in stack_layers for child in children.get(layer, ())
+                       if child in curve_nodes}
+        stack_curves = {child for node in stack_nodes for child in children.get(node, ())
+                        if child in curves}
+        animations.append(AnimationResult(index=i, name=name, channels=len(stack_nodes),
+                                          samplers=len(stack_curves)))
+    keywords = {keyword: scan.count(keyword) for keyword in RIG_KEYWORDS if scan.count(keyword)}
+
+    rig_features = []
+    if skins:
+        rig_features.append(f"{len(skins)} skin(s)")
+    if bone_nodes:
+        rig_features.append(f"{len(bone_nodes)} bone node(s)")
+    if has_bind_pose:
+        rig_features.append("bind pose")
+    if animations:
+        rig_features.append(f"{len(animations)} animation(s)")
+    has_rig = bool(skins or bone_nodes)
+
+    return AssetResult(path=fbx_path, format='fbx', size=scan.size, version=fbx.version,
+                       node_count=len(models), bone_nodes=bone_nodes, skins=skins,
+                       meshes=[MeshResult(index=i, name=model.name, primitives=[])
+                               for i, model in enumerate(meshes)],
+                       animations=animations, keywords=keywords,
+                       rig=RigVerdict(has_rig=has_rig, valid=has_rig and bool(skins),
+                                      features=rig_features))
+
+def analyze_fbx_binary(fbx_path="human_model_sit_possition.fbx"):
     """Analyze FBX file as binary format"""
     try:
         print("=== Binary FBX Analysis ===")
         
-        fbx_path = "human_model_sit_possition.fbx"
-        
         with open(fbx_path, 'rb') as f:
             # Read FBX header
             header = f.read(27)
@@ -21,66 +111,31 @@ def analyze_fbx_binary():
                 version = struct.unpack('<I', f.read(4))[0]
                 print(f"FBX Version: {version}")
                 
-                # Read the rest of the file
-                f.seek(0)
-                content = f.read()
+                # Count every keyword in a single pass over the mapped file
+                scan = scan_fbx(fbx_path)
                 
                 # Look for common rig-related strings in binary
-                rig_keywords = [
-                    b'Deformer', b'Cluster', b'Bone', b'Joint', b'Skeleton',
-                    b'Weight', b'Skin', b'Armature', b'BindPose', b'Animation',
-                    b'Curve', b'Model', b'Geometry', b'NodeAttribute'
-                ]
-                
                 found_data = {}
-                for keyword in rig_keywords:
-                    count = content.count(keyword)
+                for keyword in RIG_KEYWORDS:
+                    count = scan.count(keyword)
                     if count > 0:
-                        found_data[keyword.decode()] = count
+                        found_data[keyword] = count
                 
                 print(f"\nRig-related data found:")
                 for keyword, count in found_data.items():
                     print(f"  {keyword}: {count} occurrences")
                 
-                # Look for specific strings that might be bone names
+                # Walk the node tree for object names instead of scanning raw bytes
                 print(f"\nSearching for bone-like names...")
                 
-                # Extract null-terminated strings
-                strings = []
-                current_string = b""
-                for byte in content:
-                    if byte == 0:  # null terminator
-                        if len(current_string) > 2:
-                            try:
-                                decoded = current_string.decode('utf-8', errors='ignore')
-                                if len(decoded) > 2:
-                                    strings.append(decoded)
-                            except:
-                                pass
-                        current_string = b""
-                    elif 32 <= byte <= 126:  # printable ASCII
-                        current_string += bytes([byte])
-                    else:
-                        if len(current_string) > 2:
-                            try:
-                                decoded = current_string.decode('utf-8', errors='ignore')
-                                if len(decoded) > 2:
-                                    strings.append(decoded)
-                            except:
-                                pass
-                        current_string = b""
-                
-                # Filter for bone-like names
-                bone_keywords = ['bone', 'joint', 'spine', 'neck', 'head', 'arm', 'leg', 
-                               'hand', 'foot', 'finger', 'thumb', 'shoulder', 'hip', 
-                               'knee', 'elbow', 'root', 'pelvis', 'chest', 'back']
+                with open_fbx(fbx_path) as fbx:
+                    document = FBXDocument(fbx)
+                    models = list(document.models())
+                    geometry_names = [split_object_name(node.properties[1])[0]
+                                      for node in document.objects('Geometry') if len(node.properties) > 1]
                 
-                potential_bones = []
-                for string in strings:
-                    string_lower = string.lower()
-                    if any(keyword in string_lower for keyword in bone_keywords):
-                        if string not in potential_bones and len(string) < 50:
-                            potential_bones.append(string)
+                potential_bones = {model.name for model in models
+                                   if model.type == 'LimbNode' or BONE_CLASSIFIER.is_bone(model.name)}
                 
                 if potential_bones:
                     print(f"Found {len(potential_bones)} potential bone names:")
@@ -89,14 +144,9 @@ def analyze_fbx_binary():
                     if len(potential_bones) > 20:
                         print(f"  ... and {len(potential_bones) - 20} more")
                 
-                # Look for mesh names
-                mesh_keywords = ['mesh', 'geometry', 'body', 'head', 'torso']
-                potential_meshes = []
-                for string in strings:
-                    string_lower = string.lower()
-                    if any(keyword in string_lower for keyword in mesh_keywords):
-                        if string not in potential_meshes and len(string) < 50:
-                            potential_meshes.append(string)
+                # Mesh models and their geometry objects
+                potential_meshes = {model.name for model in models if model.type == 'Mesh'}
+                potential_meshes.update(geometry_names)
                 
                 if potential_meshes:
                     print(f"\nFound {len(potential_meshes)} potential mesh names:")
@@ -114,27 +164,18 @@ def analyze_fbx_binary():
         print(f"Binary analysis failed: {e}")
         return False
 
-def analyze_fbx_text_sections():
+def analyze_fbx_text_sections(fbx_path="human_model_sit_possition.fbx"):
     """Analyze FBX by looking for text sections"""
     try:
         print("\n=== Text Section Analysis ===")
         
-        fbx_path = "human_model_sit_possition.fbx"
-        
-        with open(fbx_path, 'rb') as f:
-            content = f.read()
-        
-        # Convert to text, ignoring encoding errors
-        text_content = content.decode('utf-8', errors='ignore')
-        
-        # Split into lines and look for interesting patterns
-        lines = text_content.split('\n')
+        # Line positions come from the shared single-pass scan
+        scan = scan_fbx(fbx_path)
         
         # Look for lines containing model/object definitions
-        model_lines = []
-        for i, line in enumerate(lines):
-            if 'Model::' in line or 'NodeAttribute::' in line or 'Deformer::' in line:
-                model_lines.append((i, line.strip()))
+        definition_positions = (scan.positions['Model::'] + scan.positions['NodeAttribute::']
+                                + scan.positions['Deformer::'])
+        model_lines = [(i, line.strip()) for i, line in matching_lines(fbx_path, definition_positions)]
         
         if model_lines:
             print(f"Found {len(model_lines)} model/attribute definitions:")
@@ -143,8 +184,8 @@ def analyze_fbx_text_sections():
         
         # Look for property definitions
         property_lines = []
-        for line in lines:
-            if 'Property:' in line and any(keyword in line.lower() for keyword in ['transform', 'rotation', 'translation', 'scale']):
+        for _, line in matching_lines(fbx_path, scan.positions['Property:']):
+            if any(keyword in line.lower() for keyword in ['transform', 'rotation', 'translation', 'scale']):
                 property_lines.append(line.strip())
         
         if property_lines:
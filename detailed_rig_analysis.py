@@ -1,38 +1,28 @@
 import os
-import re
 
-def extract_fbx_rig_details():
+from analysis_profiler import span
+from bone_classifier import BoneClassifier
+from fbx_scanner import scan_fbx
+
+# Bone-name vocabulary of the former per-pattern Model:: regexes, compiled once
+BONE_CLASSIFIER = BoneClassifier(['bone', 'joint', 'spine', 'neck', 'head', 'arm', 'leg',
+                                  'hand', 'foot', 'shoulder', 'hip', 'knee', 'elbow',
+                                  'finger', 'toe', 'thumb', 'root', 'pelvis'])
+
+def extract_fbx_rig_details(fbx_path="human_model_sit_possition.fbx"):
     """Extract detailed rig information from FBX file"""
     try:
         print("=== Detailed FBX Rig Analysis ===")
         
-        fbx_path = "human_model_sit_possition.fbx"
-        
-        with open(fbx_path, 'rb') as f:
-            content = f.read()
-            
-        # Convert to string for analysis
-        text_content = content.decode('utf-8', errors='ignore')
+        # Single pass over the raw bytes: keyword counts and Model:: names
+        scan = scan_fbx(fbx_path)
+        all_models = scan.captures['model']
         
         # Look for bone/joint names
         print("\n1. Searching for bone/joint names...")
         
-        # Common patterns for bone names in FBX
-        bone_patterns = [
-            r'Model::\s*"([^"]*(?:bone|joint|Bone|Joint)[^"]*)"',
-            r'Model::\s*"([^"]*(?:spine|Spine|neck|Neck|head|Head)[^"]*)"',
-            r'Model::\s*"([^"]*(?:arm|Arm|leg|Leg|hand|Hand|foot|Foot)[^"]*)"',
-            r'Model::\s*"([^"]*(?:shoulder|Shoulder|hip|Hip|knee|Knee|elbow|Elbow)[^"]*)"',
-            r'Model::\s*"([^"]*(?:finger|Finger|toe|Toe|thumb|Thumb)[^"]*)"',
-            r'Model::\s*"([^"]*(?:root|Root|pelvis|Pelvis)[^"]*)"'
-        ]
-        
-        found_bones = set()
-        for pattern in bone_patterns:
-            matches = re.findall(pattern, text_content, re.IGNORECASE)
-            for match in matches:
-                if len(match.strip()) > 0:
-                    found_bones.add(match.strip())
+        with span('classify_bones', 'code', names=len(all_models)):
+            found_bones = set(BONE_CLASSIFIER.bone_names(name.strip() for name in all_models if name.strip()))
         
         if found_bones:
             print(f"Found {len(found_bones)} potential bone/joint names:")
@@ -44,9 +34,9 @@ def extract_fbx_rig_details():
         # Look for deformer information
         print("\n2. Analyzing deformers and clusters...")
         
-        deformer_count = text_content.count('Deformer::')
-        cluster_count = text_content.count('Cluster::')
-        skin_count = text_content.count('Skin::')
+        deformer_count = scan.count('Deformer::')
+        cluster_count = scan.count('Cluster::')
+        skin_count = scan.count('Skin::')
         
         print(f"Deformers found: {deformer_count}")
         print(f"Clusters found: {cluster_count}")
@@ -55,9 +45,9 @@ def extract_fbx_rig_details():
         # Look for animation curves
         print("\n3. Animation data analysis...")
         
-        animation_curve_count = text_content.count('AnimationCurve::')
-        animation_layer_count = text_content.count('AnimationLayer::')
-        animation_stack_count = text_content.count('AnimationStack::')
+        animation_curve_count = scan.count('AnimationCurve::')
+        animation_layer_count = scan.count('AnimationLayer::')
+        animation_stack_count = scan.count('AnimationStack::')
         
         print(f"Animation curves: {animation_curve_count}")
         print(f"Animation layers: {animation_layer_count}")
@@ -66,8 +56,8 @@ def extract_fbx_rig_details():
         # Look for bind pose information
         print("\n4. Bind pose information...")
         
-        bind_pose_count = text_content.count('BindPose::')
-        pose_count = text_content.count('Pose::')
+        bind_pose_count = scan.count('BindPose::')
+        pose_count = scan.count('Pose::')
         
         print(f"Bind poses: {bind_pose_count}")
         print(f"Poses: {pose_count}")
@@ -75,9 +65,6 @@ def extract_fbx_rig_details():
         # Extract some model names that might be bones
         print("\n5. All Model objects (potential bones/meshes)...")
         
-        model_pattern = r'Model::\s*"([^"]+)"'
-        all_models = re.findall(model_pattern, text_content)
-        
         if all_models:
             print(f"Found {len(all_models)} model objects:")
             # Show first 20 to avoid too much output
@@ -1,21 +1,36 @@
 import os
 import sys
-import numpy as np
+import time
 
-def analyze_fbx_with_trimesh():
+# Only standard-library modules at import time: this script runs from git
+# hooks and upload handlers, so trimesh/Open3D (and NumPy) are imported by
+# the functions that need them.
+from analysis_pipeline import default_pipeline, asset_format
+from analysis_profiler import span
+from fbx_parser import FBXError
+from fbx_scanner import scan_fbx
+from glb_reader import GLBError
+
+# Modules whose import cost the --import-report option measures
+REPORT_MODULES = ['detect_rig', 'analysis_pipeline', 'numpy', 'trimesh', 'open3d']
+
+def analyze_fbx_with_trimesh(fbx_path="human_model_sit_possition.fbx"):
     """Try to analyze FBX using trimesh"""
     try:
         import trimesh
         print("=== Analyzing with Trimesh ===")
         
         # Load the FBX file
-        fbx_path = "human_model_sit_possition.fbx"
         if not os.path.exists(fbx_path):
             print(f"File {fbx_path} not found!")
             return False
             
         # Load the scene
-        scene = trimesh.load(fbx_path)
+        with span('trimesh.load', 'load', bytes=os.path.getsize(fbx_path)) as timed:
+            scene = trimesh.load(fbx_path)
+            if hasattr(scene, 'geometry'):
+                timed.add('geometries', len(scene.geometry))
+                timed.add('vertices', sum(len(getattr(geom, 'vertices', ())) for geom in scene.geometry.values()))
         
         print(f"Loaded scene type: {type(scene)}")
         
@@ -44,20 +59,17 @@ def analyze_fbx_with_trimesh():
         print(f"Trimesh analysis failed: {e}")
         return False
 
-def analyze_fbx_with_open3d():
+def analyze_fbx_with_open3d(glb_path="human_model_sit_possition.glb"):
     """Try to analyze FBX using Open3D"""
     try:
         import open3d as o3d
         print("\n=== Analyzing with Open3D ===")
         
-        fbx_path = "human_model_sit_possition.fbx"
-        
         # Open3D doesn't directly support FBX, but let's try
         # First convert to a supported format or check if it can read it
         print("Open3D doesn't directly support FBX files.")
         print("Let's try to read the GLB version instead...")
         
-        glb_path = "human_model_sit_possition.glb"
         if os.path.exists(glb_path):
             # Try to load as mesh
             mesh = o3d.io.read_triangle_mesh(glb_path)
@@ -80,22 +92,13 @@ def analyze_fbx_with_open3d():
         print(f"Open3D analysis failed: {e}")
         return False
 
-def analyze_fbx_manual():
+def analyze_fbx_manual(fbx_path="human_model_sit_possition.fbx"):
     """Manual analysis of FBX file structure"""
     try:
         print("\n=== Manual FBX Analysis ===")
         
-        fbx_path = "human_model_sit_possition.fbx"
-        
-        # Read file as binary to look for common rig-related keywords
-        with open(fbx_path, 'rb') as f:
-            content = f.read()
-            
-        # Convert to string for text searching (ignore encoding errors)
-        try:
-            text_content = content.decode('utf-8', errors='ignore')
-        except:
-            text_content = str(content)
+        # One pass over the mapped file counts every keyword at once
+        scan = scan_fbx(fbx_path)
             
         # Common rig/bone related keywords in FBX files
         rig_keywords = [
@@ -106,11 +109,11 @@ def analyze_fbx_manual():
         
         found_keywords = []
         for keyword in rig_keywords:
-            count = text_content.count(keyword)
+            count = scan.count(keyword)
             if count > 0:
                 found_keywords.append(f"{keyword}: {count}")
         
-        print(f"File size: {len(content)} bytes")
+        print(f"File size: {scan.size} bytes")
         print(f"Rig-related keywords found:")
         for keyword_info in found_keywords:
             print(f"  - {keyword_info}")
@@ -118,7 +121,7 @@ def analyze_fbx_manual():
         # Look for specific FBX sections
         fbx_sections = ['Objects:', 'Connections:', 'Takes:', 'Model:', 'Geometry:']
         for section in fbx_sections:
-            if section in text_content:
+            if scan.count(section):
                 print(f"  - Found FBX section: {section}")
         
         return len(found_keywords) > 0
@@ -127,48 +130,140 @@ def analyze_fbx_manual():
         print(f"Manual analysis failed: {e}")
         return False
 
+def quick_check(path):
+    """Standard-library header and structure check of a GLB or FBX file
+
+    Returns a dict with the format, header fields, element counts and the
+    has_rig verdict.  Only the GLB JSON chunk is read; FBX files are
+    scanned and walked without decoding any arrays.
+    """
+    outputs = ['header', 'structure', 'has_rig']
+    result = default_pipeline.run(path, outputs)
+    result['format'] = asset_format(path)
+    return result
+
+
+def print_quick_check(path, result):
+    header = result['header']
+    label = result['format'].upper()
+    print(f"\n=== {label} Quick Check: {path} ===")
+    print(f"Version: {header['version']}")
+    counts = ', '.join(f"{name}: {count}" for name, count in result['structure'].items() if count)
+    print(f"Structure: {counts}")
+    print(f"Rig: {'yes' if result['has_rig'] else 'no'}")
+
+
+def import_time_report(modules=REPORT_MODULES, top=5):
+    """Measure the import cost of each module in a fresh interpreter
+
+    Uses `python -X importtime` so every module is timed from a cold start
+    of its own.  Returns (module, total_us or None, [(name, cumulative_us)])
+    tuples listing the heaviest direct imports first; None marks modules
+    that failed to import.
+    """
+    import subprocess
+
+    report = []
+    for module in modules:
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                 capture_output=True, text=True,
+                                 cwd=os.path.dirname(os.path.abspath(__file__)))
+        total = None
+        children = []
+        pending = []
+        for line in process.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, raw = line[len('import time:'):].split('|')
+            depth = (len(raw) - len(raw.lstrip()) - 1) // 2
+            name = raw.strip()
+            if depth > 0:
+                # Children are reported before their parent
+                if depth == 1:
+                    pending.append((name, int(cumulative)))
+                continue
+            if name == module:
+                total = int(cumulative)
+                children = pending
+            pending = []
+        if process.returncode != 0:
+            total = None
+        heaviest = sorted(children, key=lambda item: item[1], reverse=True)[:top]
+        report.append((module, total, heaviest))
+    return report
+
+
+def print_import_time_report(report):
+    print("=== Import Time Report ===")
+    for module, total, heaviest in report:
+        if total is None:
+            print(f"{module:<20} not importable")
+            continue
+        print(f"{module:<20} {total / 1000:8.1f} ms")
+        for name, us in heaviest:
+            print(f"    {name:<30} {us / 1000:8.1f} ms")
+
+
 def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Detect rigging data in FBX/GLB files")
+    parser.add_argument('paths', nargs='*',
+                        default=["human_model_sit_possition.fbx", "human_model_sit_possition.glb"])
+    parser.add_argument('--geometry', action='store_true',
+                        help="also load the meshes with trimesh/Open3D and run the keyword scan")
+    parser.add_argument('--import-report', action='store_true',
+                        help="show where interpreter startup time goes and exit")
+    args = parser.parse_args()
+
+    if args.import_report:
+        print_import_time_report(import_time_report())
+        return
+
+    start = time.perf_counter()
     print("FBX Rig Detection Tool")
     print("=" * 50)
-    
-    # Check if files exist
-    fbx_path = "human_model_sit_possition.fbx"
-    glb_path = "human_model_sit_possition.glb"
-    
-    print(f"FBX file exists: {os.path.exists(fbx_path)}")
-    print(f"GLB file exists: {os.path.exists(glb_path)}")
-    
-    if not os.path.exists(fbx_path):
-        print("FBX file not found!")
-        return
-    
-    # Try different analysis methods
+
     methods_tried = 0
     methods_successful = 0
-    
-    # Method 1: Trimesh
-    if analyze_fbx_with_trimesh():
-        methods_successful += 1
-    methods_tried += 1
-    
-    # Method 2: Open3D
-    if analyze_fbx_with_open3d():
-        methods_successful += 1
-    methods_tried += 1
-    
-    # Method 3: Manual analysis
-    if analyze_fbx_manual():
+    rigged = []
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"{path} not found!")
+            continue
+        methods_tried += 1
+        try:
+            result = quick_check(path)
+        except (OSError, GLBError, FBXError, ValueError) as e:
+            print(f"\n{path}: {e}")
+            continue
         methods_successful += 1
-    methods_tried += 1
-    
+        print_quick_check(path, result)
+        if result['has_rig']:
+            rigged.append(path)
+
+    if args.geometry:
+        fbx_paths = [path for path in args.paths if path.lower().endswith('.fbx') and os.path.exists(path)]
+        glb_paths = [path for path in args.paths if path.lower().endswith('.glb') and os.path.exists(path)]
+        for fbx_path in fbx_paths:
+            for method in (analyze_fbx_with_trimesh, analyze_fbx_manual):
+                methods_tried += 1
+                if method(fbx_path):
+                    methods_successful += 1
+        for glb_path in glb_paths:
+            methods_tried += 1
+            if analyze_fbx_with_open3d(glb_path):
+                methods_successful += 1
+
     print(f"\n=== Summary ===")
     print(f"Analysis methods tried: {methods_tried}")
     print(f"Successful analyses: {methods_successful}")
-    
-    if methods_successful > 0:
+
+    if rigged:
         print("\nThe model appears to contain rigging/animation data!")
     else:
         print("\nNo clear rigging data detected with current methods.")
+    print(f"Checked in {(time.perf_counter() - start) * 1000:.1f} ms")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,502 @@
+import os
+import mmap
+import zlib
+import struct
+from collections import namedtuple
+
+from analysis_profiler import tally
+
+FBX_MAGIC = b'Kaydara FBX Binary  \x00'
+FBX_HEADER_SIZE = 27
+
+# Node record headers: EndOffset, NumProperties, PropertyListLen
+NODE_HEADER_32 = struct.Struct('<III')
+NODE_HEADER_64 = struct.Struct('<QQQ')
+
+ARRAY_HEADER = struct.Struct('<III')
+
+SCALAR_PROPERTIES = {
+    ord('Y'): struct.Struct('<h'),
+    ord('C'): struct.Struct('<?'),
+    ord('I'): struct.Struct('<i'),
+    ord('F'): struct.Struct('<f'),
+    ord('D'): struct.Struct('<d'),
+    ord('L'): struct.Struct('<q'),
+}
+
+# Array type code -> (NumPy dtype, struct format character, item size)
+ARRAY_TYPES = {
+    ord('f'): ('<f4', 'f', 4),
+    ord('d'): ('<f8', 'd', 8),
+    ord('l'): ('<i8', 'q', 8),
+    ord('i'): ('<i4', 'i', 4),
+    ord('b'): ('<u1', 'B', 1),
+}
+
+# Object names are stored as "Name\x00\x01Class" in binary FBX
+NAME_SEPARATOR = b'\x00\x01'
+
+
+class FBXError(ValueError):
+    """Raised when a file is not a well-formed binary FBX file"""
+
+
+class FBXArray:
+    """Array property whose payload stays in the mapping until decoded
+
+    Compressed arrays are only inflated when values() or numpy() is called.
+    """
+
+    __slots__ = ('type_code', 'length', 'encoding', 'data')
+
+    def __init__(self, type_code, length, encoding, data):
+        self.type_code = type_code
+        self.length = length
+        self.encoding = encoding
+        self.data = data
+
+    def raw(self):
+        """Return the uncompressed payload as a bytes-like object"""
+        if self.encoding == 0:
+            return self.data
+        if self.encoding == 1:
+            tally('inflated_bytes', len(self.data))
+            return zlib.decompress(self.data)
+        raise FBXError(f"Unknown array encoding {self.encoding}")
+
+    def numpy(self):
+        """Decode into a NumPy array (imported lazily)"""
+        import numpy as np
+
+        dtype, _, itemsize = ARRAY_TYPES[self.type_code]
+        raw = self.raw()
+        if len(raw) < self.length * itemsize:
+            raise FBXError("Array payload shorter than its declared length")
+        tally('array_elements', self.length)
+        return np.frombuffer(raw, dtype=dtype, count=self.length)
+
+    def values(self):
+        """Decode into a Python list without NumPy"""
+        _, code, _ = ARRAY_TYPES[self.type_code]
+        tally('array_elements', self.length)
+        return list(struct.unpack_from(f'<{self.length}{code}', self.raw()))
+
+    def __len__(self):
+        return self.length
+
+    def __repr__(self):
+        return f"FBXArray({chr(self.type_code)!r}, length={self.length}, encoding={self.encoding})"
+
+
+class FBXNode:
+    """A node record; properties and children are decoded lazily"""
+
+    __slots__ = ('file', 'name', 'offset', 'end_offset', 'property_count',
+                 'properties_offset', 'children_offset', '_properties')
+
+    def __init__(self, file, name, offset, end_offset, property_count,
+                 properties_offset, children_offset):
+        self.file = file
+        self.name = name
+        self.offset = offset
+        self.end_offset = end_offset
+        self.property_count = property_count
+        self.properties_offset = properties_offset
+        self.children_offset = children_offset
+        self._properties = None
+
+    @property
+    def properties(self):
+        if self._properties is None:
+            self._properties = self.file.read_properties(self.properties_offset, self.property_count)
+        return self._properties
+
+    def children(self):
+        """Iterate over child node records"""
+        return self.file.iter_nodes(self.children_offset, self.end_offset)
+
+    def find(self, name):
+        """Return the first child with the given name, or None"""
+        for child in self.children():
+            if child.name == name:
+                return child
+        return None
+
+    def find_all(self, name):
+        """Iterate over children with the given name"""
+        return (child for child in self.children() if child.name == name)
+
+    def __repr__(self):
+        return f"FBXNode({self.name!r}, offset={self.offset})"
+
+
+class FBXFile:
+    """Memory-mapped binary FBX file walked as a lazy node tree"""
+
+    def __init__(self, path):
+        self.path = path
+        self.version = None
+        self._file = open(path, 'rb')
+        self._mmap = None
+        self._view = None
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < FBX_HEADER_SIZE:
+                raise FBXError(f"File too small for an FBX header: {size} bytes")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+            if self._mmap[:len(FBX_MAGIC)] != FBX_MAGIC:
+                raise FBXError("Not a binary FBX file")
+            self.version = struct.unpack_from('<I', self._mmap, 23)[0]
+        except Exception:
+            self.close()
+            raise
+
+        if self.version >= 7500:
+            self._node_header = NODE_HEADER_64
+        else:
+            self._node_header = NODE_HEADER_32
+        self.size = size
+
+    def read_node(self, offset):
+        """Parse the node record header at offset; returns None for a null record"""
+        header = self._node_header
+        if offset + header.size > self.size:
+            raise FBXError(f"Truncated node record at offset {offset}")
+        end_offset, property_count, property_length = header.unpack_from(self._mmap, offset)
+        if end_offset == 0:
+            return None
+        if offset + header.size + 1 > self.size:
+            raise FBXError(f"Truncated node record at offset {offset}")
+        name_offset = offset + header.size
+        name_length = self._mmap[name_offset]
+        properties_offset = name_offset + 1 + name_length
+        children_offset = properties_offset + property_length
+        if end_offset > self.size or children_offset > end_offset:
+            raise FBXError(f"Node record at offset {offset} overruns its bounds")
+        name = self._mmap[name_offset + 1:properties_offset].decode('ascii', 'replace')
+        return FBXNode(self, name, offset, end_offset, property_count,
+                       properties_offset, children_offset)
+
+    def iter_nodes(self, offset, end_offset):
+        """Iterate over sibling records from offset until a null record or end_offset"""
+        while offset < end_offset:
+            node = self.read_node(offset)
+            if node is None:
+                break
+            yield node
+            offset = node.end_offset
+
+    def roots(self):
+        """Iterate over top-level node records"""
+        return self.iter_nodes(FBX_HEADER_SIZE, self.size)
+
+    def find(self, name):
+        for node in self.roots():
+            if node.name == name:
+                return node
+        return None
+
+    def read_properties(self, offset, count):
+        """Decode `count` typed properties starting at offset"""
+        mm = self._mmap
+        properties = []
+        for _ in range(count):
+            type_code = mm[offset]
+            offset += 1
+            scalar = SCALAR_PROPERTIES.get(type_code)
+            if scalar is not None:
+                properties.append(scalar.unpack_from(mm, offset)[0])
+                offset += scalar.size
+            elif type_code in ARRAY_TYPES:
+                length, encoding, byte_length = ARRAY_HEADER.unpack_from(mm, offset)
+                offset += ARRAY_HEADER.size
+                if offset + byte_length > self.size:
+                    raise FBXError(f"Array property at offset {offset} overruns file")
+                properties.append(FBXArray(type_code, length, encoding,
+                                           self._view[offset:offset + byte_length]))
+                offset += byte_length
+            elif type_code in (ord('S'), ord('R')):
+                length = struct.unpack_from('<I', mm, offset)[0]
+                offset += 4
+                data = mm[offset:offset + length]
+                if type_code == ord('S'):
+                    data = data.decode('utf-8', 'replace')
+                properties.append(data)
+                offset += length
+            else:
+                raise FBXError(f"Unknown property type {chr(type_code)!r} at offset {offset - 1}")
+        return properties
+
+    def close(self):
+        if self._view is not None:
+            try:
+                self._view.release()
+            except BufferError:
+                pass
+            self._view = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"FBXFile({self.path!r}, version={self.version})"
+
+
+def read_fbx_version(path):
+    """Return the version of a binary FBX file from its 27-byte header"""
+    with open(path, 'rb') as f:
+        header = f.read(FBX_HEADER_SIZE)
+    if len(header) < FBX_HEADER_SIZE:
+        raise FBXError(f"File too small for an FBX header: {len(header)} bytes")
+    if header[:len(FBX_MAGIC)] != FBX_MAGIC:
+        raise FBXError("Not a binary FBX file")
+    return struct.unpack_from('<I', header, 23)[0]
+
+
+def open_fbx(path):
+    """Open a binary FBX file as a memory-mapped FBXFile"""
+    return FBXFile(path)
+
+
+# Structured records yielded from the Objects section
+FBXModel = namedtuple('FBXModel', 'id name type node')
+FBXDeformer = namedtuple('FBXDeformer', 'id name type node')
+FBXCluster = namedtuple('FBXCluster', 'id name indexes weights transform transform_link node')
+FBXPose = namedtuple('FBXPose', 'id name type nodes node')
+FBXPoseNode = namedtuple('FBXPoseNode', 'node_id matrix')
+FBXAnimationCurve = namedtuple('FBXAnimationCurve', 'id name default key_times key_values node')
+FBXConnection = namedtuple('FBXConnection', 'type child parent property')
+
+
+def split_object_name(name):
+    """Split a binary FBX "Name\\x00\\x01Class" string into (name, class)"""
+    if isinstance(name, str):
+        name = name.encode('utf-8', 'replace')
+    object_name, _, class_name = name.partition(NAME_SEPARATOR)
+    return object_name.decode('utf-8', 'replace'), class_name.decode('utf-8', 'replace')
+
+
+def _object_header(node):
+    """Return (id, name, subtype) from an object's leading properties"""
+    properties = node.properties
+    object_id = properties[0] if properties else None
+    name = split_object_name(properties[1])[0] if len(properties) > 1 else ''
+    subtype = properties[2] if len(properties) > 2 else ''
+    return object_id, name, subtype
+
+
+def _child_value(node, name):
+    """First property of the named child, or None"""
+    child = node.find(name)
+    if child is None or not child.properties:
+        return None
+    return child.properties[0]
+
+
+def properties70(node):
+    """A node's Properties70 "P" records as {name: [values]} (type columns dropped)"""
+    block = node.find('Properties70') if node is not None else None
+    if block is None:
+        return {}
+    return {record.properties[0]: record.properties[4:]
+            for record in block.find_all('P') if record.properties}
+
+
+class FBXDocument:
+    """Typed views over the Objects and Connections sections of an FBXFile"""
+
+    def __init__(self, fbx):
+        self.fbx = fbx
+
+    def objects(self, name=None):
+        """Iterate over Objects children, optionally only those with a node name"""
+        objects = self.fbx.find('Objects')
+        if objects is None:
+            return
+        for node in objects.children():
+            if name is None or node.name == name:
+                yield node
+
+    def models(self):
+        for node in self.objects('Model'):
+            object_id, name, subtype = _object_header(node)
+            yield FBXModel(object_id, name, subtype, node)
+
+    def deformers(self):
+        for node in self.objects('Deformer'):
+            object_id, name, subtype = _object_header(node)
+            yield FBXDeformer(object_id, name, subtype, node)
+
+    def clusters(self):
+        for node in self.objects('Deformer'):
+            object_id, name, subtype = _object_header(node)
+            if subtype != 'Cluster':
+                continue
+            yield FBXCluster(object_id, name,
+                             _child_value(node, 'Indexes'),
+                             _child_value(node, 'Weights'),
+                             _child_value(node, 'Transform'),
+                             _child_value(node, 'TransformLink'),
+                             node)
+
+    def poses(self):
+        for node in self.objects('Pose'):
+            object_id, name, subtype = _object_header(node)
+            pose_nodes = [FBXPoseNode(_child_value(pose_node, 'Node'), _child_value(pose_node, 'Matrix'))
+                          for pose_node in node.find_all('PoseNode')]
+            yield FBXPose(object_id, name, subtype, pose_nodes, node)
+
+    def animation_curves(self):
+        for node in self.objects('AnimationCurve'):
+            object_id, name, _ = _object_header(node)
+            yield FBXAnimationCurve(object_id, name,
+                                    _child_value(node, 'Default'),
+                                    _child_value(node, 'KeyTime'),
+                                    _child_value(node, 'KeyValueFloat'),
+                                    node)
+
+    def templates(self):
+        """Default Properties70 per object type from the Definitions section"""
+        templates = {}
+        definitions = self.fbx.find('Definitions')
+        if definitions is None:
+            return templates
+        for object_type in definitions.find_all('ObjectType'):
+            template = object_type.find('PropertyTemplate')
+            if template is not None and object_type.properties:
+                templates[object_type.properties[0]] = properties70(template)
+        return templates
+
+    def connections(self):
+        connections = self.fbx.find('Connections')
+        if connections is None:
+            return
+        for node in connections.find_all('C'):
+            properties = node.properties
+            yield FBXConnection(properties[0], properties[1], properties[2],
+                                properties[3] if len(properties) > 3 else None)
+
+
+def _encode_property(value):
+    """Encode one property; (type_code, value) tuples force a specific type"""
+    if isinstance(value, tuple):
+        type_code, value = value
+    elif isinstance(value, bool):
+        type_code = 'C'
+    elif isinstance(value, int):
+        type_code = 'L'
+    elif isinstance(value, float):
+        type_code = 'D'
+    elif isinstance(value, str):
+        type_code = 'S'
+    elif isinstance(value, (bytes, bytearray)):
+        type_code = 'R'
+    else:
+        # NumPy array: pick the array type from its dtype
+        type_code = {'f4': 'f', 'f8': 'd', 'i8': 'l', 'i4': 'i', 'u1': 'b'}[value.dtype.str[1:]]
+
+    code = ord(type_code)
+    if code in SCALAR_PROPERTIES:
+        return type_code.encode('ascii') + SCALAR_PROPERTIES[code].pack(value)
+    if code in ARRAY_TYPES:
+        dtype = ARRAY_TYPES[code][0]
+        raw = value.astype(dtype, copy=False).tobytes()
+        compressed = zlib.compress(raw)
+        if len(compressed) < len(raw):
+            return type_code.encode('ascii') + ARRAY_HEADER.pack(len(value), 1, len(compressed)) + compressed
+        return type_code.encode('ascii') + ARRAY_HEADER.pack(len(value), 0, len(raw)) + raw
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    return type_code.encode('ascii') + struct.pack('<I', len(value)) + bytes(value)
+
+
+def _encode_node(node, offset, header):
+    """Encode a (name, properties, children) tuple as a node record at offset"""
+    name, properties, children = node
+    encoded_name = name.encode('ascii')
+    property_data = b''.join(_encode_property(value) for value in properties)
+    start = offset + header.size + 1 + len(encoded_name) + len(property_data)
+
+    child_data = b''
+    if children:
+        parts = []
+        position = start
+        for child in children:
+            encoded = _encode_node(child, position, header)
+            parts.append(encoded)
+            position += len(encoded)
+        parts.append(b'\x00' * header.size)
+        child_data = b''.join(parts)
+
+    end_offset = start + len(child_data)
+    return (header.pack(end_offset, len(properties), len(property_data))
+            + bytes([len(encoded_name)]) + encoded_name + property_data + child_data)
+
+
+def write_fbx(path, roots, version=7400):
+    """Write a binary FBX file from (name, properties, children) node tuples
+
+    Array properties are NumPy arrays and are zlib-compressed when that
+    saves space.  Only the node tree is written (no trailing footer), which
+    is what this module's reader needs; it is meant for tests, benchmarks
+    and synthetic assets rather than interchange with DCC tools.
+    """
+    header = NODE_HEADER_64 if version >= 7500 else NODE_HEADER_32
+    data = bytearray(FBX_MAGIC + b'\x1a\x00' + struct.pack('<I', version))
+    for node in roots:
+        data += _encode_node(node, len(data), header)
+    data += b'\x00' * header.size
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
+
+
+def main():
+    import sys
+
+    fbx_path = sys.argv[1] if len(sys.argv) > 1 else "human_model_sit_possition.fbx"
+    print(f"=== FBX Node Tree: {fbx_path} ===")
+
+    with open_fbx(fbx_path) as fbx:
+        print(f"FBX Version: {fbx.version}")
+        print("Top-level nodes: " + ", ".join(node.name for node in fbx.roots()))
+
+        document = FBXDocument(fbx)
+        models = list(document.models())
+        limbs = [model for model in models if model.type == 'LimbNode']
+        print(f"\nModels: {len(models)} ({len(limbs)} LimbNode)")
+        for model in limbs[:20]:
+            print(f"  - {model.name}")
+        if len(limbs) > 20:
+            print(f"  ... and {len(limbs) - 20} more")
+
+        deformers = list(document.deformers())
+        skins = sum(1 for deformer in deformers if deformer.type == 'Skin')
+        clusters = list(document.clusters())
+        print(f"\nDeformers: {len(deformers)} ({skins} Skin, {len(clusters)} Cluster)")
+        weighted = sum(len(cluster.indexes) for cluster in clusters if cluster.indexes is not None)
+        print(f"Cluster vertex influences: {weighted}")
+
+        for pose in document.poses():
+            print(f"Pose '{pose.name}' ({pose.type}): {len(pose.nodes)} nodes")
+
+        curves = list(document.animation_curves())
+        keys = sum(len(curve.key_times) for curve in curves if curve.key_times is not None)
+        print(f"\nAnimation curves: {len(curves)} ({keys} keys)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import os
+import re
+import mmap
+from collections import Counter
+
+from analysis_profiler import span, tally
+
+# Every literal the FBX heuristic analyses count, scanned together in one pass
+FBX_KEYWORDS = [
+    # Rig components
+    'Deformer', 'Cluster', 'Bone', 'Joint', 'Skeleton', 'Weight', 'Skin',
+    'Armature', 'BindPose', 'Animation', 'Curve', 'KeyFrame', 'Transform',
+    'Matrix', 'Model', 'Geometry', 'NodeAttribute',
+    # Typed object prefixes
+    'Model::', 'NodeAttribute::', 'Deformer::', 'Cluster::', 'Skin::',
+    'AnimationCurve::', 'AnimationLayer::', 'AnimationStack::',
+    'BindPose::', 'Pose::',
+    # Sections and properties (ASCII FBX)
+    'Objects:', 'Connections:', 'Takes:', 'Model:', 'Geometry:', 'Property:',
+]
+
+# Capture name -> (trigger keyword, pattern matched at the trigger position)
+FBX_CAPTURES = {
+    'model': ('Model::', rb'Model::\s*"([^"]+)"'),
+}
+
+# Keywords whose match positions are kept for line-level reporting
+FBX_POSITION_KEYWORDS = ['Model::', 'NodeAttribute::', 'Deformer::', 'Property:']
+
+
+class ScanResult:
+    """Counts, captures and positions gathered by one PatternScanner pass"""
+
+    __slots__ = ('counts', 'captures', 'positions', 'size')
+
+    def __init__(self, counts, captures, positions, size):
+        self.counts = counts
+        self.captures = captures
+        self.positions = positions
+        self.size = size
+
+    def count(self, keyword):
+        return self.counts.get(keyword, 0)
+
+
+def _has_partial_overlap(keywords):
+    """True if two keywords can straddle a match boundary
+
+    A proper suffix of one keyword that is a proper prefix of another would
+    be missed by a plain leftmost alternation, unless a longer keyword
+    always covers the combined text (e.g. 'BindPose' + 'Pose::' is covered
+    by 'BindPose::').
+    """
+    for a in keywords:
+        for b in keywords:
+            if a == b:
+                continue
+            for size in range(1, min(len(a), len(b))):
+                if a[-size:] != b[:size]:
+                    continue
+                combined = a + b[size:]
+                covering = [k for k in keywords if combined.startswith(k)]
+                if max(map(len, covering)) < len(combined):
+                    return True
+    return False
+
+
+class PatternScanner:
+    """Match many literal keywords and anchored capture patterns in one pass
+
+    All keywords are compiled into a single alternation (longest first), so
+    the data is traversed once by the regex engine.  Keywords contained in a
+    longer keyword (e.g. 'Curve' in 'AnimationCurve::') are credited from the
+    longer match, giving the same totals as a separate count per keyword.
+    Works directly on bytes, memoryview or mmap objects; nothing is decoded.
+    """
+
+    def __init__(self, keywords, captures=None, position_keywords=()):
+        encoded = sorted({keyword.encode('utf-8') for keyword in keywords}, key=len, reverse=True)
+        self.keywords = encoded
+
+        alternation = b'|'.join(re.escape(keyword) for keyword in encoded)
+        if _has_partial_overlap(encoded):
+            # Zero-width lookahead tries every start position instead; the
+            # leading character class lets the engine skip ahead quickly
+            first = b''.join(sorted({re.escape(keyword[:1]) for keyword in encoded}))
+            self._pattern = re.compile(b'(?=[' + first + b'])(?=(' + alternation + b'))')
+            self._group = 1
+        else:
+            self._pattern = re.compile(alternation)
+            self._group = 0
+
+        # Matched keyword -> every keyword occurrence it accounts for.  With the
+        # lookahead each start position is its own match, so a match only
+        # stands for the keywords that are its prefix, once each.
+        self._contained = {}
+        for outer in encoded:
+            contained = []
+            for inner in encoded:
+                if self._group == 0:
+                    contained.extend([inner] * outer.count(inner))
+                elif outer.startswith(inner):
+                    contained.append(inner)
+            self._contained[outer] = contained
+
+        self._captures = {}
+        for name, (trigger, pattern) in (captures or {}).items():
+            trigger = trigger.encode('utf-8')
+            compiled = re.compile(pattern)
+            for keyword in encoded:
+                if keyword.startswith(trigger):
+                    self._captures.setdefault(keyword, []).append((name, compiled))
+        self._capture_names = list(captures or {})
+        self._position_keywords = {keyword.encode('utf-8') for keyword in position_keywords}
+
+    def scan(self, data):
+        """Scan a bytes-like object and return a ScanResult"""
+        matched = Counter()
+        captures = {name: [] for name in self._capture_names}
+        positions = {keyword.decode('utf-8'): [] for keyword in self._position_keywords}
+        group = self._group
+
+        if not self._captures and not self._position_keywords:
+            matched.update(match.group(group) for match in self._pattern.finditer(data))
+        else:
+            for match in self._pattern.finditer(data):
+                keyword = match.group(group)
+                matched[keyword] += 1
+                start = match.start()
+                for name, compiled in self._captures.get(keyword, ()):
+                    capture = compiled.match(data, start)
+                    if capture:
+                        captures[name].append(capture.group(1).decode('utf-8', 'ignore'))
+                for inner in self._contained[keyword]:
+                    if inner in self._position_keywords:
+                        positions[inner.decode('utf-8')].append(start + keyword.find(inner))
+
+        tally('regex_matches', sum(matched.values()))
+        counts = Counter()
+        for keyword, occurrences in matched.items():
+            for inner in self._contained[keyword]:
+                counts[inner.decode('utf-8')] += occurrences
+
+        return ScanResult(dict(counts), captures, positions, len(data))
+
+    def scan_file(self, path):
+        """Scan a file through a read-only memory map"""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self.scan(b'')
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return self.scan(mm)
+
+
+FBX_SCANNER = PatternScanner(FBX_KEYWORDS, FBX_CAPTURES, FBX_POSITION_KEYWORDS)
+
+_scan_cache = {}
+
+
+def scan_fbx(path):
+    """Scan a file with the shared FBX vocabulary
+
+    Results are memoized per (path, size, mtime) so several analyses of the
+    same file in one process share a single pass.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    result = _scan_cache.get(key)
+    if result is None:
+        with span('scan_fbx', 'read', bytes=stat.st_size):
+            result = FBX_SCANNER.scan_file(path)
+        _scan_cache.clear()
+        _scan_cache[key] = result
+    return result
+
+
+def clear_scan_cache():
+    """Forget memoized scan_fbx results"""
+    _scan_cache.clear()
+
+
+def matching_lines(path, positions):
+    """Return sorted (line_number, text) pairs for the lines containing positions
+
+    Line numbers are counted incrementally between hits, so the file is only
+    touched around the matches rather than split into lines up front.
+    """
+    results = []
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return results
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            line_number = 0
+            counted_to = 0
+            last_start = -1
+            for position in sorted(positions):
+                start = mm.rfind(b'\n', 0, position) + 1
+                if start == last_start:
+                    continue
+                line_number += mm[counted_to:start].count(b'\n')
+                counted_to = start
+                last_start = start
+                end = mm.find(b'\n', position)
+                if end == -1:
+                    end = len(mm)
+                results.append((line_number, mm[start:end].decode('utf-8', 'ignore')))
+    return results
+
+
+def main():
+    import sys
+    import time
+
+    fbx_path = sys.argv[1] if len(sys.argv) > 1 else "human_model_sit_possition.fbx"
+    start = time.perf_counter()
+    result = FBX_SCANNER.scan_file(fbx_path)
+    elapsed = time.perf_counter() - start
+
+    print(f"=== Single-pass Keyword Scan: {fbx_path} ===")
+    print(f"Scanned {result.size} bytes in {elapsed * 1000:.1f} ms")
+    for keyword in FBX_KEYWORDS:
+        if result.count(keyword):
+            print(f"  {keyword}: {result.count(keyword)}")
+    print(f"Quoted Model:: names: {len(result.captures['model'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,686 @@
+import os
+import time
+import functools
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from animation_analysis import sample_times
+from batch_analyze import find_assets
+from fbx_parser import FBXDocument, open_fbx, properties70, split_object_name
+from forward_kinematics import decompose_matrices
+from glb_optimizer import (ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER, COMPONENT_TYPES, BufferPacker,
+                           GLBOptimizer, pack_elements)
+from glb_reader import write_glb
+from gltf_accessors import GLTFAccessors
+from vertex_cache import output_paths
+
+FBX_TICKS_PER_SECOND = 46186158000
+# FBX distances are UnitScaleFactor centimetres; glTF uses metres
+CENTIMETRES_PER_METRE = 100.0
+MAX_INFLUENCES = 4
+
+# RotationOrder enum -> axes in the order they are applied (6 is SphericXYZ)
+ROTATION_ORDERS = ('xyz', 'xzy', 'yzx', 'yxz', 'zxy', 'zyx', 'xyz')
+# Model types without a glTF counterpart; dropped unless other models hang off them
+SKIPPED_MODELS = ('Light', 'Camera')
+ANIMATED_PROPERTIES = {'Lcl Translation': 'translation', 'Lcl Rotation': 'rotation', 'Lcl Scaling': 'scale'}
+REST_TOLERANCE = 1e-6
+
+
+class ConversionError(ValueError):
+    """Raised when an FBX scene uses data the converter cannot express in glTF"""
+
+
+def fbx_matrix(array):
+    """4x4 matrix from a 16-value FBX array (stored column-major)"""
+    return np.asarray(array.numpy(), dtype=np.float64).reshape(4, 4).T
+
+
+def euler_matrices(degrees, order='xyz'):
+    """(..., 3) Euler angles in degrees to (..., 3, 3) matrices; axes applied in `order`"""
+    radians = np.radians(np.asarray(degrees, dtype=np.float64))
+    cos, sin = np.cos(radians), np.sin(radians)
+    matrices = {}
+    for k, (axis, (i, j)) in enumerate(zip('xyz', ((1, 2), (2, 0), (0, 1)))):
+        matrix = np.zeros(radians.shape[:-1] + (3, 3))
+        matrix[..., k, k] = 1.0
+        matrix[..., i, i] = matrix[..., j, j] = cos[..., k]
+        matrix[..., i, j] = -sin[..., k]
+        matrix[..., j, i] = sin[..., k]
+        matrices[axis] = matrix
+    return matrices[order[2]] @ matrices[order[1]] @ matrices[order[0]]
+
+
+def _translation(vector):
+    vector = np.asarray(vector, dtype=np.float64)
+    matrix = np.zeros(vector.shape[:-1] + (4, 4))
+    matrix[..., :3, :3] = np.eye(3)
+    matrix[..., :3, 3] = vector
+    matrix[..., 3, 3] = 1.0
+    return matrix
+
+
+def _linear(linear):
+    matrix = np.zeros(linear.shape[:-2] + (4, 4))
+    matrix[..., :3, :3] = linear
+    matrix[..., 3, 3] = 1.0
+    return matrix
+
+
+def _vector(props, name, default):
+    values = props.get(name)
+    if values is None or len(values) < 3:
+        return np.array(default, dtype=np.float64)
+    return np.array(values[:3], dtype=np.float64)
+
+
+def local_matrices(props, translation=None, rotation=None, scale=None):
+    """FBX node transforms from Properties70, with optional (..., 3) animated T/R/S
+
+    Follows the FBX SDK order
+    T * Roff * Rp * Rpre * R * Rpost^-1 * Rp^-1 * Soff * Sp * S * Sp^-1
+    (pre/post rotation are always XYZ; InheritType is assumed to be RSrs).
+    """
+    if translation is None:
+        translation = _vector(props, 'Lcl Translation', (0, 0, 0))
+    if rotation is None:
+        rotation = _vector(props, 'Lcl Rotation', (0, 0, 0))
+    if scale is None:
+        scale = _vector(props, 'Lcl Scaling', (1, 1, 1))
+    order = ROTATION_ORDERS[int(props.get('RotationOrder', [0])[0])]
+    rotation_pivot = _vector(props, 'RotationPivot', (0, 0, 0))
+    scaling_pivot = _vector(props, 'ScalingPivot', (0, 0, 0))
+    post_rotation = euler_matrices(_vector(props, 'PostRotation', (0, 0, 0)))
+    return (_translation(translation)
+            @ _translation(_vector(props, 'RotationOffset', (0, 0, 0)))
+            @ _translation(rotation_pivot)
+            @ _linear(euler_matrices(_vector(props, 'PreRotation', (0, 0, 0))))
+            @ _linear(euler_matrices(rotation, order))
+            @ _linear(post_rotation.swapaxes(-1, -2))
+            @ _translation(-rotation_pivot)
+            @ _translation(_vector(props, 'ScalingOffset', (0, 0, 0)))
+            @ _translation(scaling_pivot)
+            @ _linear(np.asarray(scale, dtype=np.float64)[..., None, :] * np.eye(3))
+            @ _translation(-scaling_pivot))
+
+
+def geometric_matrix(props):
+    """Object-offset transform applied to a model's geometry but not its children"""
+    return (_translation(_vector(props, 'GeometricTranslation', (0, 0, 0)))
+            @ _linear(euler_matrices(_vector(props, 'GeometricRotation', (0, 0, 0))))
+            @ _linear(_vector(props, 'GeometricScaling', (1, 1, 1)) * np.eye(3)))
+
+
+def axis_conversion(settings):
+    """4x4 matrix taking FBX scene coordinates to glTF's Y-up, +Z front metres"""
+    axes = np.zeros((3, 3))
+    for row, (axis, sign, default) in enumerate((('CoordAxis', 'CoordAxisSign', 0),
+                                                 ('UpAxis', 'UpAxisSign', 1),
+                                                 ('FrontAxis', 'FrontAxisSign', 2))):
+        axes[row, int(settings.get(axis, [default])[0])] = float(settings.get(sign, [1])[0])
+    if abs(np.linalg.det(axes)) != 1.0:
+        raise ConversionError("GlobalSettings axes do not form a basis")
+    unit = float(settings.get('UnitScaleFactor', [1.0])[0]) / CENTIMETRES_PER_METRE
+    return _linear(axes * unit)
+
+
+def triangulate(polygon_vertex_index):
+    """Fan-triangulate FBX polygons (last corner stored as ~index)
+
+    Returns (control point per corner, polygon per corner, triangles as
+    (n, 3) corner indices, polygon per triangle).
+    """
+    raw = np.asarray(polygon_vertex_index, dtype=np.int64)
+    ends = raw < 0
+    control = np.where(ends, ~raw, raw)
+    polygon = np.cumsum(ends) - ends
+    starts = np.flatnonzero(np.r_[True, ends[:-1]])
+    first = starts[polygon]
+    corners = np.flatnonzero(np.arange(len(raw)) - first >= 2)
+    triangles = np.stack([first[corners], corners - 1, corners], axis=1)
+    return control, polygon, triangles, polygon[corners]
+
+
+def layer_corners(element, name, width, control, polygon, indexed=True):
+    """Per-corner values of a LayerElement* node, whatever its mapping and reference mode"""
+    data = element.find(name)
+    if data is None or not data.properties:
+        return None
+    values = np.asarray(data.properties[0].numpy()).reshape(-1, width)
+    mapping = element.find('MappingInformationType').properties[0]
+    reference = element.find('ReferenceInformationType').properties[0]
+    if mapping == 'ByPolygonVertex':
+        lookup = np.arange(len(control))
+    elif mapping in ('ByVertice', 'ByVertex', 'ByControlPoint'):
+        lookup = control
+    elif mapping == 'ByPolygon':
+        lookup = polygon
+    elif mapping == 'AllSame':
+        lookup = np.zeros(len(control), dtype=np.int64)
+    else:
+        raise ConversionError(f"Unsupported {element.name} mapping {mapping!r}")
+    index = element.find(name + 'Index')
+    if index is None:
+        index = element.find(name.rstrip('s') + 'Index')
+    if indexed and reference in ('IndexToDirect', 'Index') and index is not None:
+        lookup = np.asarray(index.properties[0].numpy(), dtype=np.int64)[lookup]
+    return values[lookup]
+
+
+def continuous_quaternions(quaternions):
+    """Flip signs so consecutive (n, 4) quaternions stay in the same hemisphere"""
+    if len(quaternions) < 2:
+        return quaternions
+    flips = np.einsum('ij,ij->i', quaternions[1:], quaternions[:-1]) < 0
+    signs = np.cumprod(np.r_[1.0, np.where(flips, -1.0, 1.0)])
+    return quaternions * signs[:, None]
+
+
+class FBXConverter:
+    """Build a glTF document and BIN payload from an open FBXFile
+
+    Models become nodes (root transforms absorb the axis and unit
+    conversion), Geometry objects become meshes with one primitive per
+    material, Skin/Cluster deformers become skins whose inverse bind
+    matrices come from each cluster's TransformLink and the BindPose, and
+    each AnimationStack becomes an animation whose curves are evaluated at
+    their key times (or `sample_rate` samples per second) through the full
+    FBX transform, then split into translation/rotation/scale channels.
+    """
+
+    def __init__(self, fbx, animations=True, sample_rate=None):
+        self.fbx = fbx
+        self.document = FBXDocument(fbx)
+        self.sample_rate = sample_rate
+        self.packer = BufferPacker()
+        self.gltf = {'asset': {'version': '2.0', 'generator': 'fbx_to_glb'},
+                     'scene': 0, 'scenes': [{'nodes': []}], 'nodes': []}
+        self.stats = {'skipped_models': 0, 'vertices': 0, 'triangles': 0,
+                      'truncated_influences': 0, 'unweighted_vertices': 0, 'keys': 0}
+        self._index()
+        settings = properties70(fbx.find('GlobalSettings'))
+        self.conversion = axis_conversion(settings)
+        # A mirroring conversion turns counter-clockwise faces clockwise
+        self.flip_winding = np.linalg.det(self.conversion[:3, :3]) < 0
+        self.nodes = {}
+        self.world = {}
+        self.meshes = {}
+        self.skins = {}
+        self.materials = {}
+        self._build_nodes()
+        self._build_meshes()
+        if animations:
+            self._build_animations()
+
+    def _index(self):
+        self.objects = {}
+        for node in self.document.objects():
+            properties = node.properties
+            if len(properties) < 2:
+                continue
+            name = split_object_name(properties[1])[0]
+            subtype = properties[2] if len(properties) > 2 else ''
+            self.objects[properties[0]] = (node.name, name, subtype, node)
+        self.links = defaultdict(list)
+        self.property_links = defaultdict(list)
+        self.targets = defaultdict(list)
+        for connection in self.document.connections():
+            if connection.type == 'OO':
+                self.links[connection.parent].append(connection.child)
+            elif connection.type == 'OP':
+                self.property_links[connection.parent].append((connection.child, connection.property))
+                self.targets[connection.child].append((connection.parent, connection.property))
+        self.clusters = {cluster.id: cluster for cluster in self.document.clusters()}
+        self.bind_pose = {}
+        for pose in self.document.poses():
+            if pose.type == 'BindPose':
+                for pose_node in pose.nodes:
+                    if pose_node.matrix is not None:
+                        self.bind_pose.setdefault(pose_node.node_id, fbx_matrix(pose_node.matrix))
+        self.model_defaults = self.document.templates().get('Model', {})
+
+    def _linked(self, parent, kind, subtype=None):
+        return [child for child in self.links.get(parent, ())
+                if child in self.objects and self.objects[child][0] == kind
+                and (subtype is None or self.objects[child][2] == subtype)]
+
+    def props(self, model):
+        return dict(self.model_defaults, **properties70(self.objects[model][3]))
+
+    # --- nodes -------------------------------------------------------------
+
+    def _build_nodes(self):
+        self.model_props = {}
+        for root in self._linked(0, 'Model'):
+            index = self._add_node(root, None)
+            if index is not None:
+                self.gltf['scenes'][0]['nodes'].append(index)
+
+    def _add_node(self, model, parent):
+        _, name, subtype, _ = self.objects[model]
+        children = self._linked(model, 'Model')
+        if subtype in SKIPPED_MODELS and not children:
+            self.stats['skipped_models'] += 1
+            return None
+        props = self.props(model)
+        local = local_matrices(props)
+        self.world[model] = self.world[parent] @ local if parent is not None else local
+        if parent is None:
+            local = self.conversion @ local
+        node = {'name': name}
+        node.update(self._trs(local))
+        index = len(self.gltf['nodes'])
+        self.gltf['nodes'].append(node)
+        self.nodes[model] = index
+        self.model_props[model] = props
+        for child in children:
+            child_index = self._add_node(child, model)
+            if child_index is not None:
+                node.setdefault('children', []).append(child_index)
+        return index
+
+    def _trs(self, matrix):
+        translation, rotation, scale = decompose_matrices(matrix)
+        if rotation[3] < 0:
+            rotation = -rotation
+        trs = {}
+        if not np.allclose(translation, 0.0, atol=REST_TOLERANCE):
+            trs['translation'] = translation.tolist()
+        if not np.allclose(rotation, (0, 0, 0, 1), atol=REST_TOLERANCE):
+            trs['rotation'] = rotation.tolist()
+        if not np.allclose(scale, 1.0, atol=REST_TOLERANCE):
+            trs['scale'] = scale.tolist()
+        return trs
+
+    # --- accessors ---------------------------------------------------------
+
+    def _accessor(self, array, accessor_type, target=None, bounds=False, normalized=False):
+        array = np.ascontiguousarray(array)
+        accessor = {'bufferView': self.packer.add(pack_elements(array, accessor_type), None, target),
+                    'componentType': COMPONENT_TYPES[array.dtype.newbyteorder('<')],
+                    'count': len(array), 'type': accessor_type}
+        if normalized:
+            accessor['normalized'] = True
+        if bounds:
+            flat = array.reshape(len(array), -1)
+            accessor['min'] = flat.min(axis=0).tolist()
+            accessor['max'] = flat.max(axis=0).tolist()
+        accessors = self.gltf.setdefault('accessors', [])
+        accessors.append(accessor)
+        return len(accessors) - 1
+
+    # --- meshes and skins --------------------------------------------------
+
+    def _build_meshes(self):
+        for model, index in self.nodes.items():
+            geometries = self._linked(model, 'Geometry', 'Mesh')
+            if not geometries:
+                continue
+            materials = tuple(self._material(material) for material in self._linked(model, 'Material'))
+            key = (geometries[0], materials)
+            if key not in self.meshes:
+                self.meshes[key] = self._mesh(geometries[0], model, materials)
+            node = self.gltf['nodes'][index]
+            node['mesh'] = self.meshes[key]
+            skin = self._skin(geometries[0], model)
+            if skin is not None:
+                node['skin'] = skin
+
+    def _material(self, material):
+        if material not in self.materials:
+            _, name, _, node = self.objects[material]
+            props = properties70(node)
+            color = _vector(props, 'DiffuseColor', (0.8, 0.8, 0.8)) * float(props.get('DiffuseFactor', [1.0])[0])
+            opacity = float(props.get('Opacity', [1.0])[0])
+            entry = {'name': name, 'pbrMetallicRoughness': {
+                'baseColorFactor': np.clip(np.r_[color, opacity], 0.0, 1.0).tolist(), 'metallicFactor': 0.0}}
+            if opacity < 1.0:
+                entry['alphaMode'] = 'BLEND'
+            materials = self.gltf.setdefault('materials', [])
+            materials.append(entry)
+            self.materials[material] = len(materials) - 1
+        return self.materials[material]
+
+    def _influences(self, geometry, count):
+        """(joints, weights) per control point, top MAX_INFLUENCES by weight, or None"""
+        clusters = [cluster for skin in self._linked(geometry, 'Deformer', 'Skin')
+                    for cluster in self._linked(skin, 'Deformer', 'Cluster')]
+        if not clusters:
+            return None
+        points, joints, weights = [], [], []
+        for joint, cluster in enumerate(clusters):
+            found = self.clusters[cluster]
+            if found.indexes is None or found.weights is None:
+                continue
+            indexes = np.asarray(found.indexes.numpy(), dtype=np.int64)
+            points.append(indexes)
+            joints.append(np.full(len(indexes), joint))
+            weights.append(np.asarray(found.weights.numpy(), dtype=np.float64))
+        joint_array = np.zeros((count, MAX_INFLUENCES), dtype=np.int64)
+        weight_array = np.zeros((count, MAX_INFLUENCES))
+        if points:
+            points, joints, weights = np.concatenate(points), np.concatenate(joints), np.concatenate(weights)
+            order = np.lexsort((-weights, points))
+            points, joints, weights = points[order], joints[order], weights[order]
+            starts = np.r_[True, points[1:] != points[:-1]]
+            rank = np.arange(len(points)) - np.maximum.accumulate(np.where(starts, np.arange(len(points)), 0))
+            self.stats['truncated_influences'] += int(np.count_nonzero(rank == MAX_INFLUENCES))
+            keep = rank < MAX_INFLUENCES
+            joint_array[points[keep], rank[keep]] = joints[keep]
+            weight_array[points[keep], rank[keep]] = weights[keep]
+        totals = weight_array.sum(axis=1, keepdims=True)
+        weight_array = np.divide(weight_array, totals, out=np.zeros_like(weight_array), where=totals > 0)
+        return clusters, joint_array, weight_array
+
+    def _mesh(self, geometry, model, materials):
+        _, name, _, node = self.objects[geometry]
+        vertices = np.asarray(node.find('Vertices').properties[0].numpy(), dtype=np.float64).reshape(-1, 3)
+        control, polygon, triangles, triangle_polygon = triangulate(
+            node.find('PolygonVertexIndex').properties[0].numpy())
+
+        geometric = geometric_matrix(self.model_props[model])
+        columns = {'NORMAL': None}
+        normal_element = node.find('LayerElementNormal')
+        if normal_element is not None:
+            columns['NORMAL'] = layer_corners(normal_element, 'Normals', 3, control, polygon)
+        uv_elements = sorted(node.find_all('LayerElementUV'), key=lambda element: element.properties[0])
+        for i, element in enumerate(uv_elements):
+            columns[f'TEXCOORD_{i}'] = layer_corners(element, 'UV', 2, control, polygon)
+        color_element = node.find('LayerElementColor')
+        if color_element is not None:
+            columns['COLOR_0'] = layer_corners(color_element, 'Colors', 4, control, polygon)
+        columns = {key: value for key, value in columns.items() if value is not None}
+
+        material_element = node.find('LayerElementMaterial')
+        if material_element is not None:
+            slots = layer_corners(material_element, 'Materials', 1, control, polygon, indexed=False)[:, 0]
+            triangle_slot = slots[triangles[:, 0]]
+        else:
+            triangle_slot = np.zeros(len(triangles), dtype=np.int64)
+
+        # One glTF vertex per distinct (control point, normal, uv..., color) corner
+        keys = np.ascontiguousarray(np.concatenate(
+            [control[:, None].astype(np.float64)] + list(columns.values()), axis=1))
+        _, first, inverse = np.unique(keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))),
+                                      return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        points = control[first]
+
+        positions = vertices[points] @ geometric[:3, :3].T + geometric[:3, 3]
+        attributes = {'POSITION': self._accessor(positions.astype(np.float32), 'VEC3', ARRAY_BUFFER, bounds=True)}
+        for key, values in columns.items():
+            values = values[first]
+            if key == 'NORMAL':
+                values = values @ np.linalg.inv(geometric[:3, :3])
+                length = np.linalg.norm(values, axis=1, keepdims=True)
+                values = np.divide(values, length, out=np.zeros_like(values), where=length > 0)
+            elif key.startswith('TEXCOORD'):
+                values = np.column_stack([values[:, 0], 1.0 - values[:, 1]])
+            attributes[key] = self._accessor(values.astype(np.float32), 'VEC4' if key == 'COLOR_0' else
+                                             ('VEC2' if key.startswith('TEXCOORD') else 'VEC3'), ARRAY_BUFFER)
+
+        influences = self._influences(geometry, len(vertices))
+        if influences is not None:
+            clusters, joints, weights = influences
+            joints, weights = joints[points], weights[points]
+            self.stats['unweighted_vertices'] += int(np.count_nonzero(weights.sum(axis=1) == 0))
+            joint_type = np.uint8 if len(clusters) <= 256 else np.uint16
+            attributes['JOINTS_0'] = self._accessor(joints.astype(joint_type), 'VEC4', ARRAY_BUFFER)
+            attributes['WEIGHTS_0'] = self._accessor(weights.astype(np.float32), 'VEC4', ARRAY_BUFFER)
+
+        triangles = inverse[triangles]
+        if self.flip_winding:
+            triangles = triangles[:, ::-1]
+        index_type = np.uint16 if len(first) < 65536 else np.uint32
+        primitives = []
+        for slot in np.unique(triangle_slot):
+            primitive = {'attributes': attributes, 'mode': 4,
+                         'indices': self._accessor(triangles[triangle_slot == slot].ravel().astype(index_type),
+                                                   'SCALAR', ELEMENT_ARRAY_BUFFER)}
+            if 0 <= slot < len(materials):
+                primitive['material'] = materials[slot]
+            primitives.append(primitive)
+
+        self.stats['vertices'] += len(first)
+        self.stats['triangles'] += len(triangles)
+        meshes = self.gltf.setdefault('meshes', [])
+        meshes.append({'name': name, 'primitives': primitives})
+        return len(meshes) - 1
+
+    def _skin(self, geometry, model):
+        """Skin for a skinned geometry; inverse bind matrices map mesh space into each bone's bind space"""
+        key = (geometry, model)
+        if key in self.skins:
+            return self.skins[key]
+        clusters = [cluster for skin in self._linked(geometry, 'Deformer', 'Skin')
+                    for cluster in self._linked(skin, 'Deformer', 'Cluster')]
+        if not clusters:
+            return None
+        mesh_bind = self.conversion @ self.bind_pose.get(model, self.world[model])
+        joints, matrices = [], []
+        for cluster in clusters:
+            bones = self._linked(cluster, 'Model')
+            if not bones or bones[0] not in self.nodes:
+                raise ConversionError(f"Cluster {self.objects[cluster][1]!r} is not linked to a bone")
+            bone = bones[0]
+            found = self.clusters[cluster]
+            if found.transform_link is not None:
+                link = fbx_matrix(found.transform_link)
+            else:
+                link = self.bind_pose.get(bone, self.world[bone])
+            joints.append(self.nodes[bone])
+            matrices.append(np.linalg.inv(self.conversion @ link) @ mesh_bind)
+        skins = self.gltf.setdefault('skins', [])
+        skins.append({'name': self.objects[model][1], 'joints': joints,
+                      'inverseBindMatrices': self._accessor(np.array(matrices, dtype=np.float32), 'MAT4')})
+        self.skins[key] = len(skins) - 1
+        return self.skins[key]
+
+    # --- animation ---------------------------------------------------------
+
+    def _build_animations(self):
+        for stack, (kind, name, _, _) in self.objects.items():
+            if kind != 'AnimationStack':
+                continue
+            layers = self._linked(stack, 'AnimationLayer')
+            if not layers:
+                continue
+            animation = self._animation(name.split('|')[-1], layers[0])
+            if animation['channels']:
+                self.gltf.setdefault('animations', []).append(animation)
+
+    def _curves(self, layer):
+        """{model: {'translation'|'rotation'|'scale': (defaults, {axis: curve})}} for one layer"""
+        animated = defaultdict(dict)
+        for curve_node in self._linked(layer, 'AnimationCurveNode'):
+            defaults = properties70(self.objects[curve_node][3])
+            curves = {}
+            for curve, channel in self.property_links.get(curve_node, ()):
+                if channel and channel.startswith('d|') and curve in self.objects:
+                    node = self.objects[curve][3]
+                    times = node.find('KeyTime')
+                    values = node.find('KeyValueFloat')
+                    if times is not None and values is not None:
+                        curves[channel[2:].lower()] = (np.asarray(times.properties[0].numpy(), dtype=np.int64),
+                                                       np.asarray(values.properties[0].numpy(), dtype=np.float64))
+            for target, property_name in self.targets.get(curve_node, ()):
+                if target in self.nodes and property_name in ANIMATED_PROPERTIES and curves:
+                    animated[target][ANIMATED_PROPERTIES[property_name]] = (defaults, curves)
+        return animated
+
+    def _animation(self, name, layer):
+        animation = {'name': name, 'channels': [], 'samplers': []}
+        animated = self._curves(layer)
+        if not animated:
+            return animation
+        key_times = np.unique(np.concatenate([curve[0] for channels in animated.values()
+                                              for _, curves in channels.values() for curve in curves.values()]))
+        offset = min(int(key_times[0]), 0)
+        start, end = (key_times[0] - offset) / FBX_TICKS_PER_SECOND, (key_times[-1] - offset) / FBX_TICKS_PER_SECOND
+        inputs = {}
+        for model, channels in animated.items():
+            if self.sample_rate:
+                seconds = sample_times(start, end, self.sample_rate)
+            else:
+                seconds = (np.unique(np.concatenate([curve[0] for _, curves in channels.values()
+                                                     for curve in curves.values()])) - offset) / FBX_TICKS_PER_SECOND
+            ticks = seconds * FBX_TICKS_PER_SECOND + offset
+            props = self.model_props[model]
+            values = {}
+            for kind, (property_name, default) in (('translation', ('Lcl Translation', (0, 0, 0))),
+                                                   ('rotation', ('Lcl Rotation', (0, 0, 0))),
+                                                   ('scale', ('Lcl Scaling', (1, 1, 1)))):
+                static = _vector(props, property_name, default)
+                column = np.repeat(static[None, :], len(ticks), axis=0)
+                if kind in channels:
+                    defaults, curves = channels[kind]
+                    for k, axis in enumerate('xyz'):
+                        if axis in curves:
+                            times, keys = curves[axis]
+                            column[:, k] = np.interp(ticks, times, keys)
+                        elif f'd|{axis.upper()}' in defaults:
+                            column[:, k] = float(defaults[f'd|{axis.upper()}'][0])
+                values[kind] = column
+            matrices = local_matrices(props, values['translation'], values['rotation'], values['scale'])
+            if self.nodes[model] in self.gltf['scenes'][0]['nodes']:
+                matrices = self.conversion @ matrices
+            translation, rotation, scale = decompose_matrices(matrices)
+            rotation = continuous_quaternions(rotation)
+            node = self.gltf['nodes'][self.nodes[model]]
+            outputs = {'translation': (translation, node.get('translation', [0, 0, 0])),
+                       'rotation': (rotation, node.get('rotation', [0, 0, 0, 1])),
+                       'scale': (scale, node.get('scale', [1, 1, 1]))}
+            for path, (output, rest) in outputs.items():
+                difference = output - np.asarray(rest)
+                if path == 'rotation':
+                    difference = np.minimum(np.abs(difference), np.abs(output + np.asarray(rest)))
+                # Animated properties always get a channel; others only when
+                # pivots or pre-rotation make them move with an animated one
+                if path not in channels and np.all(np.abs(difference) <= REST_TOLERANCE):
+                    continue
+                input_key = seconds.tobytes()
+                if input_key not in inputs:
+                    inputs[input_key] = self._accessor(seconds.astype(np.float32), 'SCALAR', bounds=True)
+                animation['samplers'].append({'input': inputs[input_key], 'interpolation': 'LINEAR',
+                                              'output': self._accessor(output.astype(np.float32),
+                                                                       'VEC4' if path == 'rotation' else 'VEC3')})
+                animation['channels'].append({'sampler': len(animation['samplers']) - 1,
+                                              'target': {'node': self.nodes[model], 'path': path}})
+                self.stats['keys'] += len(seconds)
+        return animation
+
+    def convert(self):
+        """Return (gltf, bin_data)"""
+        gltf = dict(self.gltf)
+        data = self.packer.getvalue()
+        if data:
+            gltf['bufferViews'] = self.packer.views
+            gltf['buffers'] = [{'byteLength': len(data)}]
+        return gltf, data
+
+
+def default_output(path):
+    return os.path.splitext(path)[0] + '_converted.glb'
+
+
+def convert_fbx(path, output=None, animations=True, sample_rate=None, optimize=False):
+    """Convert one binary FBX file to GLB; returns a report dict"""
+    start = time.perf_counter()
+    output = output or default_output(path)
+    with open_fbx(path) as fbx:
+        converter = FBXConverter(fbx, animations, sample_rate)
+        gltf, data = converter.convert()
+    if optimize:
+        gltf, data = GLBOptimizer(gltf, GLTFAccessors(gltf, data)).optimize()
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    output_bytes = write_glb(output, gltf, data if data else None)
+    return dict(converter.stats, **{
+        'path': path,
+        'output': output,
+        'input_bytes': os.path.getsize(path),
+        'output_bytes': output_bytes,
+        'nodes': len(gltf['nodes']),
+        'meshes': len(gltf.get('meshes', [])),
+        'skins': len(gltf.get('skins', [])),
+        'joints': sum(len(skin['joints']) for skin in gltf.get('skins', [])),
+        'animations': len(gltf.get('animations', [])),
+        'channels': sum(len(animation['channels']) for animation in gltf.get('animations', [])),
+        'seconds': time.perf_counter() - start,
+    })
+
+
+def convert_asset(path, output=None, **options):
+    """convert_fbx for batch use; never raises so one bad file cannot stop a batch"""
+    try:
+        return dict(convert_fbx(path, output, **options), ok=True)
+    except (OSError, ValueError, KeyError, IndexError) as e:
+        return {'path': path, 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+
+def run_conversion(paths, outputs, workers=None, **options):
+    """Yield convert_asset records for paths, fanned out over a process pool"""
+    workers = workers or os.cpu_count() or 1
+    task = functools.partial(convert_asset, **options)
+    if workers == 1 or len(paths) <= 1:
+        yield from map(task, paths, outputs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(task, paths, outputs)
+
+
+def print_convert_report(record):
+    print(f"  {record['nodes']} nodes, {record['meshes']} meshes ({record['vertices']:,} vertices, "
+          f"{record['triangles']:,} triangles), {record['skins']} skins ({record['joints']} joints), "
+          f"{record['animations']} animations ({record['channels']} channels, {record['keys']:,} keys)")
+    if record['truncated_influences']:
+        print(f"  Warning: {record['truncated_influences']} control points had more than "
+              f"{MAX_INFLUENCES} influences; the smallest were dropped")
+    if record['unweighted_vertices']:
+        print(f"  Warning: {record['unweighted_vertices']} skinned vertices have no weights")
+    if record['skipped_models']:
+        print(f"  Skipped {record['skipped_models']} light/camera models")
+    print(f"  Wrote {record['output']} ({record['output_bytes']:,} bytes from {record['input_bytes']:,}) "
+          f"in {record['seconds']:.2f}s")
+
+
+def main():
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert binary FBX characters to GLB without Blender")
+    parser.add_argument('paths', nargs='*', default=["human_model_sit_possition.fbx"],
+                        help="files, directories or glob patterns")
+    parser.add_argument('-o', '--output', help="output directory (default: <name>_converted.glb next to each file)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--sample-rate', type=float, default=None,
+                        help="resample animation curves at this many frames per second (default: key times)")
+    parser.add_argument('--no-animations', action='store_true', help="skip animation stacks")
+    parser.add_argument('--optimize', action='store_true', help="also quantize and pack with the GLB optimizer")
+    args = parser.parse_args()
+
+    paths = [path for path in find_assets(args.paths) if path.lower().endswith('.fbx')]
+    if not paths:
+        print("No FBX files found")
+        sys.exit(1)
+    outputs = [os.path.splitext(output)[0] + '.glb' if output else None
+               for output in output_paths(paths, args.output)]
+
+    failures = 0
+    for record in run_conversion(paths, outputs, args.workers, animations=not args.no_animations,
+                                 sample_rate=args.sample_rate, optimize=args.optimize):
+        print(f"=== {record['path']} ===")
+        if not record['ok']:
+            print(f"  Error: {record['error']}")
+            failures += 1
+            continue
+        print_convert_report(record)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+import numpy as np
+
+from animation_analysis import decode_animation, sample_animation, sample_times
+from bone_classifier import default_classifier
+from glb_reader import open_glb
+from gltf_accessors import glb_accessors
+
+
+class HierarchyError(ValueError):
+    """Raised when the node graph is not a forest (shared children or cycles)"""
+
+
+def quaternion_matrices(rotation):
+    """Convert (..., 4) xyzw unit quaternions into (..., 3, 3) rotation matrices"""
+    x, y, z, w = np.moveaxis(rotation, -1, 0)
+    xx, yy, zz = x * x, y * y, z * z
+    xy, xz, yz = x * y, x * z, y * z
+    wx, wy, wz = w * x, w * y, w * z
+    matrix = np.empty(rotation.shape[:-1] + (3, 3), dtype=np.float64)
+    matrix[..., 0, 0] = 1 - 2 * (yy + zz)
+    matrix[..., 0, 1] = 2 * (xy - wz)
+    matrix[..., 0, 2] = 2 * (xz + wy)
+    matrix[..., 1, 0] = 2 * (xy + wz)
+    matrix[..., 1, 1] = 1 - 2 * (xx + zz)
+    matrix[..., 1, 2] = 2 * (yz - wx)
+    matrix[..., 2, 0] = 2 * (xz - wy)
+    matrix[..., 2, 1] = 2 * (yz + wx)
+    matrix[..., 2, 2] = 1 - 2 * (xx + yy)
+    return matrix
+
+
+def matrix_quaternions(matrix):
+    """Convert (..., 3, 3) rotation matrices into (..., 4) xyzw unit quaternions
+
+    Each matrix uses the largest of w, x, y, z as the divisor (Shepperd's
+    method), which stays accurate near 180 degree rotations.
+    """
+    m = np.asarray(matrix, dtype=np.float64)
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+    # 4 * q_i * q for each choice of i in (w, x, y, z), components in xyzw order
+    squares = np.stack([1 + m00 + m11 + m22, 1 + m00 - m11 - m22,
+                        1 - m00 + m11 - m22, 1 - m00 - m11 + m22], axis=-1)
+    products = np.stack([
+        np.stack([m21 - m12, m02 - m20, m10 - m01, squares[..., 0]], axis=-1),
+        np.stack([squares[..., 1], m01 + m10, m02 + m20, m21 - m12], axis=-1),
+        np.stack([m01 + m10, squares[..., 2], m12 + m21, m02 - m20], axis=-1),
+        np.stack([m02 + m20, m12 + m21, squares[..., 3], m10 - m01], axis=-1),
+    ], axis=-2)
+    case = np.argmax(squares, axis=-1)[..., None, None]
+    chosen = np.take_along_axis(products, case, axis=-2)[..., 0, :]
+    divisor = 2 * np.sqrt(np.maximum(np.take_along_axis(squares, case[..., 0], axis=-1), 1e-300))
+    quaternion = chosen / divisor
+    return quaternion / np.linalg.norm(quaternion, axis=-1, keepdims=True)
+
+
+def decompose_matrices(matrix):
+    """Split (..., 4, 4) affine matrices without shear into translation, xyzw rotation and scale
+
+    A mirroring matrix gets a negative X scale.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    linear = matrix[..., :3, :3]
+    scale = np.linalg.norm(linear, axis=-2)
+    scale[..., 0] *= np.where(np.linalg.det(linear) < 0, -1.0, 1.0)
+    rotation = linear / np.where(scale == 0, 1.0, scale)[..., None, :]
+    return matrix[..., :3, 3].copy(), matrix_quaternions(rotation), scale
+
+
+def trs_matrices(translation, rotation, scale):
+    """Compose (..., 4, 4) local matrices from translation, rotation and scale arrays"""
+    matrix = np.zeros(translation.shape[:-1] + (4, 4), dtype=np.float64)
+    matrix[..., :3, :3] = quaternion_matrices(rotation) * scale[..., None, :]
+    matrix[..., :3, 3] = translation
+    matrix[..., 3, 3] = 1.0
+    return matrix
+
+
+class NodeHierarchy:
+    """Parent links and depth levels of a glTF node graph
+
+    The graph is ordered once: nodes are grouped by depth, so world
+    matrices for every node of a level can be computed with one batched
+    matrix product against the (already finished) parent level.
+    """
+
+    def __init__(self, gltf):
+        nodes = gltf.get('nodes', [])
+        self.count = len(nodes)
+        self.parents = np.full(self.count, -1, dtype=np.intp)
+        for i, node in enumerate(nodes):
+            for child in node.get('children', []):
+                if child >= self.count:
+                    raise HierarchyError(f"Node {i} has missing child {child}")
+                if self.parents[child] != -1:
+                    raise HierarchyError(f"Node {child} has more than one parent")
+                self.parents[child] = i
+
+        self.roots = np.flatnonzero(self.parents == -1)
+        self.depth = np.full(self.count, -1, dtype=np.intp)
+        self.depth[self.roots] = 0
+        level = self.roots
+        self.levels = []
+        while len(level):
+            children = np.flatnonzero(np.isin(self.parents, level))
+            if not len(children):
+                break
+            self.depth[children] = self.depth[self.parents[children]] + 1
+            self.levels.append(children)
+            level = children
+        if np.any(self.depth < 0):
+            raise HierarchyError("Node graph contains a cycle")
+
+        # Parents precede children; the depth sort is stable for ties
+        self.order = np.argsort(self.depth, kind='stable')
+
+    def world_matrices(self, local):
+        """Multiply (..., nodes, 4, 4) local matrices down the tree into world matrices"""
+        world = np.array(local, dtype=np.float64, copy=True)
+        for level in self.levels:
+            world[..., level, :, :] = world[..., self.parents[level], :, :] @ local[..., level, :, :]
+        return world
+
+
+class ForwardKinematics:
+    """Evaluate local, world and skinning matrices for a glTF document
+
+    The hierarchy, rest transforms and inverse bind matrices are decoded
+    once; each call then evaluates every node for every requested frame as
+    stacked (frames, nodes, 4, 4) arrays.
+    """
+
+    def __init__(self, gltf, accessors):
+        self.gltf = gltf
+        self.accessors = accessors
+        self.hierarchy = NodeHierarchy(gltf)
+
+        nodes = gltf.get('nodes', [])
+        count = len(nodes)
+        self.translation = np.zeros((count, 3))
+        self.rotation = np.tile([0.0, 0.0, 0.0, 1.0], (count, 1))
+        self.scale = np.ones((count, 3))
+        self.matrix_nodes = []
+        self._static = {}
+        for i, node in enumerate(nodes):
+            if 'matrix' in node:
+                # glTF stores matrices column-major
+                self._static[i] = np.array(node['matrix'], dtype=np.float64).reshape(4, 4).T
+                self.matrix_nodes.append(i)
+                continue
+            self.translation[i] = node.get('translation', (0.0, 0.0, 0.0))
+            self.rotation[i] = node.get('rotation', (0.0, 0.0, 0.0, 1.0))
+            self.scale[i] = node.get('scale', (1.0, 1.0, 1.0))
+        self._inverse_bind = {}
+
+    def frame_times(self, animation, rate=None):
+        """Times at which to evaluate an animation
+
+        With rate=None the union of all key times is used, otherwise an even
+        grid from the first to the last key.
+        """
+        channels = decode_animation(self.accessors, self.gltf['animations'][animation])
+        if not channels:
+            return np.zeros(1)
+        keys = np.unique(np.concatenate([channel['times'] for channel in channels]))
+        if rate is None:
+            return keys
+        return sample_times(keys[0], keys[-1], rate)
+
+    def local_transforms(self, animation=None, times=None, rate=None):
+        """Return (times, translation, rotation, scale) with a leading frame axis
+
+        Without an animation a single rest-pose frame is returned.
+        """
+        if animation is None:
+            times = np.zeros(1)
+            return times, self.translation[None], self.rotation[None], self.scale[None]
+
+        channels = decode_animation(self.accessors, self.gltf['animations'][animation])
+        if times is None:
+            times = self.frame_times(animation, rate)
+        times = np.asarray(times, dtype=np.float64)
+        frames = len(times)
+        trs = {
+            'translation': np.repeat(self.translation[None], frames, axis=0),
+            'rotation': np.repeat(self.rotation[None], frames, axis=0),
+            'scale': np.repeat(self.scale[None], frames, axis=0),
+        }
+        _, samples = sample_animation(channels, times=times)
+        for channel, values in zip(channels, samples):
+            target = trs.get(channel['path'])
+            node = channel['node']
+            # Morph weights do not move nodes; matrix nodes cannot be animated
+            if target is not None and node is not None and node not in self._static:
+                target[:, node] = values
+        return times, trs['translation'], trs['rotation'], trs['scale']
+
+    def local_matrices(self, animation=None, times=None, rate=None):
+        """Return (times, (frames, nodes, 4, 4) local matrices)"""
+        times, translation, rotation, scale = self.local_transforms(animation, times, rate)
+        local = trs_matrices(translation, rotation, scale)
+        for node, matrix in self._static.items():
+            local[:, node] = matrix
+        return times, local
+
+    def world_matrices(self, animation=None, times=None, rate=None):
+        """Return (times, (frames, nodes, 4, 4) local-to-world matrices)"""
+        times, local = self.local_matrices(animation, times, rate)
+        return times, self.hierarchy.world_matrices(local)
+
+    def inverse_bind_matrices(self, skin):
+        """(joints, 4, 4) inverse bind matrices of a skin (identity when omitted)"""
+        if skin not in self._inverse_bind:
+            info = self.gltf['skins'][skin]
+            joints = len(info.get('joints', []))
+            if 'inverseBindMatrices' in info:
+                matrices = np.asarray(self.accessors.read(info['inverseBindMatrices']), dtype=np.float64)
+                if len(matrices) < joints:
+                    raise HierarchyError(f"Skin {skin} has fewer inverse bind matrices than joints")
+                matrices = matrices[:joints]
+            else:
+                matrices = np.broadcast_to(np.eye(4), (joints, 4, 4))
+            self._inverse_bind[skin] = matrices
+        return self._inverse_bind[skin]
+
+    def skin_matrices(self, skin, world):
+        """(frames, joints, 4, 4) skinning matrices: joint world matrix x inverse bind matrix"""
+        joints = np.asarray(self.gltf['skins'][skin].get('joints', []), dtype=np.intp)
+        return world[:, joints] @ self.inverse_bind_matrices(skin)
+
+
+def bind_pose_error(kinematics, skin):
+    """Largest deviation of the rest-pose skinning matrices from identity
+
+    Zero means the node rest transforms reproduce the bind pose stored in
+    the inverse bind matrices.
+    """
+    _, world = kinematics.world_matrices()
+    matrices = kinematics.skin_matrices(skin, world)
+    return float(np.abs(matrices - np.eye(4)).max()) if matrices.size else 0.0
+
+
+def analyze_poses(gltf, accessors, rate=None):
+    """Per-animation joint positions for pose validation
+
+    Returns a list of dicts with the frame count, world-space joint bounds
+    and the height range of the humanoid hips/head/feet joints.
+    """
+    kinematics = ForwardKinematics(gltf, accessors)
+    nodes = gltf.get('nodes', [])
+    names = [node.get('name', '') for node in nodes]
+    humanoid = default_classifier.humanoid_map(names)
+    landmarks = {slot: names.index(humanoid[slot])
+                 for slot in ('hips', 'head', 'leftFoot', 'rightFoot') if slot in humanoid}
+    joints = sorted({joint for skin in gltf.get('skins', []) for joint in skin.get('joints', [])})
+
+    report = []
+    for i, animation in enumerate(gltf.get('animations', [])):
+        times, world = kinematics.world_matrices(i, rate=rate)
+        positions = world[:, joints, :3, 3]
+        result = {
+            'animation': i,
+            'name': animation.get('name', ''),
+            'frames': len(times),
+            'joint_min': positions.min(axis=(0, 1)).tolist() if joints else None,
+            'joint_max': positions.max(axis=(0, 1)).tolist() if joints else None,
+            'landmarks': {slot: [float(world[:, node, 1, 3].min()), float(world[:, node, 1, 3].max())]
+                          for slot, node in landmarks.items()},
+        }
+        report.append(result)
+    skins = [{'skin': i, 'name': skin.get('name', ''), 'bind_pose_error': bind_pose_error(kinematics, i)}
+             for i, skin in enumerate(gltf.get('skins', []))]
+    return {'skins': skins, 'animations': report}
+
+
+def print_pose_report(report):
+    """Print a human-readable summary of analyze_poses output"""
+    for skin in report['skins']:
+        status = "✓" if skin['bind_pose_error'] < 1e-3 else "✗"
+        print(f"{status} Skin {skin['skin']} ({skin['name']}): rest pose deviates from bind pose "
+              f"by {skin['bind_pose_error']:.6f}")
+    for result in report['animations']:
+        print(f"Animation {result['animation']} ({result['name']}): {result['frames']} frame(s)")
+        if result['joint_min'] is not None:
+            low = ', '.join(f"{value:.3f}" for value in result['joint_min'])
+            high = ', '.join(f"{value:.3f}" for value in result['joint_max'])
+            print(f"    Joint bounds: ({low}) .. ({high})")
+        for slot, (low, high) in result['landmarks'].items():
+            print(f"    {slot} height: {low:.3f} .. {high:.3f}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Evaluate node world matrices for every animation frame")
+    parser.add_argument('paths', nargs='*', default=["human_model_sit_possition_002.glb"])
+    parser.add_argument('--rate', type=float, default=None,
+                        help="evaluate at this many frames per second instead of at the key times")
+    args = parser.parse_args()
+
+    for glb_path in args.paths:
+        print(f"=== Forward Kinematics: {glb_path} ===")
+        with open_glb(glb_path) as glb:
+            print_pose_report(analyze_poses(glb.gltf, glb_accessors(glb), args.rate))
+        print()
+
+
+if __name__ == "__main__":
+    main()
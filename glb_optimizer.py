@@ -0,0 +1,780 @@
+import os
+import copy
+import json
+import hashlib
+
+import numpy as np
+
+from glb_reader import open_glb, write_glb
+from gltf_accessors import COMPONENT_DTYPES, MATRIX_SIZES, element_size, glb_accessors, normalize_array
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+QUANTIZATION_EXTENSION = 'KHR_mesh_quantization'
+
+# Extensions that keep geometry outside plain accessors or attach accessors
+# to nodes; documents using them are refused rather than rewritten wrongly
+UNSUPPORTED_EXTENSIONS = ('KHR_draco_mesh_compression', 'EXT_meshopt_compression', 'EXT_mesh_gpu_instancing')
+
+# Quantization grid of POSITION (bits per axis, stored as UNSIGNED_SHORT) and
+# storage size (8 or 16 bits) of normalized NORMAL, TEXCOORD_n and WEIGHTS_n
+DEFAULT_BITS = {'position': 14, 'normal': 8, 'texcoord': 16, 'weights': 8}
+
+# Top-level arrays rebuilt by the optimizer; everything else is copied as-is
+COLLECTIONS = ('scenes', 'nodes', 'meshes', 'skins', 'cameras', 'materials', 'textures',
+               'images', 'samplers', 'animations', 'accessors', 'bufferViews', 'buffers')
+
+COMPONENT_TYPES = {dtype: code for code, dtype in COMPONENT_DTYPES.items()}
+
+
+class OptimizerError(ValueError):
+    """Raised when a document uses features the optimizer cannot rewrite"""
+
+
+def _texture_refs(value):
+    """Yield every texture index referenced from a material (including extensions)"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key.endswith('Texture') and isinstance(item, dict) and 'index' in item:
+                yield item['index']
+            yield from _texture_refs(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _texture_refs(item)
+
+
+def _remap_textures(value, textures):
+    """Deep copy of a material with texture indices renumbered"""
+    if isinstance(value, dict):
+        result = {key: _remap_textures(item, textures) for key, item in value.items()}
+        for key, item in result.items():
+            if key.endswith('Texture') and isinstance(item, dict) and 'index' in item:
+                item['index'] = textures[item['index']]
+        return result
+    if isinstance(value, list):
+        return [_remap_textures(item, textures) for item in value]
+    return value
+
+
+def _image_refs(texture):
+    """Image indices of a texture, including KHR_texture_basisu/EXT_texture_webp sources"""
+    sources = [texture['source']] if 'source' in texture else []
+    for extension in texture.get('extensions', {}).values():
+        if isinstance(extension, dict) and 'source' in extension:
+            sources.append(extension['source'])
+    return sources
+
+
+def lod_nodes(node):
+    """Lower-detail alternatives listed in a node's MSFT_lod extension"""
+    return node.get('extensions', {}).get('MSFT_lod', {}).get('ids', [])
+
+
+def referenced_objects(gltf):
+    """Indices of the nodes, meshes, skins, materials, ... reachable from the scenes
+
+    A node is kept when it is in a scene's hierarchy, is a joint/skeleton
+    of a skin used there or is an MSFT_lod level of a kept node; parents of kept nodes are kept so their world
+    transforms do not change.  Without scenes every node counts as used.
+    Returns a dict of collection name -> sorted list of indices.
+    """
+    nodes = gltf.get('nodes', [])
+    skins = gltf.get('skins', [])
+    if gltf.get('scenes'):
+        parents = {child: i for i, node in enumerate(nodes) for child in node.get('children', [])}
+        keep = set()
+        stack = [root for scene in gltf['scenes'] for root in scene.get('nodes', [])]
+        while stack:
+            i = stack.pop()
+            if i in keep:
+                continue
+            keep.add(i)
+            node = nodes[i]
+            stack.extend(node.get('children', []))
+            stack.extend(lod_nodes(node))
+            if i in parents:
+                stack.append(parents[i])
+            if 'skin' in node:
+                skin = skins[node['skin']]
+                stack.extend(skin.get('joints', []))
+                if 'skeleton' in skin:
+                    stack.append(skin['skeleton'])
+    else:
+        keep = set(range(len(nodes)))
+
+    used = {'nodes': keep}
+    for key, collection in (('mesh', 'meshes'), ('skin', 'skins'), ('camera', 'cameras')):
+        used[collection] = {nodes[i][key] for i in keep if key in nodes[i]}
+
+    meshes = gltf.get('meshes', [])
+    used['materials'] = {primitive['material'] for mesh in used['meshes']
+                         for primitive in meshes[mesh]['primitives'] if 'material' in primitive}
+    materials = gltf.get('materials', [])
+    used['textures'] = {texture for material in used['materials'] for texture in _texture_refs(materials[material])}
+    textures = gltf.get('textures', [])
+    used['images'] = {image for texture in used['textures'] for image in _image_refs(textures[texture])}
+    used['samplers'] = {textures[texture]['sampler'] for texture in used['textures']
+                        if 'sampler' in textures[texture]}
+    return {collection: sorted(indices) for collection, indices in used.items()}
+
+
+def all_objects(gltf):
+    """Same shape as referenced_objects() but keeping everything"""
+    return {collection: list(range(len(gltf.get(collection, []))))
+            for collection in ('nodes', 'meshes', 'skins', 'cameras', 'materials', 'textures', 'images', 'samplers')}
+
+
+def pack_elements(array, accessor_type, stride=None):
+    """Serialize decoded accessor elements into glTF's packed layout
+
+    Matrices are written column-major with 4-byte column padding; with a
+    `stride` larger than the element each element is zero-padded to it.
+    """
+    array = np.asarray(array)
+    dtype = array.dtype.newbyteorder('<')
+    count = len(array)
+    if accessor_type in MATRIX_SIZES:
+        size = MATRIX_SIZES[accessor_type]
+        rows = element_size(accessor_type, dtype) // (size * dtype.itemsize)
+        columns = np.zeros((count, size, rows), dtype=dtype)
+        columns[:, :, :size] = array.transpose(0, 2, 1)
+        array = columns
+    array = array.reshape(count, -1)
+    if stride and stride > array.shape[1] * dtype.itemsize:
+        padded = np.zeros((count, stride // dtype.itemsize), dtype=dtype)
+        padded[:, :array.shape[1]] = array
+        array = padded
+    return np.ascontiguousarray(array, dtype=dtype).tobytes()
+
+
+def vertex_stride(accessor_type, dtype):
+    """Byte stride of a vertex attribute: elements start on 4-byte boundaries"""
+    return (element_size(accessor_type, dtype) + 3) & ~3
+
+
+class BufferPacker:
+    """Append bufferViews to a single tightly packed BIN buffer
+
+    Views are 4-byte aligned; a view whose bytes, stride and target match an
+    earlier one is shared instead of being stored again.
+    """
+
+    def __init__(self):
+        self.views = []
+        self.size = 0
+        self.shared = 0
+        self.shared_bytes = 0
+        self._parts = []
+        self._index = {}
+
+    def add(self, data, stride=None, target=None):
+        """Store `data` and return the index of its bufferView"""
+        data = bytes(data)
+        key = (hashlib.blake2b(data, digest_size=16).digest(), len(data), stride, target)
+        if key in self._index:
+            self.shared += 1
+            self.shared_bytes += len(data)
+            return self._index[key]
+
+        padding = -self.size % 4
+        if padding:
+            self._parts.append(b'\x00' * padding)
+            self.size += padding
+        view = {'buffer': 0, 'byteOffset': self.size, 'byteLength': len(data)}
+        if stride:
+            view['byteStride'] = stride
+        if target:
+            view['target'] = target
+        self._parts.append(data)
+        self.size += len(data)
+        self.views.append(view)
+        self._index[key] = len(self.views) - 1
+        return self._index[key]
+
+    def getvalue(self):
+        return b''.join(self._parts)
+
+
+class GLBOptimizer:
+    """Rebuild a glTF document into a compact single-buffer GLB payload
+
+    Every referenced accessor is re-encoded into its own tightly packed
+    bufferView (interleaved and strided sources are de-interleaved), identical
+    views and accessors are stored once, and objects the scenes never reach
+    are dropped.  With quantization enabled, float attributes are stored as
+    KHR_mesh_quantization integers:
+
+    - POSITION on a grid of `bits['position']` bits per axis; the uniform
+      dequantization transform is folded into the skin's inverse bind
+      matrices for skinned meshes and into a new child node otherwise
+    - NORMAL as normalized BYTE/SHORT, TEXCOORD_n in [0, 1] as normalized
+      UNSIGNED_BYTE/SHORT
+    - WEIGHTS_n as normalized UNSIGNED_BYTE/SHORT summing exactly to one
+    - JOINTS_n and indices narrowed to the smallest type that holds them
+
+    `replacements` maps accessor indices to new raw arrays (same component
+    and element type) that are written instead of the stored data, which
+    lets other passes rewrite geometry through the same packer.
+    """
+
+    def __init__(self, gltf, accessors, quantize=True, bits=None, prune=True, replacements=None):
+        for extension in UNSUPPORTED_EXTENSIONS:
+            if extension in gltf.get('extensionsUsed', []):
+                raise OptimizerError(f"Documents using {extension} are not supported")
+        self.gltf = gltf
+        self.accessors = accessors
+        self.quantize = quantize
+        self.bits = dict(DEFAULT_BITS, **(bits or {}))
+        if not 1 <= self.bits['position'] <= 16:
+            raise OptimizerError("Position bits must be between 1 and 16")
+        for kind in ('normal', 'texcoord', 'weights'):
+            if self.bits[kind] not in (8, 16):
+                raise OptimizerError(f"{kind.capitalize()} bits must be 8 or 16")
+        self.replacements = replacements or {}
+        self.used = referenced_objects(gltf) if prune else all_objects(gltf)
+        self.maps = {collection: {old: new for new, old in enumerate(indices)}
+                     for collection, indices in self.used.items()}
+
+        self.packer = BufferPacker()
+        self.accessor_list = []
+        self.shared_accessors = 0
+        self.quantized = {}
+        self.uses_quantization = False
+        self._accessor_index = {}
+        self._encoded = {}
+        self._vertex_accessors = {index for mesh in gltf.get('meshes', []) for primitive in mesh['primitives']
+                                  for attributes in [primitive['attributes']] + primitive.get('targets', [])
+                                  for index in attributes.values()}
+
+    # -- accessors ---------------------------------------------------------
+
+    def _add_accessor(self, accessor):
+        key = json.dumps(accessor, sort_keys=True)
+        if key in self._accessor_index:
+            self.shared_accessors += 1
+        else:
+            self.accessor_list.append(accessor)
+            self._accessor_index[key] = len(self.accessor_list) - 1
+        return self._accessor_index[key]
+
+    def read(self, index):
+        """Decode accessors[index], honouring replaced contents"""
+        if index not in self.replacements:
+            return self.accessors.read(index)
+        array = self.replacements[index]
+        return normalize_array(array) if self.gltf['accessors'][index].get('normalized') else array
+
+    def _pack(self, array, accessor_type, vertex, target):
+        stride = vertex_stride(accessor_type, array.dtype) if vertex else None
+        if stride == element_size(accessor_type, array.dtype):
+            stride = None
+        return self.packer.add(pack_elements(array, accessor_type, stride), stride, target)
+
+    def _view_data(self, view_index, byte_offset, count, accessor_type, dtype, vertex):
+        array = self.accessors._view_array(view_index, byte_offset, count, accessor_type, dtype)
+        return self._pack(array, accessor_type, vertex, self.gltf['bufferViews'][view_index].get('target'))
+
+    def copy_accessor(self, index):
+        """Re-encode accessors[index] unchanged into its own packed bufferView"""
+        if ('copy', index) in self._encoded:
+            return self._encoded['copy', index]
+        accessor = self.gltf['accessors'][index]
+        result = {key: value for key, value in accessor.items() if key not in ('bufferView', 'byteOffset', 'sparse')}
+        dtype = COMPONENT_DTYPES[accessor['componentType']]
+        vertex = index in self._vertex_accessors
+        if index in self.replacements:
+            array = np.asarray(self.replacements[index], dtype=dtype)
+            target = ARRAY_BUFFER if vertex else None
+            if not vertex and 'bufferView' in accessor:
+                target = self.gltf['bufferViews'][accessor['bufferView']].get('target')
+            result['count'] = len(array)
+            if 'min' in result and len(array):
+                # Permuted or rewritten data can have different bounds
+                result['min'] = array.reshape(len(array), -1).min(axis=0).tolist()
+                result['max'] = array.reshape(len(array), -1).max(axis=0).tolist()
+            result['bufferView'] = self._pack(array, accessor['type'], vertex, target)
+            self._encoded['copy', index] = self._add_accessor(result)
+            return self._encoded['copy', index]
+        if 'bufferView' in accessor:
+            result['bufferView'] = self._view_data(accessor['bufferView'], accessor.get('byteOffset', 0),
+                                                   accessor['count'], accessor['type'], dtype, vertex)
+        sparse = accessor.get('sparse')
+        if sparse:
+            indices, values = sparse['indices'], sparse['values']
+            index_dtype = COMPONENT_DTYPES[indices['componentType']]
+            result['sparse'] = {
+                'count': sparse['count'],
+                'indices': {'componentType': indices['componentType'],
+                            'bufferView': self._view_data(indices['bufferView'], indices.get('byteOffset', 0),
+                                                          sparse['count'], 'SCALAR', index_dtype, False)},
+                'values': {'bufferView': self._view_data(values['bufferView'], values.get('byteOffset', 0),
+                                                         sparse['count'], accessor['type'], dtype, False)},
+            }
+        self._encoded['copy', index] = self._add_accessor(result)
+        return self._encoded['copy', index]
+
+    def _store(self, kind, source, array, accessor_type, normalized=False, target=ARRAY_BUFFER, bounds=False):
+        """Add a new accessor holding `array` (already in its final component type)"""
+        accessor = self.gltf['accessors'][source]
+        dtype = array.dtype
+        stride = vertex_stride(accessor_type, dtype) if target == ARRAY_BUFFER else None
+        if stride == element_size(accessor_type, dtype):
+            stride = None
+        result = {'bufferView': self.packer.add(pack_elements(array, accessor_type, stride), stride, target),
+                  'componentType': COMPONENT_TYPES[dtype], 'count': len(array), 'type': accessor_type}
+        if normalized:
+            result['normalized'] = True
+        if bounds and len(array):
+            result['min'] = array.min(axis=0).tolist()
+            result['max'] = array.max(axis=0).tolist()
+        if 'name' in accessor:
+            result['name'] = accessor['name']
+
+        original = accessor['count'] * element_size(accessor['type'], COMPONENT_DTYPES[accessor['componentType']])
+        stats = self.quantized.setdefault(kind, [0, 0, 0])
+        stats[0] += 1
+        stats[1] += original
+        stats[2] += len(array) * (stride or element_size(accessor_type, dtype))
+        return self._add_accessor(result)
+
+    def _is_float(self, index):
+        accessor = self.gltf['accessors'][index]
+        return accessor['componentType'] == 5126 and 'sparse' not in accessor
+
+    def encode_position(self, index, transform):
+        key = ('position', index, transform)
+        if key not in self._encoded:
+            offset, scale = transform
+            limit = (1 << self.bits['position']) - 1
+            positions = np.asarray(self.read(index), dtype=np.float64)
+            quantized = np.clip(np.rint((positions - offset) / scale), 0, limit).astype(np.uint16)
+            self._encoded[key] = self._store('POSITION', index, quantized, 'VEC3', bounds=True)
+            self.uses_quantization = True
+        return self._encoded[key]
+
+    def encode_normal(self, index):
+        if not self._is_float(index):
+            return self.copy_accessor(index)
+        if ('normal', index) not in self._encoded:
+            normals = np.asarray(self.read(index), dtype=np.float64)
+            length = np.linalg.norm(normals, axis=1, keepdims=True)
+            normals = np.divide(normals, length, out=np.zeros_like(normals), where=length > 0)
+            dtype = np.dtype('<i1') if self.bits['normal'] == 8 else np.dtype('<i2')
+            self._encoded['normal', index] = self._store(
+                'NORMAL', index, np.rint(normals * np.iinfo(dtype).max).astype(dtype), 'VEC3', normalized=True)
+            self.uses_quantization = True
+        return self._encoded['normal', index]
+
+    def encode_texcoord(self, index):
+        if not self._is_float(index):
+            return self.copy_accessor(index)
+        if ('texcoord', index) not in self._encoded:
+            uv = np.asarray(self.read(index), dtype=np.float64)
+            # Normalized integers only cover [0, 1]; tiling UVs stay float
+            if uv.size and (uv.min() < 0 or uv.max() > 1):
+                self._encoded['texcoord', index] = self.copy_accessor(index)
+                return self._encoded['texcoord', index]
+            dtype = np.dtype('<u1') if self.bits['texcoord'] == 8 else np.dtype('<u2')
+            self._encoded['texcoord', index] = self._store(
+                'TEXCOORD', index, np.rint(uv * np.iinfo(dtype).max).astype(dtype), 'VEC2', normalized=True)
+            self.uses_quantization = True
+        return self._encoded['texcoord', index]
+
+    def encode_weights(self, indices):
+        """Quantize the WEIGHTS_n sets of one primitive together so each vertex sums exactly to one"""
+        key = ('weights', tuple(indices))
+        if key in self._encoded:
+            return self._encoded[key]
+        dtype = np.dtype('<u1') if self.bits['weights'] == 8 else np.dtype('<u2')
+        accessors = [self.gltf['accessors'][index] for index in indices]
+        if any('sparse' in accessor for accessor in accessors) or all(
+                COMPONENT_DTYPES[accessor['componentType']] == dtype for accessor in accessors):
+            self._encoded[key] = [self.copy_accessor(index) for index in indices]
+            return self._encoded[key]
+
+        weights = np.concatenate([np.asarray(self.read(index), dtype=np.float64) for index in indices], axis=1)
+        weights = np.maximum(weights, 0)
+        sums = weights.sum(axis=1, keepdims=True)
+        weights = np.divide(weights, sums, out=np.zeros_like(weights), where=sums > 0)
+        limit = np.iinfo(dtype).max
+        quantized = np.rint(weights * limit).astype(np.int64)
+        # Give the rounding error to each vertex's largest influence
+        rows = np.flatnonzero(sums[:, 0] > 0)
+        largest = quantized[rows].argmax(axis=1)
+        quantized[rows, largest] += limit - quantized[rows].sum(axis=1)
+        quantized = quantized.astype(dtype)
+
+        self._encoded[key] = [self._store('WEIGHTS', index, quantized[:, 4 * n:4 * n + 4], 'VEC4', normalized=True)
+                              for n, index in enumerate(indices)]
+        return self._encoded[key]
+
+    def encode_joints(self, index):
+        accessor = self.gltf['accessors'][index]
+        if accessor['componentType'] != 5123 or 'sparse' in accessor:
+            return self.copy_accessor(index)
+        if ('joints', index) not in self._encoded:
+            joints = self.read(index)
+            if joints.size and int(joints.max()) > 255:
+                self._encoded['joints', index] = self.copy_accessor(index)
+            else:
+                self._encoded['joints', index] = self._store('JOINTS', index, joints.astype(np.uint8), 'VEC4')
+        return self._encoded['joints', index]
+
+    def encode_indices(self, index):
+        accessor = self.gltf['accessors'][index]
+        if accessor['componentType'] != 5125 or 'sparse' in accessor:
+            return self.copy_accessor(index)
+        if ('indices', index) not in self._encoded:
+            indices = self.read(index)
+            # 65535 is the primitive restart value of 16-bit indices
+            if indices.size and int(indices.max()) >= 65535:
+                self._encoded['indices', index] = self.copy_accessor(index)
+            else:
+                self._encoded['indices', index] = self._store('indices', index, indices.astype(np.uint16), 'SCALAR',
+                                                          target=ELEMENT_ARRAY_BUFFER)
+        return self._encoded['indices', index]
+
+    # -- position dequantization -------------------------------------------
+
+    def _position_transform(self, meshes):
+        """Uniform (offset, scale) mapping the grid onto the bounds of all meshes' positions"""
+        low, high = [], []
+        for mesh in meshes:
+            for primitive in self.gltf['meshes'][mesh]['primitives']:
+                positions = self.read(primitive['attributes']['POSITION'])
+                if len(positions):
+                    low.append(positions.min(axis=0))
+                    high.append(positions.max(axis=0))
+        if not low:
+            return None
+        offset = np.min(low, axis=0).astype(np.float64)
+        extent = float((np.max(high, axis=0) - offset).max())
+        scale = extent / ((1 << self.bits['position']) - 1) if extent > 0 else 1.0
+        return tuple(offset.tolist()), scale
+
+    def plan_positions(self):
+        """Decide the dequantization transform of every mesh whose positions can be quantized
+
+        Returns (mesh -> transform, skin -> transform).  Meshes with morph
+        targets, non-float positions, or used both skinned and unskinned (or
+        with several skins) keep float positions; a skin is only adjusted
+        when every mesh bound to it can be quantized.
+        """
+        nodes = self.gltf.get('nodes', [])
+        usage = {}
+        # Static LOD meshes cannot move to a child node: loaders swap the mesh of the listed nodes
+        pinned = set()
+        for i in self.used['nodes']:
+            if 'mesh' in nodes[i]:
+                usage.setdefault(nodes[i]['mesh'], set()).add(nodes[i].get('skin'))
+            for node in [i] + lod_nodes(nodes[i]):
+                if lod_nodes(nodes[i]) and 'mesh' in nodes[node] and 'skin' not in nodes[node]:
+                    pinned.add(nodes[node]['mesh'])
+
+        def eligible(mesh):
+            primitives = self.gltf['meshes'][mesh]['primitives']
+            return mesh not in pinned and len(usage[mesh]) == 1 and all(
+                'POSITION' in p['attributes'] and self._is_float(p['attributes']['POSITION'])
+                and not p.get('targets') for p in primitives)
+
+        mesh_transforms, skin_transforms = {}, {}
+        groups = {}
+        for mesh, skins in usage.items():
+            for skin in skins:
+                groups.setdefault(skin, []).append(mesh)
+        for skin, meshes in groups.items():
+            if skin is None:
+                for mesh in meshes:
+                    if eligible(mesh):
+                        mesh_transforms[mesh] = self._position_transform([mesh])
+            elif all(eligible(mesh) for mesh in meshes):
+                transform = self._position_transform(meshes)
+                skin_transforms[skin] = transform
+                for mesh in meshes:
+                    mesh_transforms[mesh] = transform
+        return ({mesh: transform for mesh, transform in mesh_transforms.items() if transform},
+                {skin: transform for skin, transform in skin_transforms.items() if transform})
+
+    # -- document ------------------------------------------------------------
+
+    def _primitive(self, primitive, transform):
+        result = {key: value for key, value in primitive.items() if key not in ('attributes', 'indices', 'targets')}
+        attributes = primitive['attributes']
+        encoded = {}
+        weight_sets = sorted(name for name in attributes if name.startswith('WEIGHTS_'))
+        if self.quantize and weight_sets:
+            for name, index in zip(weight_sets, self.encode_weights([attributes[name] for name in weight_sets])):
+                encoded[name] = index
+        for name, index in attributes.items():
+            if name in encoded:
+                continue
+            if not self.quantize:
+                encoded[name] = self.copy_accessor(index)
+            elif name == 'POSITION' and transform is not None:
+                encoded[name] = self.encode_position(index, transform)
+            elif name == 'NORMAL':
+                encoded[name] = self.encode_normal(index)
+            elif name.startswith('TEXCOORD_'):
+                encoded[name] = self.encode_texcoord(index)
+            elif name.startswith('JOINTS_'):
+                encoded[name] = self.encode_joints(index)
+            else:
+                encoded[name] = self.copy_accessor(index)
+        result['attributes'] = encoded
+        if 'indices' in primitive:
+            result['indices'] = (self.encode_indices(primitive['indices']) if self.quantize
+                                 else self.copy_accessor(primitive['indices']))
+        if primitive.get('targets'):
+            result['targets'] = [{name: self.copy_accessor(index) for name, index in target.items()}
+                                 for target in primitive['targets']]
+        if 'material' in primitive:
+            result['material'] = self.maps['materials'][primitive['material']]
+        return result
+
+    def _skin(self, index, transform):
+        skin = self.gltf['skins'][index]
+        joints = skin.get('joints', [])
+        result = dict(skin, joints=[self.maps['nodes'][joint] for joint in joints])
+        if 'skeleton' in skin:
+            result['skeleton'] = self.maps['nodes'][skin['skeleton']]
+        if transform is None:
+            if 'inverseBindMatrices' in skin:
+                result['inverseBindMatrices'] = self.copy_accessor(skin['inverseBindMatrices'])
+            return result
+
+        offset, scale = transform
+        dequantize = np.diag([scale, scale, scale, 1.0])
+        dequantize[:3, 3] = offset
+        if 'inverseBindMatrices' in skin:
+            source = skin['inverseBindMatrices']
+            matrices = np.asarray(self.read(source), dtype=np.float64)[:len(joints)]
+        else:
+            source = None
+            matrices = np.broadcast_to(np.eye(4), (len(joints), 4, 4))
+        matrices = (matrices @ dequantize).astype(np.float32)
+        accessor = {'bufferView': self.packer.add(pack_elements(matrices, 'MAT4')),
+                    'componentType': 5126, 'count': len(matrices), 'type': 'MAT4'}
+        if source is not None and 'name' in self.gltf['accessors'][source]:
+            accessor['name'] = self.gltf['accessors'][source]['name']
+        result['inverseBindMatrices'] = self._add_accessor(accessor)
+        return result
+
+    def _animation(self, animation):
+        channels = []
+        samplers = {}
+        for channel in animation.get('channels', []):
+            target = dict(channel['target'])
+            if 'node' in target:
+                if target['node'] not in self.maps['nodes']:
+                    continue
+                target['node'] = self.maps['nodes'][target['node']]
+            samplers.setdefault(channel['sampler'], len(samplers))
+            channels.append(dict(channel, sampler=samplers[channel['sampler']], target=target))
+        if not channels:
+            return None
+        result = dict(animation, channels=channels, samplers=[])
+        for old in samplers:
+            sampler = animation['samplers'][old]
+            result['samplers'].append(dict(sampler, input=self.copy_accessor(sampler['input']),
+                                           output=self.copy_accessor(sampler['output'])))
+        return result
+
+    def optimize(self):
+        """Return (gltf, bin_bytes) of the optimized document"""
+        gltf = self.gltf
+        mesh_transforms, skin_transforms = self.plan_positions() if self.quantize else ({}, {})
+        nodes_map = self.maps['nodes']
+        document = {key: value for key, value in gltf.items() if key not in COLLECTIONS}
+
+        if 'scenes' in gltf:
+            document['scenes'] = [dict(scene, nodes=[nodes_map[node] for node in scene.get('nodes', [])])
+                                  for scene in gltf['scenes']]
+
+        nodes = []
+        mesh_nodes = []
+        for old in self.used['nodes']:
+            node = dict(gltf['nodes'][old])
+            if 'children' in node:
+                node['children'] = [nodes_map[child] for child in node['children']]
+            for key, collection in (('mesh', 'meshes'), ('skin', 'skins'), ('camera', 'cameras')):
+                if key in node:
+                    node[key] = self.maps[collection][node[key]]
+            if lod_nodes(node):
+                node['extensions'] = copy.deepcopy(node['extensions'])
+                node['extensions']['MSFT_lod']['ids'] = [nodes_map[lod] for lod in lod_nodes(node) if lod in nodes_map]
+            mesh = gltf['nodes'][old].get('mesh')
+            if mesh in mesh_transforms and 'skin' not in node:
+                mesh_nodes.append((node, mesh))
+            nodes.append(node)
+        # Unskinned quantized meshes move to a child node carrying the dequantization
+        for node, mesh in mesh_nodes:
+            offset, scale = mesh_transforms[mesh]
+            child = {'mesh': node.pop('mesh'), 'translation': list(offset), 'scale': [scale] * 3}
+            if 'name' in node:
+                child['name'] = f"{node['name']}_mesh"
+            node.setdefault('children', []).append(len(nodes))
+            nodes.append(child)
+        if nodes or 'nodes' in gltf:
+            document['nodes'] = nodes
+
+        if self.used['meshes']:
+            document['meshes'] = [
+                dict(gltf['meshes'][old], primitives=[self._primitive(primitive, mesh_transforms.get(old))
+                                                      for primitive in gltf['meshes'][old]['primitives']])
+                for old in self.used['meshes']]
+        if self.used['skins']:
+            document['skins'] = [self._skin(old, skin_transforms.get(old)) for old in self.used['skins']]
+        if self.used['cameras']:
+            document['cameras'] = [gltf['cameras'][old] for old in self.used['cameras']]
+        if self.used['materials']:
+            document['materials'] = [_remap_textures(gltf['materials'][old], self.maps['textures'])
+                                     for old in self.used['materials']]
+        if self.used['textures']:
+            textures = []
+            for old in self.used['textures']:
+                texture = copy.deepcopy(gltf['textures'][old])
+                if 'source' in texture:
+                    texture['source'] = self.maps['images'][texture['source']]
+                if 'sampler' in texture:
+                    texture['sampler'] = self.maps['samplers'][texture['sampler']]
+                for extension in texture.get('extensions', {}).values():
+                    if isinstance(extension, dict) and 'source' in extension:
+                        extension['source'] = self.maps['images'][extension['source']]
+                textures.append(texture)
+            document['textures'] = textures
+        if self.used['images']:
+            images = []
+            for old in self.used['images']:
+                image = dict(gltf['images'][old])
+                if 'bufferView' in image:
+                    view = gltf['bufferViews'][image['bufferView']]
+                    data = self.accessors.buffer(view['buffer'])
+                    start = view.get('byteOffset', 0)
+                    image['bufferView'] = self.packer.add(data[start:start + view['byteLength']])
+                images.append(image)
+            document['images'] = images
+        if self.used['samplers']:
+            document['samplers'] = [gltf['samplers'][old] for old in self.used['samplers']]
+
+        animations = [animation for animation in (self._animation(animation) for animation in gltf.get('animations', []))
+                      if animation is not None]
+        if animations:
+            document['animations'] = animations
+
+        if self.accessor_list:
+            document['accessors'] = self.accessor_list
+        if self.packer.views:
+            document['bufferViews'] = self.packer.views
+            document['buffers'] = [{'byteLength': self.packer.size}]
+
+        if self.uses_quantization:
+            for key in ('extensionsUsed', 'extensionsRequired'):
+                extensions = document.setdefault(key, [])
+                if QUANTIZATION_EXTENSION not in extensions:
+                    document[key] = extensions + [QUANTIZATION_EXTENSION]
+        return document, self.packer.getvalue()
+
+    def removed(self):
+        """Number of objects dropped per collection"""
+        counts = {collection: len(self.gltf.get(collection, [])) - len(indices)
+                  for collection, indices in self.used.items()}
+        return {collection: count for collection, count in counts.items() if count}
+
+
+def default_output(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}_optimized{ext or '.glb'}"
+
+
+def write_optimized(glb, optimizer, output):
+    """Write an optimizer's document for an open GLBFile to `output`
+
+    Returns a report dict with input/output sizes (total, JSON and BIN),
+    removed object counts, shared bufferViews/accessors and per-attribute
+    quantization statistics.
+    """
+    document, data = optimizer.optimize()
+    bin_before = len(glb.bin_chunk) if glb.bin_chunk is not None else 0
+    output_bytes = write_glb(output, document, data if data else None)
+    bin_after = len(data) + (-len(data) % 4)
+    json_after = output_bytes - 20 - (bin_after + 8 if data else 0)
+
+    return {
+        'path': glb.path,
+        'output': output,
+        'input_bytes': glb.length,
+        'output_bytes': output_bytes,
+        'saved_bytes': glb.length - output_bytes,
+        'json_bytes': (len(glb.json_chunk), json_after),
+        'bin_bytes': (bin_before, bin_after),
+        'removed': optimizer.removed(),
+        'shared_views': optimizer.packer.shared,
+        'shared_view_bytes': optimizer.packer.shared_bytes,
+        'shared_accessors': optimizer.shared_accessors,
+        'quantized': {kind: {'accessors': stats[0], 'bytes_before': stats[1], 'bytes_after': stats[2]}
+                      for kind, stats in optimizer.quantized.items()},
+    }
+
+
+def optimize_glb(path, output=None, quantize=True, bits=None, prune=True):
+    """Optimize one GLB and write it to `output` (see write_optimized for the report)"""
+    with open_glb(path) as glb:
+        optimizer = GLBOptimizer(glb.gltf, glb_accessors(glb), quantize, bits, prune)
+        return write_optimized(glb, optimizer, output or default_output(path))
+
+
+def print_optimize_report(report):
+    """Print a human-readable summary of optimize_glb output"""
+    before, after = report['input_bytes'], report['output_bytes']
+    percent = 100.0 * report['saved_bytes'] / before if before else 0.0
+    print(f"Size: {before:,} -> {after:,} bytes (saved {report['saved_bytes']:,}, {percent:.1f}%)")
+    print(f"    JSON: {report['json_bytes'][0]:,} -> {report['json_bytes'][1]:,} bytes, "
+          f"BIN: {report['bin_bytes'][0]:,} -> {report['bin_bytes'][1]:,} bytes")
+    if report['removed']:
+        print("Removed unused: " + ', '.join(f"{count} {collection}"
+                                             for collection, count in report['removed'].items()))
+    else:
+        print("Removed unused: nothing")
+    print(f"Deduplicated: {report['shared_views']} bufferView(s) ({report['shared_view_bytes']:,} bytes), "
+          f"{report['shared_accessors']} accessor(s)")
+    for kind, stats in report['quantized'].items():
+        print(f"Quantized {kind}: {stats['accessors']} accessor(s), "
+              f"{stats['bytes_before']:,} -> {stats['bytes_after']:,} bytes")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Deduplicate, prune, quantize and repack GLB files")
+    parser.add_argument('paths', nargs='*', default=["human_model_sit_possition_002.glb"])
+    parser.add_argument('-o', '--output', help="output file (single input) or directory")
+    parser.add_argument('--no-quantize', action='store_true', help="keep attribute types unchanged")
+    parser.add_argument('--keep-unused', action='store_true', help="keep objects no scene references")
+    parser.add_argument('--position-bits', type=int, default=DEFAULT_BITS['position'])
+    parser.add_argument('--normal-bits', type=int, choices=(8, 16), default=DEFAULT_BITS['normal'])
+    parser.add_argument('--texcoord-bits', type=int, choices=(8, 16), default=DEFAULT_BITS['texcoord'])
+    parser.add_argument('--weight-bits', type=int, choices=(8, 16), default=DEFAULT_BITS['weights'])
+    args = parser.parse_args()
+
+    bits = {'position': args.position_bits, 'normal': args.normal_bits,
+            'texcoord': args.texcoord_bits, 'weights': args.weight_bits}
+    if args.output and len(args.paths) > 1 and not os.path.isdir(args.output):
+        parser.error("--output must be a directory when optimizing several files")
+
+    for path in args.paths:
+        output = args.output
+        if output and os.path.isdir(output):
+            output = os.path.join(output, os.path.basename(path))
+        print(f"=== GLB Optimizer: {path} ===")
+        try:
+            report = optimize_glb(path, output, not args.no_quantize, bits, not args.keep_unused)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}\n")
+            continue
+        print_optimize_report(report)
+        print(f"Wrote {report['output']}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import os
+import json
+import mmap
+import struct
+
+GLB_MAGIC = b'glTF'
+GLB_HEADER = struct.Struct('<4sII')
+CHUNK_HEADER = struct.Struct('<I4s')
+
+CHUNK_JSON = b'JSON'
+CHUNK_BIN = b'BIN\x00'
+
+
+class GLBError(ValueError):
+    """Raised when a file is not a well-formed GLB container"""
+
+
+class GLBFile:
+    """Memory-mapped, zero-copy view over a binary glTF (GLB) container
+
+    The file is mapped once; the JSON and BIN chunks are exposed as
+    memoryview slices of the mapping, so nothing is copied until a caller
+    asks for it.  Use as a context manager or call close() when done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.version = None
+        self.length = None
+        self.chunks = []
+        self._file = None
+        self._mmap = None
+        self._view = None
+        self._json = None
+
+        self._file = open(path, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < GLB_HEADER.size:
+                raise GLBError(f"File too small for a GLB header: {size} bytes")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+            self._parse(size)
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self, size):
+        """Validate the 12-byte header and every chunk header"""
+        magic, version, length = GLB_HEADER.unpack_from(self._mmap, 0)
+        if magic != GLB_MAGIC:
+            raise GLBError("Not a valid GLB file")
+        if version != 2:
+            raise GLBError(f"Unsupported GLB version: {version}")
+        if length > size:
+            raise GLBError(f"Header length {length} exceeds file size {size}")
+
+        self.version = version
+        self.length = length
+
+        offset = GLB_HEADER.size
+        while offset < length:
+            if offset + CHUNK_HEADER.size > length:
+                raise GLBError(f"Truncated chunk header at offset {offset}")
+            chunk_length, chunk_type = CHUNK_HEADER.unpack_from(self._mmap, offset)
+            start = offset + CHUNK_HEADER.size
+            end = start + chunk_length
+            if end > length:
+                raise GLBError(f"Chunk {chunk_type!r} at offset {offset} overruns file")
+            if chunk_length % 4:
+                raise GLBError(f"Chunk {chunk_type!r} length {chunk_length} is not 4-byte aligned")
+            self.chunks.append((chunk_type, start, chunk_length))
+            offset = end
+
+        if not self.chunks or self.chunks[0][0] != CHUNK_JSON:
+            raise GLBError("First chunk is not JSON")
+        bin_indices = [i for i, chunk in enumerate(self.chunks) if chunk[0] == CHUNK_BIN]
+        if bin_indices and bin_indices[0] != 1:
+            raise GLBError("BIN chunk must directly follow the JSON chunk")
+
+    def chunk(self, chunk_type):
+        """Return a zero-copy memoryview of the first chunk of the given type, or None"""
+        for ctype, start, chunk_length in self.chunks:
+            if ctype == chunk_type:
+                return self._view[start:start + chunk_length]
+        return None
+
+    @property
+    def json_chunk(self):
+        return self.chunk(CHUNK_JSON)
+
+    @property
+    def bin_chunk(self):
+        return self.chunk(CHUNK_BIN)
+
+    @property
+    def gltf(self):
+        """Parsed glTF JSON document (decoded once and cached)"""
+        if self._json is None:
+            # json.loads needs bytes; the JSON chunk is small compared to BIN
+            data = bytes(self.json_chunk).rstrip(b' \x00')
+            try:
+                self._json = json.loads(data)
+            except ValueError as e:
+                raise GLBError(f"Failed to parse JSON: {e}") from e
+        return self._json
+
+    def close(self):
+        """Release the mapping; safe to call more than once"""
+        if self._view is not None:
+            try:
+                self._view.release()
+            except BufferError:
+                # A slice is still exported (e.g. a NumPy view); the
+                # mapping is released when the last reference goes away.
+                pass
+            self._view = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"GLBFile({self.path!r}, version={self.version}, length={self.length})"
+
+
+def open_glb(path):
+    """Open a GLB file as a memory-mapped GLBFile"""
+    return GLBFile(path)
+
+
+def read_glb_json(path):
+    """Read only the GLB header and JSON chunk with plain file reads
+
+    Returns (version, length, json_bytes).  Nothing past the JSON chunk is
+    read or mapped, which makes this the cheapest way to look at the glTF
+    document of a large asset.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(GLB_HEADER.size + CHUNK_HEADER.size)
+        if len(header) < GLB_HEADER.size:
+            raise GLBError(f"File too small for a GLB header: {len(header)} bytes")
+        magic, version, length = GLB_HEADER.unpack_from(header, 0)
+        if magic != GLB_MAGIC:
+            raise GLBError("Not a valid GLB file")
+        if version != 2:
+            raise GLBError(f"Unsupported GLB version: {version}")
+        if len(header) < GLB_HEADER.size + CHUNK_HEADER.size:
+            raise GLBError(f"Truncated chunk header at offset {GLB_HEADER.size}")
+        chunk_length, chunk_type = CHUNK_HEADER.unpack_from(header, GLB_HEADER.size)
+        if chunk_type != CHUNK_JSON:
+            raise GLBError("First chunk is not JSON")
+        data = f.read(chunk_length)
+        if len(data) < chunk_length:
+            raise GLBError(f"Chunk {chunk_type!r} at offset {GLB_HEADER.size} overruns file")
+    return version, length, data
+
+
+def write_glb(path, gltf, bin_data=None):
+    """Write a GLB container from a glTF dict and an optional BIN payload
+
+    Chunks are padded to 4-byte boundaries (JSON with spaces, BIN with
+    zeros) as the spec requires.  Returns the number of bytes written.
+    """
+    json_data = json.dumps(gltf, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    json_data += b' ' * (-len(json_data) % 4)
+
+    chunks = [(CHUNK_JSON, json_data)]
+    if bin_data is not None:
+        bin_data = bytes(bin_data)
+        bin_data += b'\x00' * (-len(bin_data) % 4)
+        chunks.append((CHUNK_BIN, bin_data))
+
+    length = GLB_HEADER.size + sum(CHUNK_HEADER.size + len(data) for _, data in chunks)
+    with open(path, 'wb') as f:
+        f.write(GLB_HEADER.pack(GLB_MAGIC, 2, length))
+        for chunk_type, data in chunks:
+            f.write(CHUNK_HEADER.pack(len(data), chunk_type))
+            f.write(data)
+    return length
+
+
+def main():
+    import sys
+
+    paths = sys.argv[1:] or ["human_model_sit_possition.glb"]
+    for path in paths:
+        try:
+            with open_glb(path) as glb:
+                print(f"{path}: GLB v{glb.version}, {glb.length} bytes")
+                for chunk_type, start, chunk_length in glb.chunks:
+                    print(f"  Chunk {chunk_type.decode('ascii', 'replace').strip(chr(0))}: "
+                          f"{chunk_length} bytes at offset {start}")
+        except (OSError, GLBError) as e:
+            print(f"{path}: {e}")
+
+
+if __name__ == "__main__":
+    main()
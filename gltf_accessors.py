@@ -0,0 +1,231 @@
+import os
+import base64
+
+import numpy as np
+
+from analysis_profiler import tally
+from glb_reader import open_glb
+
+# glTF componentType -> little-endian NumPy dtype
+COMPONENT_DTYPES = {
+    5120: np.dtype('<i1'),  # BYTE
+    5121: np.dtype('<u1'),  # UNSIGNED_BYTE
+    5122: np.dtype('<i2'),  # SHORT
+    5123: np.dtype('<u2'),  # UNSIGNED_SHORT
+    5125: np.dtype('<u4'),  # UNSIGNED_INT
+    5126: np.dtype('<f4'),  # FLOAT
+}
+
+TYPE_COMPONENTS = {
+    'SCALAR': 1,
+    'VEC2': 2,
+    'VEC3': 3,
+    'VEC4': 4,
+    'MAT2': 4,
+    'MAT3': 9,
+    'MAT4': 16,
+}
+
+MATRIX_SIZES = {'MAT2': 2, 'MAT3': 3, 'MAT4': 4}
+
+
+class AccessorError(ValueError):
+    """Raised when an accessor or bufferView does not fit its buffer"""
+
+
+def _column_stride(accessor_type, itemsize):
+    """Byte stride between matrix columns; columns are padded to 4 bytes"""
+    rows = MATRIX_SIZES[accessor_type]
+    return (rows * itemsize + 3) & ~3
+
+
+def element_size(accessor_type, dtype):
+    """Packed size in bytes of one accessor element, including matrix padding"""
+    if accessor_type in MATRIX_SIZES:
+        return MATRIX_SIZES[accessor_type] * _column_stride(accessor_type, dtype.itemsize)
+    return TYPE_COMPONENTS[accessor_type] * dtype.itemsize
+
+
+def accessor_shape(accessor_type, count):
+    """Shape of the decoded array for `count` elements of the given type"""
+    if accessor_type in MATRIX_SIZES:
+        size = MATRIX_SIZES[accessor_type]
+        return (count, size, size)
+    components = TYPE_COMPONENTS[accessor_type]
+    return (count,) if components == 1 else (count, components)
+
+
+def normalize_array(array):
+    """Convert a normalized integer array to float32 as the glTF spec defines it"""
+    if array.dtype.kind == 'f':
+        return array
+    info = np.iinfo(array.dtype)
+    result = array.astype(np.float32) / np.float32(info.max)
+    if info.min < 0:
+        np.maximum(result, -1.0, out=result)
+    return result
+
+
+class GLTFAccessors:
+    """Decode glTF accessors into NumPy arrays
+
+    Arrays are built directly over the buffer memory (the mmapped BIN chunk
+    for GLB files), so plain, strided and interleaved accessors come back as
+    read-only views without copying.  Normalized integer data and sparse
+    accessors necessarily produce a new array.
+    """
+
+    def __init__(self, gltf, bin_chunk=None, base_dir=None):
+        self.gltf = gltf
+        self.bin_chunk = bin_chunk
+        self.base_dir = base_dir
+        self._buffers = {}
+
+    def buffer(self, index):
+        """Return the bytes-like object backing buffers[index]"""
+        if index in self._buffers:
+            return self._buffers[index]
+
+        buffer = self.gltf['buffers'][index]
+        uri = buffer.get('uri')
+        if uri is None:
+            if self.bin_chunk is None:
+                raise AccessorError(f"Buffer {index} refers to a missing BIN chunk")
+            data = self.bin_chunk
+        elif uri.startswith('data:'):
+            data = base64.b64decode(uri.split(',', 1)[1])
+        else:
+            path = os.path.join(self.base_dir or '.', uri)
+            with open(path, 'rb') as f:
+                data = f.read()
+
+        if len(data) < buffer['byteLength']:
+            raise AccessorError(f"Buffer {index} is shorter than its byteLength")
+        self._buffers[index] = data
+        return data
+
+    def _view_array(self, view_index, byte_offset, count, accessor_type, dtype):
+        """Build a strided view for `count` elements starting inside a bufferView"""
+        view = self.gltf['bufferViews'][view_index]
+        data = self.buffer(view['buffer'])
+
+        packed = element_size(accessor_type, dtype)
+        stride = view.get('byteStride') or packed
+        start = view.get('byteOffset', 0) + byte_offset
+        needed = stride * (count - 1) + packed if count else 0
+        if byte_offset + needed > view['byteLength']:
+            raise AccessorError(f"Accessor overruns bufferView {view_index}")
+        if start + needed > len(data):
+            raise AccessorError(f"bufferView {view_index} overruns buffer {view['buffer']}")
+
+        if accessor_type in MATRIX_SIZES:
+            size = MATRIX_SIZES[accessor_type]
+            column = _column_stride(accessor_type, dtype.itemsize)
+            # Stored column-major; the (col, row) strides expose m[i] as M^T,
+            # so swap the last two axes to hand back row-major matrices.
+            array = np.ndarray((count, size, size), dtype=dtype, buffer=data,
+                               offset=start, strides=(stride, column, dtype.itemsize))
+            return array.transpose(0, 2, 1)
+
+        components = TYPE_COMPONENTS[accessor_type]
+        if components == 1:
+            return np.ndarray((count,), dtype=dtype, buffer=data,
+                              offset=start, strides=(stride,))
+        return np.ndarray((count, components), dtype=dtype, buffer=data,
+                          offset=start, strides=(stride, dtype.itemsize))
+
+    def read(self, index, normalize=True):
+        """Decode accessors[index]
+
+        SCALAR accessors return shape (count,), VECn (count, n) and MATn
+        (count, n, n) in row-major order.  With normalize=True, normalized
+        integer accessors are converted to float32.
+        """
+        accessor = self.gltf['accessors'][index]
+        dtype = COMPONENT_DTYPES.get(accessor['componentType'])
+        if dtype is None:
+            raise AccessorError(f"Unknown componentType {accessor['componentType']}")
+        accessor_type = accessor['type']
+        if accessor_type not in TYPE_COMPONENTS:
+            raise AccessorError(f"Unknown accessor type {accessor_type}")
+        count = accessor['count']
+
+        if 'bufferView' in accessor:
+            array = self._view_array(accessor['bufferView'], accessor.get('byteOffset', 0),
+                                     count, accessor_type, dtype)
+        else:
+            array = np.zeros(accessor_shape(accessor_type, count), dtype=dtype)
+
+        sparse = accessor.get('sparse')
+        if sparse:
+            array = self._apply_sparse(array, sparse, accessor_type, dtype)
+
+        if normalize and accessor.get('normalized'):
+            array = normalize_array(array)
+        tally('accessor_bytes', array.nbytes)
+        tally('elements', array.size)
+        return array
+
+    def _apply_sparse(self, array, sparse, accessor_type, dtype):
+        """Copy the base array and scatter the sparse values into it"""
+        sparse_count = sparse['count']
+        indices_info = sparse['indices']
+        values_info = sparse['values']
+
+        index_dtype = COMPONENT_DTYPES[indices_info['componentType']]
+        indices = self._view_array(indices_info['bufferView'], indices_info.get('byteOffset', 0),
+                                   sparse_count, 'SCALAR', index_dtype)
+        values = self._view_array(values_info['bufferView'], values_info.get('byteOffset', 0),
+                                  sparse_count, accessor_type, dtype)
+
+        if sparse_count and int(indices.max()) >= len(array):
+            raise AccessorError("Sparse index out of range")
+
+        result = np.array(array, copy=True)
+        result[indices] = values
+        return result
+
+    def primitive_attributes(self, primitive, normalize=True):
+        """Decode every attribute of a mesh primitive into a dict of arrays"""
+        return {name: self.read(index, normalize)
+                for name, index in primitive.get('attributes', {}).items()}
+
+    def primitive_indices(self, primitive):
+        """Return the primitive's index array, or None for non-indexed geometry"""
+        if 'indices' not in primitive:
+            return None
+        return self.read(primitive['indices'])
+
+
+def glb_accessors(glb):
+    """Create a GLTFAccessors bound to an open GLBFile"""
+    return GLTFAccessors(glb.gltf, glb.bin_chunk, os.path.dirname(os.path.abspath(glb.path)))
+
+
+def main():
+    import sys
+
+    glb_path = sys.argv[1] if len(sys.argv) > 1 else "human_model_sit_possition.glb"
+    print(f"=== Accessor Decoding: {glb_path} ===")
+
+    with open_glb(glb_path) as glb:
+        accessors = glb_accessors(glb)
+        for i, mesh in enumerate(glb.gltf.get('meshes', [])):
+            print(f"Mesh {i}: {mesh.get('name', '')}")
+            for j, primitive in enumerate(mesh.get('primitives', [])):
+                attributes = accessors.primitive_attributes(primitive)
+                indices = accessors.primitive_indices(primitive)
+                position = attributes.get('POSITION')
+                vertices = len(position) if position is not None else 0
+                print(f"  Primitive {j}: {vertices} vertices", end="")
+                if indices is not None:
+                    print(f", {len(indices) // 3} triangles", end="")
+                print()
+                for name, array in attributes.items():
+                    print(f"    {name}: {array.dtype} {array.shape}")
+                if position is not None and vertices:
+                    print(f"    Bounds: {position.min(axis=0)} .. {position.max(axis=0)}")
+
+
+if __name__ == "__main__":
+    main()
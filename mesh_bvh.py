@@ -0,0 +1,524 @@
+import time
+
+import numpy as np
+
+from forward_kinematics import ForwardKinematics
+from glb_reader import open_glb
+from gltf_accessors import glb_accessors
+from skin_analysis import skin_attribute_sets
+from skinning import primitive_skinning
+from vertex_cache import TRIANGLES
+
+# Triangles per leaf; small leaves prune better, large ones make shallower trees
+LEAF_SIZE = 4
+
+# Bits per axis of the Morton code that orders triangles along a space-filling curve
+MORTON_BITS = 10
+
+# Rays or points traversed together; bounds the (query, node) frontier on
+# meshes whose boxes overlap heavily
+QUERY_BATCH = 2048
+
+# Determinant below which a ray or segment is treated as parallel to a triangle
+PARALLEL_EPSILON = 1e-12
+
+
+class BVHError(ValueError):
+    """Raised for meshes a BVH cannot be built over"""
+
+
+def _spread_bits(values):
+    """Insert two zero bits between each of the low 10 bits (uint64)"""
+    values = values & 0x3FF
+    values = (values | (values << 16)) & 0x030000FF
+    values = (values | (values << 8)) & 0x0300F00F
+    values = (values | (values << 4)) & 0x030C30C3
+    values = (values | (values << 2)) & 0x09249249
+    return values
+
+
+def morton_codes(points):
+    """30-bit Morton codes of (n, 3) points within their bounding box"""
+    low = points.min(axis=0)
+    extent = np.maximum(points.max(axis=0) - low, 1e-30)
+    cells = np.clip((points - low) / extent * ((1 << MORTON_BITS) - 1), 0, (1 << MORTON_BITS) - 1)
+    cells = cells.astype(np.uint64)
+    return (_spread_bits(cells[:, 0]) << np.uint64(2)) | (_spread_bits(cells[:, 1]) << np.uint64(1)) \
+        | _spread_bits(cells[:, 2])
+
+
+def _dot(a, b):
+    return np.einsum('ij,ij->i', a, b)
+
+
+def ray_triangle(origins, directions, a, b, c):
+    """Moller-Trumbore: (t, u, v) per row; t is NaN where the line misses the triangle"""
+    edge1, edge2 = b - a, c - a
+    h = np.cross(directions, edge2)
+    determinant = _dot(edge1, h)
+    parallel = np.abs(determinant) <= PARALLEL_EPSILON
+    inverse = 1.0 / np.where(parallel, 1.0, determinant)
+    s = origins - a
+    u = _dot(s, h) * inverse
+    q = np.cross(s, edge1)
+    v = _dot(directions, q) * inverse
+    t = _dot(edge2, q) * inverse
+    inside = ~parallel & (u >= 0) & (v >= 0) & (u + v <= 1)
+    return np.where(inside, t, np.nan), u, v
+
+
+def closest_point_triangle(points, a, b, c):
+    """Closest point on each triangle to each point (Ericson's region tests, vectorized)"""
+    ab, ac = b - a, c - a
+    ap, bp, cp = points - a, points - b, points - c
+    d1, d2 = _dot(ab, ap), _dot(ac, ap)
+    d3, d4 = _dot(ab, bp), _dot(ac, bp)
+    d5, d6 = _dot(ab, cp), _dot(ac, cp)
+    va = d3 * d6 - d5 * d4
+    vb = d5 * d2 - d1 * d6
+    vc = d1 * d4 - d3 * d2
+
+    def ratio(numerator, denominator):
+        return (numerator / np.where(denominator == 0, 1.0, denominator))[:, None]
+
+    total = va + vb + vc
+    face = a + ab * ratio(vb, total) + ac * ratio(vc, total)
+    conditions = [
+        (d1 <= 0) & (d2 <= 0),
+        (d3 >= 0) & (d4 <= d3),
+        (vc <= 0) & (d1 >= 0) & (d3 <= 0),
+        (d6 >= 0) & (d5 <= d6),
+        (vb <= 0) & (d2 >= 0) & (d6 <= 0),
+        (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0),
+    ]
+    choices = [a, b, a + ab * ratio(d1, d1 - d3), c, a + ac * ratio(d2, d2 - d6),
+               b + (c - b) * ratio(d4 - d3, (d4 - d3) + (d5 - d6))]
+    return np.select([condition[:, None] for condition in conditions], choices, face)
+
+
+def segments_cross_triangles(starts, ends, a, b, c):
+    """Whether each segment passes through its triangle"""
+    t, _, _ = ray_triangle(starts, ends - starts, a, b, c)
+    return (t >= 0) & (t <= 1)
+
+
+def triangles_intersect(first, second):
+    """Whether (n, 3, 3) triangle pairs intersect
+
+    Two non-coplanar triangles intersect exactly when an edge of one
+    passes through the other, so six segment tests decide each pair.
+    Coplanar touching pairs are not reported.
+    """
+    hit = np.zeros(len(first), dtype=bool)
+    for edge in range(3):
+        nxt = (edge + 1) % 3
+        hit |= segments_cross_triangles(first[:, edge], first[:, nxt], second[:, 0], second[:, 1], second[:, 2])
+        hit |= segments_cross_triangles(second[:, edge], second[:, nxt], first[:, 0], first[:, 1], first[:, 2])
+    return hit
+
+
+def _concatenate(parts):
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+class BVH:
+    """Bounding volume hierarchy over a triangle mesh, built and queried with array operations
+
+    Triangles are sorted once along a Morton curve and grouped into leaves
+    of LEAF_SIZE; the tree is the implicit complete binary tree over those
+    leaves, so node i of a level has children 2i and 2i + 1 of the next
+    and every level's bounds are one pairwise min/max reduction of the
+    level below.  refit() recomputes the bounds for moved vertices (an
+    animation frame) in the same order without re-sorting.
+
+    Queries walk the tree level by level for all rays or points at once,
+    keeping the (query, node) pairs whose boxes pass the test.
+    """
+
+    def __init__(self, vertices, triangles, leaf_size=LEAF_SIZE):
+        vertices = np.asarray(vertices, dtype=np.float64)
+        triangles = np.asarray(triangles, dtype=np.intp).reshape(-1, 3)
+        if not len(triangles):
+            raise BVHError("Mesh has no triangles")
+        if triangles.max() >= len(vertices) or triangles.min() < 0:
+            raise BVHError("Triangle indices outside the vertex array")
+        self.leaf_size = leaf_size
+        self.order = np.argsort(morton_codes(vertices[triangles].mean(axis=1)), kind='stable')
+        self.triangles = triangles[self.order]
+        leaves = -(-len(triangles) // leaf_size)
+        self.depth = int(np.ceil(np.log2(leaves))) if leaves > 1 else 0
+        self.refit(vertices)
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def refit(self, vertices):
+        """Recompute every bound for new positions of the same vertices"""
+        vertices = np.asarray(vertices, dtype=np.float64)
+        self.corners = vertices[self.triangles]
+        slots = (1 << self.depth) * self.leaf_size
+        low = np.full((slots, 3), np.inf)
+        high = np.full((slots, 3), -np.inf)
+        low[:len(self.corners)] = self.corners.min(axis=1)
+        high[:len(self.corners)] = self.corners.max(axis=1)
+        # Any vertex inside a node bounds the distance to its nearest triangle from above
+        sample = np.full((slots, 3), np.nan)
+        sample[:len(self.corners)] = self.corners[:, 0]
+
+        low = low.reshape(-1, self.leaf_size, 3).min(axis=1)
+        high = high.reshape(-1, self.leaf_size, 3).max(axis=1)
+        sample = sample[::self.leaf_size]
+        self.low, self.high, self.samples = [low], [high], [sample]
+        while len(low) > 1:
+            low = low.reshape(-1, 2, 3).min(axis=1)
+            high = high.reshape(-1, 2, 3).max(axis=1)
+            # Empty nodes only trail the last leaf, so a left child is never empty
+            sample = sample[::2]
+            self.low.append(low)
+            self.high.append(high)
+            self.samples.append(sample)
+        self.low.reverse()
+        self.high.reverse()
+        self.samples.reverse()
+
+    @property
+    def bounds(self):
+        """(minimum, maximum) of the whole mesh"""
+        return self.low[0][0], self.high[0][0]
+
+    def _leaf_pairs(self, count, test):
+        """(query, leaf) pairs that pass test(level, queries, nodes) at every level"""
+        queries = np.arange(count)
+        nodes = np.zeros(count, dtype=np.intp)
+        for level in range(self.depth + 1):
+            keep = test(level, queries, nodes)
+            queries, nodes = queries[keep], nodes[keep]
+            if level < self.depth:
+                queries = np.repeat(queries, 2)
+                nodes = (nodes[:, None] * 2 + np.array([0, 1])).ravel()
+        return queries, nodes
+
+    def _triangle_pairs(self, queries, leaves):
+        """Expand (query, leaf) pairs into (query, sorted triangle) pairs"""
+        triangles = (leaves[:, None] * self.leaf_size + np.arange(self.leaf_size)).ravel()
+        queries = np.repeat(queries, self.leaf_size)
+        valid = triangles < len(self.triangles)
+        return queries[valid], triangles[valid]
+
+    def ray_cast(self, origins, directions, max_distance=np.inf):
+        """Nearest hit along each ray
+
+        Returns a dict of (rays,) arrays: distance (inf on a miss, in units
+        of the normalized direction), triangle (index into the original
+        triangle list, -1 on a miss), point (rays, 3) and barycentric
+        (rays, 3).
+        """
+        origins = np.atleast_2d(np.asarray(origins, dtype=np.float64))
+        directions = np.atleast_2d(np.asarray(directions, dtype=np.float64))
+        directions = directions / np.linalg.norm(directions, axis=1, keepdims=True)
+        origins, directions = np.broadcast_arrays(origins, directions)
+        count = len(origins)
+        limit = np.broadcast_to(np.asarray(max_distance, dtype=np.float64), (count,))
+        if count > QUERY_BATCH:
+            return _concatenate([self.ray_cast(origins[start:start + QUERY_BATCH],
+                                               directions[start:start + QUERY_BATCH],
+                                               limit[start:start + QUERY_BATCH])
+                                 for start in range(0, count, QUERY_BATCH)])
+        with np.errstate(divide='ignore'):
+            inverse = 1.0 / directions
+
+        def test(level, queries, nodes):
+            with np.errstate(invalid='ignore'):
+                near = (self.low[level][nodes] - origins[queries]) * inverse[queries]
+                far = (self.high[level][nodes] - origins[queries]) * inverse[queries]
+            # fmin/fmax skip the NaN of an origin lying on a slab of an axis-parallel ray
+            enter = np.fmax.reduce(np.fmin(near, far), axis=1)
+            leave = np.fmin.reduce(np.fmax(near, far), axis=1)
+            return (enter <= leave) & (leave >= 0) & (enter <= limit[queries])
+
+        queries, triangles = self._triangle_pairs(*self._leaf_pairs(count, test))
+        corners = self.corners[triangles]
+        t, u, v = ray_triangle(origins[queries], directions[queries], corners[:, 0], corners[:, 1], corners[:, 2])
+        hit = (t >= 0) & (t <= limit[queries])
+        queries, triangles, t, u, v = queries[hit], triangles[hit], t[hit], u[hit], v[hit]
+
+        result = {'distance': np.full(count, np.inf), 'triangle': np.full(count, -1, dtype=np.intp),
+                  'point': np.full((count, 3), np.nan), 'barycentric': np.full((count, 3), np.nan)}
+        if len(queries):
+            nearest = np.lexsort((t, queries))
+            first = nearest[np.r_[True, queries[nearest][1:] != queries[nearest][:-1]]]
+            rays = queries[first]
+            result['distance'][rays] = t[first]
+            result['triangle'][rays] = self.order[triangles[first]]
+            result['point'][rays] = origins[rays] + directions[rays] * t[first, None]
+            result['barycentric'][rays] = np.stack([1 - u[first] - v[first], u[first], v[first]], axis=1)
+        return result
+
+    def closest_points(self, points, max_distance=np.inf):
+        """Nearest surface point to each query point
+
+        Returns a dict of (points,) arrays: distance (inf when nothing lies
+        within max_distance), triangle (-1 then) and point (points, 3).
+        Each level prunes boxes farther than the closest sample vertex
+        seen so far.
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=np.float64))
+        count = len(points)
+        if count > QUERY_BATCH:
+            return _concatenate([self.closest_points(points[start:start + QUERY_BATCH], max_distance)
+                                 for start in range(0, count, QUERY_BATCH)])
+        bound = np.full(count, float(max_distance) ** 2)
+
+        def test(level, queries, nodes):
+            position = points[queries]
+            gap = np.maximum(np.maximum(self.low[level][nodes] - position, position - self.high[level][nodes]), 0)
+            near = np.einsum('ij,ij->i', gap, gap)
+            sample = self.samples[level][nodes] - position
+            # The frontier stays grouped by query, so each query's minimum is one segment reduction
+            starts = np.flatnonzero(np.r_[True, queries[1:] != queries[:-1]]) if len(queries) else queries
+            if len(starts):
+                owners = queries[starts]
+                bound[owners] = np.fmin(bound[owners], np.fmin.reduceat(np.einsum('ij,ij->i', sample, sample), starts))
+            return near <= bound[queries]
+
+        queries, triangles = self._triangle_pairs(*self._leaf_pairs(count, test))
+        corners = self.corners[triangles]
+        nearest = closest_point_triangle(points[queries], corners[:, 0], corners[:, 1], corners[:, 2])
+        offset = nearest - points[queries]
+        squared = np.einsum('ij,ij->i', offset, offset)
+        within = squared <= float(max_distance) ** 2
+        queries, triangles, nearest, squared = queries[within], triangles[within], nearest[within], squared[within]
+
+        result = {'distance': np.full(count, np.inf), 'triangle': np.full(count, -1, dtype=np.intp),
+                  'point': np.full((count, 3), np.nan)}
+        if len(queries):
+            order = np.lexsort((squared, queries))
+            first = order[np.r_[True, queries[order][1:] != queries[order][:-1]]]
+            found = queries[first]
+            result['distance'][found] = np.sqrt(squared[first])
+            result['triangle'][found] = self.order[triangles[first]]
+            result['point'][found] = nearest[first]
+        return result
+
+    def overlap(self, other):
+        """Intersecting triangle pairs with another BVH as (n, 2) original triangle indices
+
+        Both trees are descended together; once the shallower one reaches
+        its leaves only the deeper one keeps splitting.
+        """
+        mine = np.zeros(1, dtype=np.intp)
+        theirs = np.zeros(1, dtype=np.intp)
+        steps = max(self.depth, other.depth)
+        for step in range(steps + 1):
+            level, other_level = min(step, self.depth), min(step, other.depth)
+            keep = np.all((self.low[level][mine] <= other.high[other_level][theirs]) &
+                          (other.low[other_level][theirs] <= self.high[level][mine]), axis=1)
+            mine, theirs = mine[keep], theirs[keep]
+            if step == steps:
+                break
+            if level < self.depth:
+                mine = (mine[:, None] * 2 + np.array([0, 1])).ravel()
+                theirs = np.repeat(theirs, 2)
+            if other_level < other.depth:
+                theirs = (theirs[:, None] * 2 + np.array([0, 1])).ravel()
+                # After both split, this pairs every child of one with every child of the other
+                mine = np.repeat(mine, 2)
+
+        # Leaf pairs -> triangle pairs, then a triangle box test before the exact one
+        first = (mine[:, None, None] * self.leaf_size + np.arange(self.leaf_size)[:, None]).repeat(
+            other.leaf_size, axis=2).ravel()
+        second = (theirs[:, None, None] * other.leaf_size + np.arange(other.leaf_size)[None, :]).repeat(
+            self.leaf_size, axis=1).ravel()
+        valid = (first < len(self.triangles)) & (second < len(other.triangles))
+        first, second = first[valid], second[valid]
+        a, b = self.corners[first], other.corners[second]
+        boxes = np.all((a.min(axis=1) <= b.max(axis=1)) & (b.min(axis=1) <= a.max(axis=1)), axis=1)
+        first, second = first[boxes], second[boxes]
+        hit = triangles_intersect(self.corners[first], other.corners[second])
+        return np.stack([self.order[first[hit]], other.order[second[hit]]], axis=1)
+
+
+class PosedScene:
+    """Every triangle primitive of a glTF scene as one mesh that can be posed per frame
+
+    Skinned primitives are posed with linear blend skinning, the others
+    follow their node's world matrix.  The triangle list is fixed, so a BVH
+    built for one frame is refit for the next.
+    """
+
+    def __init__(self, gltf, accessors, workers=None):
+        self.kinematics = ForwardKinematics(gltf, accessors)
+        self.parts = []
+        triangles = []
+        offset = 0
+        meshes = gltf.get('meshes', [])
+        for node_index, node in enumerate(gltf.get('nodes', [])):
+            if 'mesh' not in node:
+                continue
+            for primitive in meshes[node['mesh']].get('primitives', []):
+                if primitive.get('mode', TRIANGLES) != TRIANGLES or 'POSITION' not in primitive['attributes']:
+                    continue
+                positions = np.asarray(accessors.read(primitive['attributes']['POSITION']), dtype=np.float64)
+                indices = accessors.primitive_indices(primitive)
+                indices = np.arange(len(positions)) if indices is None else np.asarray(indices, dtype=np.intp)
+                skinned = 'skin' in node and skin_attribute_sets(primitive['attributes'])
+                self.parts.append({
+                    'node': node_index, 'skin': node['skin'] if skinned else None,
+                    'positions': positions,
+                    'skinning': primitive_skinning(accessors, primitive, workers) if skinned else None,
+                })
+                triangles.append(indices.reshape(-1, 3) + offset)
+                offset += len(positions)
+        self.vertex_count = offset
+        self.triangles = np.concatenate(triangles) if triangles else np.zeros((0, 3), dtype=np.intp)
+
+    def poses(self, animation=None, rate=None):
+        """(times, (frames, vertices, 3) posed vertex positions); the rest pose without an animation"""
+        times, world = self.kinematics.world_matrices(animation, rate=rate)
+        posed = np.empty((len(times), self.vertex_count, 3))
+        offset = 0
+        for part in self.parts:
+            count = len(part['positions'])
+            if part['skinning'] is not None:
+                matrices = self.kinematics.skin_matrices(part['skin'], world)
+                posed[:, offset:offset + count] = part['skinning'].skin(matrices)
+            else:
+                matrix = world[:, part['node']]
+                posed[:, offset:offset + count] = (part['positions'] @ matrix[:, :3, :3].transpose(0, 2, 1)
+                                                   + matrix[:, None, :3, 3])
+            offset += count
+        return times, posed
+
+
+def load_scene(path, workers=None):
+    """PosedScene of a GLB file (decoded while the file is open)"""
+    with open_glb(path) as glb:
+        return PosedScene(glb.gltf, glb_accessors(glb), workers)
+
+
+def check_penetration(path, obstacle=None, ground=None, contact=0.0, animation=None, rate=None, workers=None):
+    """Per-frame penetration of a posed asset into an obstacle mesh and/or a ground plane
+
+    The obstacle (another GLB in its rest pose) gets a static BVH; the
+    asset's BVH is built on the first frame and refit on every later one.
+    Returns a report with per-frame intersecting triangle pairs, vertices
+    within `contact` of the obstacle, depth below the ground height and
+    build/refit/query timings.
+    """
+    scene = load_scene(path, workers)
+    if not len(scene.triangles):
+        raise BVHError(f"{path} has no triangle meshes")
+    times, posed = scene.poses(animation, rate)
+
+    start = time.perf_counter()
+    bvh = BVH(posed[0], scene.triangles)
+    build = time.perf_counter() - start
+    static = None
+    if obstacle is not None:
+        obstacle_scene = load_scene(obstacle, workers)
+        if not len(obstacle_scene.triangles):
+            raise BVHError(f"{obstacle} has no triangle meshes")
+        _, rest = obstacle_scene.poses()
+        static = BVH(rest[0], obstacle_scene.triangles)
+
+    frames = []
+    refit = query = 0.0
+    for frame, vertices in enumerate(posed):
+        if frame:
+            start = time.perf_counter()
+            bvh.refit(vertices)
+            refit += time.perf_counter() - start
+        record = {'frame': frame, 'time': float(times[frame]), 'lowest': float(bvh.bounds[0][1])}
+        start = time.perf_counter()
+        if static is not None:
+            record['intersections'] = len(bvh.overlap(static))
+            if contact > 0:
+                nearest = static.closest_points(vertices, max_distance=contact)
+                record['contacts'] = int(np.isfinite(nearest['distance']).sum())
+        if ground is not None:
+            record['below_ground'] = max(0.0, ground - record['lowest'])
+        query += time.perf_counter() - start
+        frames.append(record)
+
+    penetrating = [record['frame'] for record in frames
+                   if record.get('intersections') or record.get('below_ground')]
+    return {
+        'path': path, 'obstacle': obstacle, 'animation': animation, 'ground': ground,
+        'triangles': len(bvh), 'obstacle_triangles': len(static) if static is not None else 0,
+        'frames': frames, 'penetrating_frames': penetrating,
+        'build_seconds': build, 'refit_seconds': refit / max(len(frames) - 1, 1),
+        'query_seconds': query / len(frames),
+    }
+
+
+def print_penetration_report(report):
+    animation = 'rest pose' if report['animation'] is None else f"animation {report['animation']}"
+    print(f"{report['triangles']} triangles, {len(report['frames'])} frame(s) of the {animation}"
+          + (f" against {report['obstacle_triangles']} obstacle triangles" if report['obstacle'] else ''))
+    print(f"  Build {report['build_seconds'] * 1000:.2f} ms, refit {report['refit_seconds'] * 1000:.2f} ms/frame, "
+          f"queries {report['query_seconds'] * 1000:.2f} ms/frame")
+    lowest = min(record['lowest'] for record in report['frames'])
+    print(f"  Lowest point: {lowest:.4f}")
+    if not report['penetrating_frames']:
+        print("  No penetration")
+        return
+    print(f"  Penetrating frames: {len(report['penetrating_frames'])}/{len(report['frames'])}")
+    for record in report['frames']:
+        if record['frame'] not in report['penetrating_frames']:
+            continue
+        details = []
+        if record.get('intersections'):
+            details.append(f"{record['intersections']} intersecting triangle pairs")
+        if record.get('below_ground'):
+            details.append(f"{record['below_ground']:.4f} below ground")
+        if record.get('contacts'):
+            details.append(f"{record['contacts']} vertices in contact")
+        print(f"    frame {record['frame']} (t={record['time']:.3f}s): {', '.join(details)}")
+
+
+def main():
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Check posed meshes for penetration of an obstacle or the ground using a BVH")
+    parser.add_argument('paths', nargs='*', default=["human_model_sit_possition_002.glb"])
+    parser.add_argument('--obstacle', help="GLB with the static geometry to test against (e.g. a chair)")
+    parser.add_argument('--ground', type=float, default=None, help="ground plane height (Y up)")
+    parser.add_argument('--contact', type=float, default=0.0,
+                        help="also count vertices within this distance of the obstacle")
+    parser.add_argument('-a', '--animation', type=int, default=None,
+                        help="animation index (default: every animation, or the rest pose if none)")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="evaluate at this many frames per second instead of at the key times")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="skinning threads")
+    args = parser.parse_args()
+    if args.obstacle is None and args.ground is None:
+        parser.error("give --obstacle and/or --ground")
+
+    failures = 0
+    for path in args.paths:
+        print(f"=== Penetration Check: {path} ===")
+        if args.animation is not None:
+            animations = [args.animation]
+        else:
+            with open_glb(path) as glb:
+                animations = list(range(len(glb.gltf.get('animations', [])))) or [None]
+        for animation in animations:
+            try:
+                report = check_penetration(path, args.obstacle, args.ground, args.contact,
+                                           animation, args.rate, args.workers)
+            except (OSError, ValueError) as e:
+                print(f"  Error: {e}")
+                failures += 1
+                continue
+            print_penetration_report(report)
+            failures += bool(report['penetrating_frames'])
+        print()
+
+    # Non-zero exit status lets this script act as a QA gate
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+import os
+import copy
+import time
+
+import numpy as np
+
+from glb_optimizer import GLBOptimizer, write_optimized
+from glb_reader import open_glb
+from gltf_accessors import COMPONENT_DTYPES, glb_accessors
+from skin_analysis import skin_attribute_sets, stacked_influences
+from vertex_cache import TRIANGLES, fetch_order, optimize_triangles
+
+LOD_EXTENSION = 'MSFT_lod'
+
+# Triangle count of each LOD relative to the source primitive
+DEFAULT_RATIOS = (0.5, 0.25, 0.125)
+
+# Largest allowed geometric error, relative to the primitive's extent
+DEFAULT_MAX_ERROR = 0.02
+
+# Largest L1 distance between the influences of the two ends of a
+# collapsed edge; keeps collapses from crossing joint boundaries
+DEFAULT_MAX_WEIGHT_DELTA = 0.25
+
+# Collapses that turn a triangle's normal by more than this (cosine) are rejected
+FLIP_COSINE = 0.2
+
+MAX_PASSES = 200
+
+
+def _plane_quadrics(positions, triangles):
+    """Area-weighted plane quadrics (vertices, 4, 4) summed over incident triangles"""
+    corners = positions[triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    double_area = np.linalg.norm(normals, axis=1)
+    normals = np.divide(normals, double_area[:, None], out=np.zeros_like(normals), where=double_area[:, None] > 0)
+    planes = np.concatenate([normals, -(normals * corners[:, 0]).sum(axis=1, keepdims=True)], axis=1)
+    products = (planes[:, :, None] * planes[:, None, :] * (0.5 * double_area)[:, None, None]).reshape(-1, 16)
+
+    flat = triangles.reshape(-1)
+    count = len(positions)
+    quadrics = np.empty((count, 16))
+    for component in range(16):
+        quadrics[:, component] = np.bincount(flat, weights=np.repeat(products[:, component], 3), minlength=count)
+    return quadrics.reshape(count, 4, 4)
+
+
+def _edges_with_counts(triangles, count):
+    """Undirected edges of a triangle list and how many triangles use each"""
+    edges = np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]])
+    edges.sort(axis=1)
+    keys, uses = np.unique(edges[:, 0].astype(np.int64) * count + edges[:, 1], return_counts=True)
+    return np.stack([keys // count, keys % count], axis=1), uses
+
+
+def _unique_triangles(triangles, count):
+    """Drop triangles that use the same three vertices as an earlier one"""
+    if not len(triangles):
+        return triangles
+    corners = np.sort(triangles, axis=1).astype(np.int64)
+    if count < 1 << 21:
+        _, first = np.unique((corners[:, 0] * count + corners[:, 1]) * count + corners[:, 2], return_index=True)
+    else:
+        _, first = np.unique(corners, axis=0, return_index=True)
+    return triangles[np.sort(first)]
+
+
+def influence_distance(joints, weights, a, b):
+    """L1 distance between the sparse joint-weight vectors of vertices a and b"""
+    ja, jb = joints[a], joints[b]
+    wa, wb = weights[a], weights[b]
+    shared = (ja[:, :, None] == jb[:, None, :]) & (wa[:, :, None] > 0) & (wb[:, None, :] > 0)
+    overlap = np.where(shared, np.minimum(wa[:, :, None], wb[:, None, :]), 0).sum(axis=(1, 2))
+    return wa.sum(axis=1) + wb.sum(axis=1) - 2 * overlap
+
+
+class QuadricSimplifier:
+    """Progressive quadric-error mesh simplification by half-edge collapses
+
+    Each pass evaluates every edge at once: plane quadrics give the cost of
+    collapsing either end into the other, and a vertex-disjoint set of the
+    cheapest collapses (each triangle touched by at most one removed
+    vertex, no normal flips) is applied in a single remap.  Collapsing onto
+    an existing vertex means JOINTS/WEIGHTS and every other attribute are
+    carried over unchanged.  Border and attribute-seam vertices are locked,
+    and with skin influences an edge may only collapse when both ends are
+    weighted similarly, so joint boundaries stay where they were painted.
+
+    Calls to simplify() continue from the previous result, which makes a
+    chain of decreasing targets cheap.
+    """
+
+    def __init__(self, positions, triangles, joints=None, weights=None,
+                 max_weight_delta=DEFAULT_MAX_WEIGHT_DELTA):
+        self.positions = np.asarray(positions, dtype=np.float64)
+        self.triangles = np.asarray(triangles, dtype=np.intp).reshape(-1, 3)
+        self.joints = None if joints is None else np.asarray(joints, dtype=np.intp)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+        self.max_weight_delta = max_weight_delta
+        count = len(self.positions)
+        self.extent = float(np.ptp(self.positions, axis=0).max()) if count else 0.0
+        self.error = 0.0
+        self._random = np.random.default_rng(0)
+
+        self.quadrics = _plane_quadrics(self.positions, self.triangles)
+
+        # Weld by position: vertices sharing a position sit on an attribute
+        # seam, and edges used once in the welded mesh are on a border
+        _, group = np.unique(self.positions, axis=0, return_inverse=True)
+        group = group.reshape(-1)
+        self.locked = np.bincount(group, minlength=count)[group] > 1
+        welded = _edges_with_counts(group[self.triangles], count)
+        border = welded[1] == 1
+        border_groups = np.zeros(count, dtype=bool)
+        border_groups[welded[0][border].reshape(-1)] = True
+        self.locked |= border_groups[group]
+
+    def _collapse_costs(self, edges):
+        """Cost of collapsing a -> b and b -> a for each edge (inf where not allowed)"""
+        a, b = edges[:, 0], edges[:, 1]
+        quadric = self.quadrics[a] + self.quadrics[b]
+        ha = np.concatenate([self.positions[a], np.ones((len(a), 1))], axis=1)
+        hb = np.concatenate([self.positions[b], np.ones((len(b), 1))], axis=1)
+        into_b = np.maximum(np.einsum('ei,eij,ej->e', hb, quadric, hb), 0)
+        into_a = np.maximum(np.einsum('ei,eij,ej->e', ha, quadric, ha), 0)
+        into_b[self.locked[a]] = np.inf
+        into_a[self.locked[b]] = np.inf
+        if self.joints is not None:
+            distance = influence_distance(self.joints, self.weights, a, b)
+            blocked = distance > self.max_weight_delta
+            into_b[blocked] = np.inf
+            into_a[blocked] = np.inf
+        return into_b, into_a
+
+    def _select(self, removed, kept, cost, needed):
+        """Vertex-disjoint cheapest collapses; each triangle may lose at most one vertex
+
+        Collapses are ranked by cost in eighth-octave buckets with a seeded
+        random tie-break, so flat regions (equal costs) still yield many
+        locally cheapest edges per pass instead of a few along index order.
+        """
+        bucket = np.floor(np.log2(cost + 1e-300) * 8)
+        order = np.lexsort((self._random.random(len(cost)), bucket))
+        rank = np.empty(len(cost), dtype=np.intp)
+        rank[order] = np.arange(len(cost))
+        count = len(self.positions)
+
+        best = np.full(count, len(cost), dtype=np.intp)
+        np.minimum.at(best, removed, rank)
+        np.minimum.at(best, kept, rank)
+        chosen = (best[removed] == rank) & (best[kept] == rank)
+
+        # A triangle with two removed corners would be rewritten by two
+        # collapses at once; keep only the cheaper one
+        collapse = np.full(count, -1, dtype=np.intp)
+        collapse[removed[chosen]] = rank[chosen]
+        corners = collapse[self.triangles]
+        conflict = (corners >= 0).sum(axis=1) > 1
+        if conflict.any():
+            corners = corners[conflict]
+            cheapest = np.where(corners >= 0, corners, len(cost)).min(axis=1, keepdims=True)
+            losers = corners[(corners >= 0) & (corners != cheapest)]
+            chosen &= ~np.isin(rank, losers)
+
+        chosen = np.flatnonzero(chosen)
+        chosen = chosen[np.argsort(rank[chosen])][:needed]
+        return removed[chosen], kept[chosen], cost[chosen]
+
+    def _flipped(self, remap):
+        """Vertices whose collapse would flip (or fold) a surviving triangle"""
+        moved = remap[self.triangles]
+        changed = np.any(moved != self.triangles, axis=1)
+        survivors = changed & (moved[:, 0] != moved[:, 1]) & (moved[:, 1] != moved[:, 2]) & (moved[:, 0] != moved[:, 2])
+        if not survivors.any():
+            return np.zeros(0, dtype=np.intp)
+        before = self.positions[self.triangles[survivors]]
+        after = self.positions[moved[survivors]]
+        old = np.cross(before[:, 1] - before[:, 0], before[:, 2] - before[:, 0])
+        new = np.cross(after[:, 1] - after[:, 0], after[:, 2] - after[:, 0])
+        scale = np.linalg.norm(old, axis=1) * np.linalg.norm(new, axis=1)
+        bad = (old * new).sum(axis=1) <= FLIP_COSINE * scale
+        triangles = self.triangles[survivors][bad]
+        return triangles[remap[triangles] != triangles]
+
+    def simplify(self, target, max_error=DEFAULT_MAX_ERROR):
+        """Collapse edges until at most `target` triangles remain or the error limit is hit
+
+        Returns the current (triangles, 3) index array into the original
+        vertices.  The relative error reached is kept in self.error.
+        """
+        limit = (max_error * self.extent) ** 2
+        count = len(self.positions)
+        # Collapses rejected for flipping stay out of later passes, so the
+        # next-cheapest edges around them get their turn; they are retried
+        # once when nothing else is left
+        rejected = np.zeros(0, dtype=np.int64)
+        retried = False
+        for _ in range(MAX_PASSES):
+            needed = len(self.triangles) - target
+            if needed <= 0:
+                break
+            edges, _ = _edges_with_counts(self.triangles, count)
+            into_b, into_a = self._collapse_costs(edges)
+            if len(rejected):
+                into_b[np.isin(edges[:, 0] * count + edges[:, 1], rejected)] = np.inf
+                into_a[np.isin(edges[:, 1] * count + edges[:, 0], rejected)] = np.inf
+            forward = into_b <= into_a
+            removed = np.where(forward, edges[:, 0], edges[:, 1])
+            kept = np.where(forward, edges[:, 1], edges[:, 0])
+            cost = np.minimum(into_b, into_a)
+            valid = cost <= limit
+            removed, kept, cost = self._select(removed[valid], kept[valid], cost[valid], (needed + 1) // 2)
+            if not len(removed):
+                if retried or not len(rejected):
+                    break
+                rejected = np.zeros(0, dtype=np.int64)
+                retried = True
+                continue
+
+            remap = np.arange(count)
+            remap[removed] = kept
+            flipped = np.isin(removed, self._flipped(remap))
+            if flipped.any():
+                rejected = np.concatenate([rejected, removed[flipped].astype(np.int64) * count + kept[flipped]])
+                removed, kept, cost = removed[~flipped], kept[~flipped], cost[~flipped]
+                if not len(removed):
+                    continue
+                remap = np.arange(count)
+                remap[removed] = kept
+            retried = False
+
+            self.quadrics[kept] += self.quadrics[removed]
+            triangles = remap[self.triangles]
+            keep = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) & \
+                   (triangles[:, 0] != triangles[:, 2])
+            self.triangles = _unique_triangles(triangles[keep], count)
+            if self.extent:
+                self.error = max(self.error, float(np.sqrt(cost.max())) / self.extent)
+        return self.triangles
+
+
+def simplify_primitive(accessors, primitive, ratios=DEFAULT_RATIOS, max_error=DEFAULT_MAX_ERROR,
+                       max_weight_delta=DEFAULT_MAX_WEIGHT_DELTA):
+    """LOD index buffers for one indexed triangle primitive
+
+    Returns a list of (triangles, relative_error) per ratio; triangles
+    index the primitive's original vertices.
+    """
+    attributes = primitive['attributes']
+    positions = accessors.read(attributes['POSITION'])
+    triangles = np.asarray(accessors.read(primitive['indices']), dtype=np.intp).reshape(-1, 3)
+    sets = skin_attribute_sets(attributes)
+    joints = weights = None
+    if sets:
+        joints, weights = stacked_influences(accessors, attributes, sets)
+    simplifier = QuadricSimplifier(positions, triangles, joints, weights, max_weight_delta)
+    levels = []
+    for ratio in ratios:
+        result = simplifier.simplify(int(len(triangles) * ratio), max_error)
+        levels.append((result.copy(), simplifier.error))
+    return levels
+
+
+def _lod_primitive(gltf, accessors, primitive, triangles, replacements):
+    """Append accessors for a simplified primitive to gltf; returns the new primitive"""
+    attributes = primitive['attributes']
+    vertex_count = gltf['accessors'][attributes['POSITION']]['count']
+    positions = accessors.read(attributes['POSITION'])
+    ordered = optimize_triangles(triangles.reshape(-1), positions, vertex_count)
+    order, remap = fetch_order(ordered, vertex_count)
+    used = len(np.unique(ordered))
+    order = order[:used]
+
+    def add(source, array):
+        accessor = {key: value for key, value in gltf['accessors'][source].items()
+                    if key not in ('bufferView', 'byteOffset', 'sparse', 'min', 'max')}
+        accessor['count'] = len(array)
+        if source == attributes['POSITION'] and len(array):
+            accessor['min'] = array.min(axis=0).tolist()
+            accessor['max'] = array.max(axis=0).tolist()
+        gltf['accessors'].append(accessor)
+        replacements[len(gltf['accessors']) - 1] = array
+        return len(gltf['accessors']) - 1
+
+    result = {key: value for key, value in primitive.items() if key not in ('attributes', 'indices', 'targets')}
+    result['attributes'] = {name: add(index, np.asarray(accessors.read(index, normalize=False))[order])
+                            for name, index in attributes.items()}
+    if primitive.get('targets'):
+        result['targets'] = [{name: add(index, np.asarray(accessors.read(index, normalize=False))[order])
+                              for name, index in target.items()} for target in primitive['targets']]
+    index_dtype = COMPONENT_DTYPES[gltf['accessors'][primitive['indices']]['componentType']]
+    result['indices'] = add(primitive['indices'], remap[ordered].astype(index_dtype))
+    return result
+
+
+def build_lods(gltf, accessors, ratios=DEFAULT_RATIOS, max_error=DEFAULT_MAX_ERROR,
+               max_weight_delta=DEFAULT_MAX_WEIGHT_DELTA):
+    """Add MSFT_lod levels for every mesh node of the document
+
+    Returns (document, replacements, results): a copy of the glTF with one
+    extra mesh and node per level (the node keeps the original transform
+    and skin and is listed in the original node's MSFT_lod ids, with
+    MSFT_screencoverage thresholds in its extras), the accessor data to
+    write for the new accessors, and per-primitive triangle counts/errors.
+    Levels that end up no smaller than the previous one are not emitted.
+    """
+    document = copy.deepcopy(gltf)
+    replacements = {}
+    results = []
+    levels_by_mesh = {}
+
+    for m, mesh in enumerate(gltf.get('meshes', [])):
+        simplified = []
+        for p, primitive in enumerate(mesh['primitives']):
+            result = {'mesh': m, 'primitive': p, 'name': mesh.get('name', '')}
+            results.append(result)
+            if primitive.get('mode', TRIANGLES) != TRIANGLES or 'indices' not in primitive \
+                    or 'POSITION' not in primitive['attributes']:
+                result['skipped'] = "not an indexed triangle list"
+                simplified.append(None)
+                continue
+            levels = simplify_primitive(accessors, primitive, ratios, max_error, max_weight_delta)
+            result['triangles'] = gltf['accessors'][primitive['indices']]['count'] // 3
+            result['levels'] = [{'triangles': len(triangles), 'error': error} for triangles, error in levels]
+            simplified.append(levels)
+
+        # A level is worth emitting when some primitive got smaller than in the previous level
+        previous = [gltf['accessors'][primitive['indices']]['count'] // 3 if levels else 0
+                    for primitive, levels in zip(mesh['primitives'], simplified)]
+        emit = []
+        for level in range(len(ratios)):
+            current = [len(levels[level][0]) if levels else 0 for levels in simplified]
+            if any(c < prev for c, prev in zip(current, previous)):
+                emit.append(level)
+                previous = current
+        if not emit:
+            continue
+
+        meshes = []
+        for level in emit:
+            primitives = []
+            for primitive, levels in zip(mesh['primitives'], simplified):
+                if levels is None:
+                    primitives.append(copy.deepcopy(primitive))
+                else:
+                    primitives.append(_lod_primitive(document, accessors, primitive, levels[level][0], replacements))
+            lod = {'name': f"{mesh.get('name', f'mesh{m}')}_LOD{len(meshes) + 1}", 'primitives': primitives}
+            document['meshes'].append(lod)
+            meshes.append(len(document['meshes']) - 1)
+        levels_by_mesh[m] = (meshes, [ratios[level] for level in emit])
+
+    for i, node in enumerate(gltf.get('nodes', [])):
+        if node.get('mesh') not in levels_by_mesh or LOD_EXTENSION in node.get('extensions', {}):
+            continue
+        meshes, coverage = levels_by_mesh[node['mesh']]
+        ids = []
+        for level, mesh in enumerate(meshes, 1):
+            lod = {key: node[key] for key in ('translation', 'rotation', 'scale', 'matrix', 'skin') if key in node}
+            lod['mesh'] = mesh
+            lod['name'] = f"{node.get('name', f'node{i}')}_LOD{level}"
+            document['nodes'].append(lod)
+            ids.append(len(document['nodes']) - 1)
+        target = document['nodes'][i]
+        target.setdefault('extensions', {})[LOD_EXTENSION] = {'ids': ids}
+        target.setdefault('extras', {})['MSFT_screencoverage'] = list(coverage) + [0.0]
+
+    if levels_by_mesh and LOD_EXTENSION not in document.get('extensionsUsed', []):
+        document['extensionsUsed'] = document.get('extensionsUsed', []) + [LOD_EXTENSION]
+    return document, replacements, results
+
+
+def default_output(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}_lod{ext or '.glb'}"
+
+
+def generate_lods(path, output=None, ratios=DEFAULT_RATIOS, max_error=DEFAULT_MAX_ERROR,
+                  max_weight_delta=DEFAULT_MAX_WEIGHT_DELTA, optimize=False):
+    """Write a copy of a GLB with LOD meshes; returns per-primitive results and the size report"""
+    start = time.perf_counter()
+    with open_glb(path) as glb:
+        accessors = glb_accessors(glb)
+        document, replacements, results = build_lods(glb.gltf, accessors, ratios, max_error, max_weight_delta)
+        optimizer = GLBOptimizer(document, accessors, quantize=optimize, prune=optimize,
+                                 replacements=replacements)
+        size = write_optimized(glb, optimizer, output or default_output(path))
+    return {'path': path, 'primitives': results, 'size': size, 'seconds': time.perf_counter() - start}
+
+
+def print_lod_report(report):
+    """Print a human-readable summary of generate_lods output"""
+    for result in report['primitives']:
+        label = f"Mesh {result['mesh']} ({result['name']}) primitive {result['primitive']}"
+        if 'skipped' in result:
+            print(f"  {label}: skipped, {result['skipped']}")
+            continue
+        levels = ', '.join(f"{level['triangles']} ({level['error'] * 100:.2f}%)" for level in result['levels'])
+        print(f"  {label}: {result['triangles']} triangles -> {levels}")
+    size = report['size']
+    print(f"  Wrote {size['output']} ({size['output_bytes']:,} bytes) in {report['seconds']:.2f}s")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate MSFT_lod levels for GLB meshes by quadric simplification")
+    parser.add_argument('paths', nargs='*', default=["final low poly character  rigged.glb"])
+    parser.add_argument('-o', '--output', help="output file (single input)")
+    parser.add_argument('--ratios', type=lambda text: [float(value) for value in text.split(',')],
+                        default=list(DEFAULT_RATIOS), help="comma-separated triangle ratios per level")
+    parser.add_argument('--max-error', type=float, default=DEFAULT_MAX_ERROR,
+                        help="geometric error limit relative to the mesh size")
+    parser.add_argument('--max-weight-delta', type=float, default=DEFAULT_MAX_WEIGHT_DELTA,
+                        help="largest skin weight difference across a collapsed edge")
+    parser.add_argument('--optimize', action='store_true', help="also prune and quantize with the GLB optimizer")
+    args = parser.parse_args()
+    if args.output and len(args.paths) > 1:
+        parser.error("--output needs a single input file")
+
+    for path in args.paths:
+        print(f"=== LOD Generation: {path} ===")
+        try:
+            report = generate_lods(path, args.output, args.ratios, args.max_error,
+                                   args.max_weight_delta, args.optimize)
+        except (OSError, ValueError) as e:
+            print(f"  Error: {e}\n")
+            continue
+        print_lod_report(report)
+        print()
+
+
+if __name__ == "__main__":
+    main()
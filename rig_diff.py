@@ -0,0 +1,416 @@
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fbx_parser import FBXError
+from forward_kinematics import ForwardKinematics, HierarchyError, NodeHierarchy, decompose_matrices
+from glb_reader import GLBError, open_glb
+from gltf_accessors import AccessorError, GLTFAccessors, glb_accessors
+from skin_analysis import skin_attribute_sets, skinned_primitives, stacked_influences
+
+# Differences at or below these are treated as export noise
+DEFAULT_TOLERANCES = {
+    'translation': 1e-4,    # scene units
+    'rotation': 0.01,       # degrees
+    'scale': 1e-4,
+    'inverse_bind': 1e-4,   # largest matrix element difference
+    'weight': 0.01,         # per-vertex weight moved to other joints
+    'position': 1e-4,       # distance within which a vertex counts as unmoved
+}
+# Vertices stay paired by index while at least this share of them is unmoved
+# (a sculpt edit); below it they are re-paired by position (a reordering export)
+MIN_UNMOVED = 0.5
+
+FLOAT = 5126
+
+
+class RigIndex:
+    """Joints of one asset keyed by name (or hierarchy path where names repeat)
+
+    Rest transforms, inverse bind matrices and the influences of every
+    skinned primitive are decoded once into arrays, with influences
+    remapped from skin-local joint indices onto the index's joint rows, so
+    any number of versions can be compared without re-reading the files.
+    """
+
+    def __init__(self, gltf, accessors, path=None):
+        self.path = path
+        nodes = gltf.get('nodes', [])
+        hierarchy = NodeHierarchy(gltf)
+        names = [node.get('name', f'node{i}') for i, node in enumerate(nodes)]
+        paths = [None] * len(nodes)
+        for node in hierarchy.order:
+            parent = hierarchy.parents[node]
+            paths[node] = names[node] if parent < 0 else f"{paths[parent]}/{names[node]}"
+
+        skins = gltf.get('skins', [])
+        joints = list(dict.fromkeys(joint for skin in skins for joint in skin.get('joints', [])))
+        self.nodes = np.array(joints, dtype=np.intp)
+        self.names = [names[joint] for joint in joints]
+        self.paths = [paths[joint] for joint in joints]
+        repeated = {name for name in self.names if self.names.count(name) > 1}
+        self.keys = [path if name in repeated else name for name, path in zip(self.names, self.paths)]
+        self.rows = {key: row for row, key in enumerate(self.keys)}
+        self.parents = [names[hierarchy.parents[joint]] if hierarchy.parents[joint] >= 0 else None
+                        for joint in joints]
+
+        kinematics = ForwardKinematics(gltf, accessors)
+        _, local = kinematics.local_matrices()
+        self.translation, self.rotation, self.scale = decompose_matrices(local[0, self.nodes])
+
+        # First skin that binds a joint provides its inverse bind matrix
+        self.inverse_bind = np.full((len(joints), 4, 4), np.nan)
+        node_rows = {joint: row for row, joint in enumerate(joints)}
+        skin_rows = []
+        for i, skin in enumerate(skins):
+            rows = np.array([node_rows[joint] for joint in skin.get('joints', [])], dtype=np.intp)
+            skin_rows.append(rows)
+            unset = np.isnan(self.inverse_bind[rows, 0, 0])
+            self.inverse_bind[rows[unset]] = kinematics.inverse_bind_matrices(i)[unset]
+
+        meshes = gltf.get('meshes', [])
+        self.primitives = {}
+        for mesh, primitive, info, skin in skinned_primitives(gltf):
+            attributes = info['attributes']
+            joint_indices, weights = stacked_influences(accessors, attributes, skin_attribute_sets(attributes))
+            rows = skin_rows[skin] if skin is not None else np.zeros(0, dtype=np.intp)
+            joint_indices = np.asarray(joint_indices, dtype=np.intp)
+            valid = joint_indices < len(rows)
+            key = f"{meshes[mesh].get('name', f'mesh{mesh}')}/{primitive}"
+            self.primitives[key] = {
+                'positions': np.array(accessors.read(attributes['POSITION']), dtype=np.float64),
+                # Integer positions (KHR_mesh_quantization) keep their dequantization in the skin
+                'quantized': gltf['accessors'][attributes['POSITION']].get('componentType') != FLOAT,
+                'skin_rows': rows,
+                # Influences on joints outside the skin are dropped; skin_analysis reports them
+                'joints': np.where(valid, rows[np.where(valid, joint_indices, 0)] if len(rows) else 0, 0),
+                'weights': np.where(valid, np.asarray(weights, dtype=np.float64), 0.0),
+            }
+
+    def __len__(self):
+        return len(self.keys)
+
+
+def index_rig(path):
+    """Build a RigIndex from a GLB file, or from a binary FBX through the converter"""
+    if path.lower().endswith('.fbx'):
+        from fbx_parser import open_fbx
+        from fbx_to_glb import FBXConverter
+
+        with open_fbx(path) as fbx:
+            gltf, data = FBXConverter(fbx, animations=False).convert()
+        return RigIndex(gltf, GLTFAccessors(gltf, data), path)
+    with open_glb(path) as glb:
+        return RigIndex(glb.gltf, glb_accessors(glb), path)
+
+
+def _index_job(path):
+    """(RigIndex, None) or (None, error message); never raises"""
+    try:
+        return index_rig(path), None
+    except (OSError, GLBError, FBXError, HierarchyError, AccessorError, KeyError, IndexError) as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+def rotation_degrees(a, b):
+    """Angles between (..., 4) unit quaternions in degrees"""
+    dot = np.clip(np.abs(np.sum(a * b, axis=-1)), 0.0, 1.0)
+    return np.degrees(2 * np.arccos(dot))
+
+
+def match_renamed(base, other, removed, added, tolerance):
+    """Pair removed and added joints that keep the parent and rest translation"""
+    pairs = []
+    candidates = list(added)
+    for old in removed:
+        row = base.rows[old]
+        for new in candidates:
+            match = other.rows[new]
+            if (base.parents[row] == other.parents[match] and
+                    np.abs(base.translation[row] - other.translation[match]).max() <= tolerance):
+                pairs.append((old, new))
+                candidates.remove(new)
+                break
+    return pairs
+
+
+def mesh_space(base, other, a, b, paired):
+    """4x4 transform taking primitive b's mesh space onto a's, or None if they share it
+
+    Quantizing a skinned mesh (glb_optimizer) folds the dequantization D
+    into its skin: IBM_b = IBM_a @ D, and positions map as x_a = D @ x_b.
+    D is fitted from the joints of b's skin bound in both versions; the
+    median over joints keeps a genuinely edited bind matrix from skewing it.
+    """
+    if not (a['quantized'] or b['quantized']):
+        return None
+    rows = [(paired[row], row) for row in b['skin_rows'] if row in paired]
+    if not rows:
+        return None
+    base_rows, other_rows = np.array(rows, dtype=np.intp).T
+    inverse_a, inverse_b = base.inverse_bind[base_rows], other.inverse_bind[other_rows]
+    bound = ~(np.isnan(inverse_a[:, 0, 0]) | np.isnan(inverse_b[:, 0, 0]))
+    if not bound.any():
+        return None
+    return np.median(np.linalg.inv(inverse_a[bound]) @ inverse_b[bound], axis=0)
+
+
+def vertex_alignment(a, b, tolerance):
+    """Indices into b of the vertex paired with each vertex of a, or None when they cannot be paired"""
+    if a.shape != b.shape:
+        return None
+    if not len(a) or np.mean(np.linalg.norm(a - b, axis=1) <= tolerance) >= MIN_UNMOVED:
+        return np.arange(len(a))
+    # Reordered (vertex cache optimization, re-export): match by sorted quantized positions
+    order_a = np.lexsort(np.round(a / tolerance).T[::-1])
+    order_b = np.lexsort(np.round(b / tolerance).T[::-1])
+    if np.abs(a[order_a] - b[order_b]).max() > tolerance:
+        return None
+    alignment = np.empty(len(a), dtype=np.intp)
+    alignment[order_a] = order_b
+    return alignment
+
+
+def weight_drift(joints_a, weights_a, joints_b, weights_b, joint_count):
+    """Per-vertex weight moved between joints and per-joint net weight change
+
+    Both maps are (vertices, influences) with joint ids below joint_count.
+    The (vertex, joint) pairs of both versions are merged with one sort,
+    so drift is half the L1 distance between the per-vertex weight vectors.
+    """
+    vertices = len(weights_a)
+    base = np.arange(vertices)[:, None] * joint_count
+    keys = np.concatenate([(base + joints_a).ravel(), (base + joints_b).ravel()])
+    values = np.concatenate([-weights_a.ravel(), weights_b.ravel()])
+    used = values != 0
+    unique, inverse = np.unique(keys[used], return_inverse=True)
+    delta = np.bincount(inverse, values[used], minlength=len(unique))
+    drift = np.bincount(unique // joint_count, np.abs(delta), minlength=vertices) / 2
+    per_joint = np.bincount(unique % joint_count, delta, minlength=joint_count)
+    return drift, per_joint
+
+
+def diff_rigs(base, other, tolerances=DEFAULT_TOLERANCES, top=5):
+    """Structural differences from base to other (two RigIndex objects)"""
+    tolerances = dict(DEFAULT_TOLERANCES, **tolerances)
+    removed = [key for key in base.keys if key not in other.rows]
+    added = [key for key in other.keys if key not in base.rows]
+    renamed = match_renamed(base, other, removed, added, tolerances['translation'])
+    renamed_from = dict(renamed)
+    renamed_to = {new for _, new in renamed}
+
+    # Joint rows present in both versions (renamed joints compared under their new name)
+    pairs = [(key, key) for key in base.keys if key in other.rows] + renamed
+    base_rows = np.array([base.rows[old] for old, _ in pairs], dtype=np.intp)
+    other_rows = np.array([other.rows[new] for _, new in pairs], dtype=np.intp)
+    names = [new for _, new in pairs]
+
+    def parent_key(parent):
+        return renamed_from.get(parent, parent)
+
+    reparented = [{'joint': new, 'from': base.parents[b], 'to': other.parents[o]}
+                  for (old, new), b, o in zip(pairs, base_rows, other_rows)
+                  if parent_key(base.parents[b]) != parent_key(other.parents[o])
+                  and base.parents[b] != other.parents[o]]
+
+    # Quantized primitives are compared in the base's mesh space; their skin's
+    # bind matrices are mapped back with the same transform
+    paired = dict(zip(other_rows.tolist(), base_rows.tolist()))
+    other_inverse_bind = other.inverse_bind
+    spaces = {}
+    for key in base.primitives.keys() & other.primitives.keys():
+        a, b = base.primitives[key], other.primitives[key]
+        space = mesh_space(base, other, a, b, paired)
+        if space is None:
+            continue
+        spaces[key] = space
+        if other_inverse_bind is other.inverse_bind:
+            other_inverse_bind = other.inverse_bind.copy()
+        other_inverse_bind[b['skin_rows']] = other.inverse_bind[b['skin_rows']] @ np.linalg.inv(space)
+
+    rest = []
+    inverse_bind = []
+    if len(pairs):
+        translation = np.abs(base.translation[base_rows] - other.translation[other_rows]).max(axis=-1)
+        rotation = rotation_degrees(base.rotation[base_rows], other.rotation[other_rows])
+        scale = np.abs(base.scale[base_rows] - other.scale[other_rows]).max(axis=-1)
+        moved = ((translation > tolerances['translation']) | (rotation > tolerances['rotation']) |
+                 (scale > tolerances['scale']))
+        rest = [{'joint': names[i], 'translation': float(translation[i]),
+                 'rotation_degrees': float(rotation[i]), 'scale': float(scale[i])}
+                for i in np.flatnonzero(moved)]
+
+        error = np.abs(base.inverse_bind[base_rows] - other_inverse_bind[other_rows]).max(axis=(-2, -1))
+        # NaN marks a joint no skin binds in one version; a binding appearing counts as a change
+        unbound = np.isnan(error)
+        changed = unbound | (np.nan_to_num(error) > tolerances['inverse_bind'])
+        inverse_bind = [{'joint': names[i], 'max_error': None if unbound[i] else float(error[i])}
+                        for i in np.flatnonzero(changed)]
+
+    # One joint vocabulary across both versions for the weight maps
+    vocabulary = list(base.keys) + [key for key in other.keys if key not in base.rows and key not in renamed_to]
+    base_ids = np.arange(len(base.keys), dtype=np.intp)
+    ids = {key: i for i, key in enumerate(vocabulary)}
+    for old, new in renamed:
+        ids[new] = ids[old]
+    other_ids = np.array([ids[key] for key in other.keys], dtype=np.intp)
+    joint_count = max(len(vocabulary), 1)
+
+    weights = []
+    topology = []
+    geometry = []
+    for key in base.primitives.keys() & other.primitives.keys():
+        a, b = base.primitives[key], other.primitives[key]
+        positions = b['positions']
+        tolerance = tolerances['position']
+        if key in spaces:
+            space = spaces[key]
+            positions = positions @ space[:3, :3].T + space[:3, 3]
+            # Rounding to the grid moves a vertex by up to half a step per axis
+            tolerance = max(tolerance, float(np.cbrt(abs(np.linalg.det(space[:3, :3])))))
+        alignment = vertex_alignment(a['positions'], positions, tolerance)
+        if alignment is None:
+            topology.append({'primitive': key, 'vertices': [len(a['positions']), len(positions)]})
+            continue
+        distance = np.linalg.norm(a['positions'] - positions[alignment], axis=1)
+        if np.any(distance > tolerance):
+            geometry.append({'primitive': key, 'moved': int(np.count_nonzero(distance > tolerance)),
+                             'max_distance': float(distance.max())})
+        drift, per_joint = weight_drift(base_ids[a['joints']] if len(base_ids) else a['joints'], a['weights'],
+                                        other_ids[b['joints'][alignment]] if len(other_ids) else b['joints'],
+                                        b['weights'][alignment], joint_count)
+        drifted = drift > tolerances['weight']
+        if not drifted.any():
+            continue
+        heaviest = np.argsort(-np.abs(per_joint))[:top]
+        weights.append({'primitive': key, 'vertices': len(drift), 'drifted': int(drifted.sum()),
+                        'max_drift': float(drift.max()), 'mean_drift': float(drift[drifted].mean()),
+                        'reordered': bool(np.any(alignment != np.arange(len(alignment)))),
+                        'joints': [{'joint': vocabulary[j], 'weight_change': float(per_joint[j])}
+                                   for j in heaviest if abs(per_joint[j]) > tolerances['weight']]})
+
+    result = {
+        'base': base.path, 'other': other.path,
+        'joints': {'added': [key for key in added if key not in renamed_to],
+                   'removed': [key for key in removed if key not in renamed_from],
+                   'renamed': [{'from': old, 'to': new} for old, new in renamed],
+                   'reparented': reparented},
+        'rest': rest,
+        'inverse_bind': inverse_bind,
+        'weights': sorted(weights, key=lambda item: item['primitive']),
+        # Sculpted vertices are reported but are not a rig change
+        'geometry': sorted(geometry, key=lambda item: item['primitive']),
+        'primitives': {'added': sorted(other.primitives.keys() - base.primitives.keys()),
+                       'removed': sorted(base.primitives.keys() - other.primitives.keys()),
+                       'topology_changed': sorted(topology, key=lambda item: item['primitive'])},
+    }
+    result['changed'] = bool(any(result['joints'].values()) or rest or inverse_bind or weights or
+                             any(result['primitives'].values()))
+    return result
+
+
+def diff_versions(paths, chain=False, tolerances=DEFAULT_TOLERANCES, workers=1):
+    """Diff every path against the first (or each against its predecessor with chain=True)
+
+    Each file is indexed once, in a process pool when workers > 1.  Returns
+    one result per compared pair; pairs with an unreadable side carry
+    'error' instead of differences.
+    """
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            indexed = list(executor.map(_index_job, paths, chunksize=max(len(paths) // (workers * 4), 1)))
+    else:
+        indexed = [_index_job(path) for path in paths]
+
+    results = []
+    for i in range(1, len(paths)):
+        j = i - 1 if chain else 0
+        (base, base_error), (other, other_error) = indexed[j], indexed[i]
+        if base is None or other is None:
+            results.append({'base': paths[j], 'other': paths[i], 'changed': True,
+                            'error': base_error or other_error})
+            continue
+        results.append(diff_rigs(base, other, tolerances))
+    return results
+
+
+def print_diff(result):
+    print(f"=== {result['base']} -> {result['other']} ===")
+    if 'error' in result:
+        print(f"  Error: {result['error']}")
+        return
+    if not result['changed'] and not result.get('geometry'):
+        print("  No rig changes")
+        return
+    joints = result['joints']
+    for key in joints['added']:
+        print(f"  + joint {key}")
+    for key in joints['removed']:
+        print(f"  - joint {key}")
+    for item in joints['renamed']:
+        print(f"  ~ joint renamed {item['from']} -> {item['to']}")
+    for item in joints['reparented']:
+        print(f"  ~ joint {item['joint']} reparented {item['from']} -> {item['to']}")
+    for item in result['rest']:
+        print(f"  ~ rest {item['joint']}: translation {item['translation']:.5f}, "
+              f"rotation {item['rotation_degrees']:.3f} deg, scale {item['scale']:.5f}")
+    for item in result['inverse_bind']:
+        error = 'bound in one version only' if item['max_error'] is None else f"max error {item['max_error']:.5f}"
+        print(f"  ~ inverse bind {item['joint']}: {error}")
+    primitives = result['primitives']
+    for key in primitives['added']:
+        print(f"  + skinned primitive {key}")
+    for key in primitives['removed']:
+        print(f"  - skinned primitive {key}")
+    for item in primitives['topology_changed']:
+        before, after = item['vertices']
+        if before == after:
+            print(f"  ~ primitive {item['primitive']}: {before} vertices could not be paired "
+                  f"by index or position, weights not compared")
+        else:
+            print(f"  ~ primitive {item['primitive']}: vertex count changed "
+                  f"({before} -> {after}), weights not compared")
+    for item in result['geometry']:
+        print(f"  . primitive {item['primitive']}: {item['moved']} vertices moved "
+              f"(max {item['max_distance']:.5f}); not a rig change")
+    for item in result['weights']:
+        reordered = ', vertices reordered' if item['reordered'] else ''
+        print(f"  ~ weights {item['primitive']}: {item['drifted']}/{item['vertices']} vertices drifted "
+              f"(max {item['max_drift']:.3f}, mean {item['mean_drift']:.3f}{reordered})")
+        for joint in item['joints']:
+            print(f"      {joint['joint']}: {joint['weight_change']:+.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report rig changes between versions of an asset: joints, rest transforms, "
+                    "inverse bind matrices and skin weights")
+    parser.add_argument('paths', nargs='+', help="base version followed by the versions to compare")
+    parser.add_argument('--chain', action='store_true',
+                        help="compare each version with the previous one instead of the first")
+    parser.add_argument('-j', '--workers', type=int, default=1, help="worker processes for indexing")
+    parser.add_argument('--json', action='store_true', help="print one JSON object per compared pair")
+    for name, value in DEFAULT_TOLERANCES.items():
+        parser.add_argument(f'--{name.replace("_", "-")}-tolerance', type=float, default=value,
+                            dest=f'{name}_tolerance', help=f"(default: %(default)s)")
+    args = parser.parse_args()
+
+    if len(args.paths) < 2:
+        parser.error("need at least two versions to compare")
+    tolerances = {name: getattr(args, f'{name}_tolerance') for name in DEFAULT_TOLERANCES}
+    results = diff_versions(args.paths, args.chain, tolerances, args.workers)
+    for result in results:
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False))
+        else:
+            print_diff(result)
+
+    # Non-zero exit status lets this script gate commits on unintended rig changes
+    sys.exit(1 if any(result['changed'] for result in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+import json
+
+
+def _plain(value):
+    """Convert records, NumPy scalars/arrays and containers to JSON-ready values"""
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    return value
+
+
+class Record:
+    """Base for compact result records
+
+    Subclasses list their fields in __slots__ and map list-valued fields to
+    their record type in _nested so from_dict can rebuild the tree.
+    """
+
+    __slots__ = ()
+    _nested = {}
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown {type(self).__name__} fields: {', '.join(fields)}")
+
+    def to_dict(self):
+        return {name: _plain(getattr(self, name)) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        fields = {}
+        for name in cls.__slots__:
+            value = data.get(name)
+            nested = cls._nested.get(name)
+            if nested is not None and value is not None:
+                if isinstance(value, list):
+                    value = [nested.from_dict(item) for item in value]
+                else:
+                    value = nested.from_dict(value)
+            fields[name] = value
+        return cls(**fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:3])
+        return f"{type(self).__name__}({fields}, ...)"
+
+
+class NodeRecord(Record):
+    """A scene node (glTF node or FBX Model) that looks like a bone"""
+    __slots__ = ('index', 'name')
+
+
+class JointRecord(Record):
+    """One entry of a skin's joint list"""
+    __slots__ = ('index', 'node', 'name')
+
+
+class SkinResult(Record):
+    __slots__ = ('index', 'name', 'joints', 'has_inverse_bind_matrices',
+                 'primitive_count', 'unused_joints')
+    _nested = {'joints': JointRecord}
+
+    @property
+    def joint_count(self):
+        return len(self.joints or ())
+
+
+class PrimitiveResult(Record):
+    __slots__ = ('mesh', 'index', 'attributes', 'vertex_count', 'index_count',
+                 'skin', 'skinned', 'influences', 'bad_weight_sums',
+                 'max_weight_sum_error', 'negative_weights', 'out_of_range_joints',
+                 'weighted_out_of_range_joints', 'unweighted_vertices', 'influences_per_vertex', 'valid')
+
+
+class MeshResult(Record):
+    __slots__ = ('index', 'name', 'primitives')
+    _nested = {'primitives': PrimitiveResult}
+
+
+class AnimationResult(Record):
+    __slots__ = ('index', 'name', 'channels', 'samplers', 'duration', 'keys', 'redundant_keys')
+
+
+class RigVerdict(Record):
+    __slots__ = ('has_rig', 'valid', 'features')
+
+
+class AssetResult(Record):
+    """Everything an analyzer reports about one GLB or FBX asset"""
+    __slots__ = ('path', 'format', 'size', 'version', 'node_count', 'bone_nodes',
+                 'skins', 'meshes', 'animations', 'keywords', 'rig')
+    _nested = {
+        'bone_nodes': NodeRecord,
+        'skins': SkinResult,
+        'meshes': MeshResult,
+        'animations': AnimationResult,
+        'rig': RigVerdict,
+    }
+
+    def primitives(self):
+        for mesh in self.meshes or ():
+            yield from mesh.primitives or ()
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+
+def to_columns(results):
+    """Flatten AssetResults into column lists for asset, skin, primitive and animation tables
+
+    Each table is a dict of equally long lists with an `asset` column that
+    indexes into the assets table.
+    """
+    tables = {
+        'assets': {name: [] for name in ('path', 'format', 'size', 'version', 'node_count',
+                                         'bone_count', 'skin_count', 'mesh_count',
+                                         'animation_count', 'has_rig', 'rig_valid')},
+        'skins': {name: [] for name in ('asset', 'index', 'name', 'joint_count',
+                                        'primitive_count', 'unused_joint_count')},
+        'primitives': {name: [] for name in ('asset', 'mesh', 'index', 'vertex_count',
+                                             'index_count', 'skinned', 'bad_weight_sums',
+                                             'out_of_range_joints', 'valid')},
+        'animations': {name: [] for name in ('asset', 'index', 'name', 'channels', 'samplers',
+                                             'duration', 'keys', 'redundant_keys')},
+    }
+
+    def append(table, **values):
+        for name, column in tables[table].items():
+            column.append(values[name])
+
+    for asset_index, result in enumerate(results):
+        append('assets', path=result.path, format=result.format, size=result.size,
+               version=result.version, node_count=result.node_count,
+               bone_count=len(result.bone_nodes or ()), skin_count=len(result.skins or ()),
+               mesh_count=len(result.meshes or ()), animation_count=len(result.animations or ()),
+               has_rig=result.rig.has_rig, rig_valid=result.rig.valid)
+        for skin in result.skins or ():
+            append('skins', asset=asset_index, index=skin.index, name=skin.name,
+                   joint_count=skin.joint_count, primitive_count=skin.primitive_count,
+                   unused_joint_count=len(skin.unused_joints or ()))
+        for primitive in result.primitives():
+            append('primitives', asset=asset_index, mesh=primitive.mesh, index=primitive.index,
+                   vertex_count=primitive.vertex_count, index_count=primitive.index_count,
+                   skinned=primitive.skinned, bad_weight_sums=primitive.bad_weight_sums,
+                   out_of_range_joints=primitive.out_of_range_joints, valid=primitive.valid)
+        for animation in result.animations or ():
+            append('animations', asset=asset_index, index=animation.index, name=animation.name,
+                   channels=animation.channels, samplers=animation.samplers,
+                   duration=animation.duration, keys=animation.keys,
+                   redundant_keys=animation.redundant_keys)
+    return tables
+
+
+def print_asset_result(result):
+    """Render an AssetResult as the human-readable report the analyzers print"""
+    label = 'GLB' if result.format == 'glb' else 'FBX'
+    print(f"Version: {result.version}")
+    print(f"Total size: {result.size} bytes")
+
+    print(f"\n=== {'GLTF' if result.format == 'glb' else 'FBX'} Structure Analysis ===")
+    print(f"Nodes found: {result.node_count}")
+    if result.bone_nodes:
+        print(f"Found {len(result.bone_nodes)} bone-like nodes:")
+        for node in result.bone_nodes:
+            print(f"  Node {node.index}: {node.name}")
+
+    if result.skins:
+        print(f"\n✓ Skins found: {len(result.skins)}")
+        for skin in result.skins:
+            print(f"  Skin {skin.index}:")
+            if skin.name:
+                print(f"    Name: {skin.name}")
+            print(f"    Joints: {skin.joint_count}")
+            if skin.has_inverse_bind_matrices:
+                print(f"    Has inverse bind matrices: Yes")
+
+    if result.animations:
+        print(f"\n✓ Animations found: {len(result.animations)}")
+        for animation in result.animations:
+            print(f"  Animation {animation.index}:")
+            if animation.name:
+                print(f"    Name: {animation.name}")
+            print(f"    Channels: {animation.channels}")
+            print(f"    Samplers: {animation.samplers}")
+            if animation.keys is not None:
+                print(f"    Keys: {animation.keys} ({animation.redundant_keys} redundant) "
+                      f"over {animation.duration:.3f}s")
+
+    if result.meshes:
+        print(f"\nMeshes found: {len(result.meshes)}")
+        for mesh in result.meshes:
+            if mesh.name:
+                print(f"  Mesh {mesh.index}: {mesh.name}")
+            for primitive in mesh.primitives or ():
+                attributes = primitive.attributes or ()
+                has_weights = any('WEIGHTS' in name for name in attributes)
+                has_joints = any('JOINTS' in name for name in attributes)
+                if has_weights or has_joints:
+                    print(f"    Primitive {primitive.index}: Has skinning data "
+                          f"(WEIGHTS: {has_weights}, JOINTS: {has_joints})")
+
+    skinned = [primitive for primitive in result.primitives() if primitive.skinned]
+    if skinned:
+        print(f"\n=== Skin Validation ===")
+        print_skin_validation(skinned, result.skins or ())
+
+    if result.keywords:
+        print(f"\nRig-related keywords found:")
+        for keyword, count in result.keywords.items():
+            print(f"  - {keyword}: {count}")
+
+    print(f"\n=== {label} RIG SUMMARY ===")
+    if result.rig.has_rig:
+        print(f"✓ RIG DETECTED in {label} file!")
+        print(f"Features: {', '.join(result.rig.features)}")
+    else:
+        print(f"✗ No clear rigging data found in {label}")
+
+
+def print_skin_validation(primitives, skins):
+    """Render the skin checks of skinned PrimitiveResults and the SkinResults they use"""
+    for primitive in primitives:
+        print_primitive_validation(primitive)
+    for skin in skins:
+        print(f"\nSkin {skin.index} ({skin.name}): {skin.joint_count} joints, "
+              f"{skin.primitive_count} primitive(s), {len(skin.unused_joints or ())} unused")
+        for joint in skin.unused_joints or ():
+            print(f"    Unused joint {joint}: {skin.joints[joint].name}")
+
+
+def print_primitive_validation(primitive):
+    """Render the skin checks of one PrimitiveResult"""
+    status = "✓" if primitive.valid else "✗"
+    print(f"{status} Mesh {primitive.mesh} primitive {primitive.index}: "
+          f"{primitive.vertex_count} vertices, {primitive.influences} influences/vertex")
+    if primitive.skin is None:
+        print("    No node binds this mesh to a skin")
+    if primitive.bad_weight_sums:
+        print(f"    Weight sums off by more than tolerance: {primitive.bad_weight_sums} vertices "
+              f"(max error {primitive.max_weight_sum_error:.4f})")
+    if primitive.negative_weights:
+        print(f"    Negative weights: {primitive.negative_weights}")
+    if primitive.out_of_range_joints:
+        print(f"    Joint indices out of range: {primitive.out_of_range_joints} "
+              f"({primitive.weighted_out_of_range_joints} with weight)")
+    if primitive.unweighted_vertices:
+        print(f"    Vertices without any influence: {primitive.unweighted_vertices}")
+    histogram = ', '.join(f"{n}: {c}" for n, c in enumerate(primitive.influences_per_vertex or ()) if c)
+    print(f"    Influences per vertex: {histogram}")
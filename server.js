@@ -1,12 +1,58 @@
 const express = require('express');
+const http = require('http');
 const path = require('path');
 
 const app = express();
 const PORT = process.env.PORT || 3000;
+// Python analysis service (analysis_service.py): an http:// URL or a Unix socket path
+const ANALYSIS_SERVICE = process.env.ANALYSIS_SERVICE || 'http://127.0.0.1:8765';
+
+// Model files a client may fetch from the project root under /models
+const MODEL_EXTENSIONS = new Set(['.glb', '.fbx']);
 
 // Serve static files
 app.use(express.static(path.join(__dirname, 'public')));
-app.use('/models', express.static(path.join(__dirname)));
+
+// Only top-level model files: sources, caches, dotfiles and subdirectories stay private
+app.use('/models', (req, res, next) => {
+    let name;
+    try {
+        name = decodeURIComponent(req.path).slice(1);
+    } catch (error) {
+        return res.status(400).end();
+    }
+    if (!name || name !== path.basename(name) || name.startsWith('.') ||
+        !MODEL_EXTENSIONS.has(path.extname(name).toLowerCase())) {
+        return res.status(404).end();
+    }
+    next();
+}, express.static(path.join(__dirname), { dotfiles: 'deny', index: false, redirect: false }));
+
+// Forward /api/analysis/* to the analysis service, streaming uploads through
+app.use('/api/analysis', (req, res) => {
+    let target;
+    if (ANALYSIS_SERVICE.startsWith('/')) {
+        target = { socketPath: ANALYSIS_SERVICE };
+    } else {
+        const url = new URL(ANALYSIS_SERVICE);
+        target = { hostname: url.hostname, port: url.port };
+    }
+    const headers = { 'content-type': req.headers['content-type'] || 'application/octet-stream' };
+    if (req.headers['content-length']) {
+        headers['content-length'] = req.headers['content-length'];
+    }
+
+    const upstream = http.request({ ...target, method: req.method, path: req.url, headers }, (response) => {
+        res.writeHead(response.statusCode, response.headers);
+        response.pipe(res);
+    });
+    upstream.on('error', (error) => {
+        if (!res.headersSent) {
+            res.status(502).json({ error: `Analysis service unavailable: ${error.message}` });
+        }
+    });
+    req.pipe(upstream);
+});
 
 // Routes
 app.get('/', (req, res) => {
@@ -25,6 +71,7 @@ app.get('/debug', (req, res) => {
 app.listen(PORT, () => {
     console.log(`🚀 Server running on http://localhost:${PORT}`);
     console.log(`📁 Serving 3D models from: ${__dirname}`);
+    console.log(`🔍 Analysis API: /api/analysis -> ${ANALYSIS_SERVICE}`);
     console.log(`🎯 Primary model: human_model_sit_possition_002.glb (with keyframe poses)`);
     console.log(`🎬 Features: Animation keyframes + manual pose control`);
     console.log(`🎮 Open browser to start animating forearms!`);
@@ -0,0 +1,210 @@
+import re
+
+import numpy as np
+
+from glb_reader import open_glb
+from gltf_accessors import glb_accessors
+from rig_results import JointRecord, PrimitiveResult, SkinResult, print_skin_validation
+
+ATTRIBUTE_SET = re.compile(r'^(JOINTS|WEIGHTS)_(\d+)$')
+
+# Allowed deviation of a vertex's weight sum from 1.0 for float weights;
+# quantized weights additionally get half a step per influence.
+WEIGHT_SUM_TOLERANCE = 1e-3
+
+# analyze_skins primitive entries copied as-is into PrimitiveResult fields
+CHECK_FIELDS = ('skin', 'vertex_count', 'influences', 'bad_weight_sums', 'max_weight_sum_error',
+                'negative_weights', 'out_of_range_joints', 'weighted_out_of_range_joints',
+                'unweighted_vertices', 'valid')
+
+
+def skin_attribute_sets(attributes):
+    """Return the sorted set numbers that have both JOINTS_n and WEIGHTS_n"""
+    found = {'JOINTS': set(), 'WEIGHTS': set()}
+    for name in attributes:
+        match = ATTRIBUTE_SET.match(name)
+        if match:
+            found[match.group(1)].add(int(match.group(2)))
+    return sorted(found['JOINTS'] & found['WEIGHTS'])
+
+
+def stacked_influences(accessors, attributes, sets):
+    """Decode all JOINTS_n/WEIGHTS_n sets into (vertices, 4 * len(sets)) arrays"""
+    joints = [accessors.read(attributes[f'JOINTS_{n}']) for n in sets]
+    weights = [accessors.read(attributes[f'WEIGHTS_{n}']) for n in sets]
+    if len(sets) == 1:
+        return joints[0], weights[0]
+    return np.concatenate(joints, axis=1), np.concatenate(weights, axis=1)
+
+
+def weight_tolerance(gltf, attributes, sets):
+    """Weight-sum tolerance accounting for quantized WEIGHTS accessors"""
+    tolerance = WEIGHT_SUM_TOLERANCE
+    for n in sets:
+        component_type = gltf['accessors'][attributes[f'WEIGHTS_{n}']]['componentType']
+        if component_type == 5121:
+            tolerance += 4 * 0.5 / 255
+        elif component_type == 5123:
+            tolerance += 4 * 0.5 / 65535
+    return tolerance
+
+
+def analyze_primitive_skin(joints, weights, joint_count, tolerance=WEIGHT_SUM_TOLERANCE):
+    """Validate one primitive's influences with batched reductions
+
+    `joints` and `weights` are (vertices, influences) arrays.  Returns a dict
+    of counts plus per-joint influence arrays of length `joint_count`.
+    """
+    joints = np.asarray(joints)
+    weights = np.asarray(weights, dtype=np.float32)
+    vertex_count = len(weights)
+
+    active = weights > 0
+    sums = weights.sum(axis=1, dtype=np.float64)
+    bad_sum = np.abs(sums - 1.0) > tolerance
+
+    out_of_range = joints >= joint_count
+    if joints.dtype.kind == 'i':
+        out_of_range |= joints < 0
+
+    # Only in-range influences with a positive weight count towards joints
+    counted = active & ~out_of_range
+    joint_ids = joints[counted].astype(np.intp)
+    vertex_influence = np.bincount(joint_ids, minlength=joint_count)[:joint_count]
+    weight_total = np.bincount(joint_ids, weights=weights[counted], minlength=joint_count)[:joint_count]
+
+    influences_per_vertex = active.sum(axis=1)
+
+    return {
+        'vertex_count': vertex_count,
+        'influences': weights.shape[1] if weights.ndim == 2 else 0,
+        'bad_weight_sums': int(bad_sum.sum()),
+        'max_weight_sum_error': float(np.abs(sums - 1.0).max()) if vertex_count else 0.0,
+        'negative_weights': int((weights < 0).sum()),
+        'out_of_range_joints': int(out_of_range.sum()),
+        'weighted_out_of_range_joints': int((out_of_range & active).sum()),
+        'unweighted_vertices': int((influences_per_vertex == 0).sum()),
+        'influences_per_vertex': np.bincount(influences_per_vertex, minlength=weights.shape[1] + 1),
+        'joint_vertex_counts': vertex_influence,
+        'joint_weight_totals': weight_total,
+    }
+
+
+def skinned_primitives(gltf):
+    """Yield (mesh_index, primitive_index, primitive, skin_index) for skinned primitives
+
+    skin_index is None when the primitive carries JOINTS/WEIGHTS but no node
+    binds its mesh to a skin.
+    """
+    mesh_skins = {}
+    for node in gltf.get('nodes', []):
+        if 'mesh' in node and 'skin' in node:
+            mesh_skins.setdefault(node['mesh'], node['skin'])
+
+    for i, mesh in enumerate(gltf.get('meshes', [])):
+        for j, primitive in enumerate(mesh.get('primitives', [])):
+            if skin_attribute_sets(primitive.get('attributes', {})):
+                yield i, j, primitive, mesh_skins.get(i)
+
+
+def analyze_skins(gltf, accessors):
+    """Run skin validation over every skinned primitive in a glTF document
+
+    Returns {'primitives': [...], 'skins': [...]} where each skin entry
+    aggregates the per-joint counts of all primitives bound to it.
+    """
+    skins = gltf.get('skins', [])
+    skin_results = []
+    for i, skin in enumerate(skins):
+        joint_count = len(skin.get('joints', []))
+        skin_results.append({
+            'skin': i,
+            'name': skin.get('name', ''),
+            'joint_count': joint_count,
+            'joint_vertex_counts': np.zeros(joint_count, dtype=np.int64),
+            'joint_weight_totals': np.zeros(joint_count, dtype=np.float64),
+            'primitive_count': 0,
+        })
+
+    primitive_results = []
+    for mesh_index, primitive_index, primitive, skin_index in skinned_primitives(gltf):
+        attributes = primitive['attributes']
+        sets = skin_attribute_sets(attributes)
+        joints, weights = stacked_influences(accessors, attributes, sets)
+        joint_count = skin_results[skin_index]['joint_count'] if skin_index is not None else 0
+
+        result = analyze_primitive_skin(joints, weights, joint_count,
+                                        weight_tolerance(gltf, attributes, sets))
+        result.update({'mesh': mesh_index, 'primitive': primitive_index,
+                       'skin': skin_index, 'sets': len(sets)})
+        result['valid'] = (skin_index is not None
+                           and result['bad_weight_sums'] == 0
+                           and result['negative_weights'] == 0
+                           and result['out_of_range_joints'] == 0)
+        primitive_results.append(result)
+
+        if skin_index is not None:
+            skin_result = skin_results[skin_index]
+            skin_result['joint_vertex_counts'] += result['joint_vertex_counts']
+            skin_result['joint_weight_totals'] += result['joint_weight_totals']
+            skin_result['primitive_count'] += 1
+
+    for skin_result in skin_results:
+        unused = np.flatnonzero(skin_result['joint_vertex_counts'] == 0)
+        skin_result['unused_joints'] = unused
+        skin_result['unused_joint_count'] = len(unused)
+
+    return {'primitives': primitive_results, 'skins': skin_results}
+
+
+def analyze_glb_skins(glb_path):
+    """Open a GLB file and run analyze_skins on it"""
+    with open_glb(glb_path) as glb:
+        return analyze_skins(glb.gltf, glb_accessors(glb))
+
+
+def primitive_result(result, **fields):
+    """PrimitiveResult holding the checks of one analyze_skins primitive entry"""
+    checks = {name: result[name] for name in CHECK_FIELDS}
+    checks.update(fields)
+    return PrimitiveResult(mesh=result['mesh'], index=result['primitive'], skinned=True,
+                           influences_per_vertex=result['influences_per_vertex'].tolist(), **checks)
+
+
+def skin_result(gltf, result):
+    """SkinResult for one analyze_skins skin entry, with joint names from the nodes"""
+    nodes = gltf.get('nodes', [])
+    skin = gltf['skins'][result['skin']]
+    joints = [JointRecord(index=j, node=node, name=nodes[node].get('name', '') if node < len(nodes) else '')
+              for j, node in enumerate(skin.get('joints', []))]
+    return SkinResult(index=result['skin'], name=result['name'], joints=joints,
+                      has_inverse_bind_matrices='inverseBindMatrices' in skin,
+                      primitive_count=result['primitive_count'],
+                      unused_joints=result['unused_joints'].tolist())
+
+
+def print_skin_report(gltf, report):
+    """Print a human-readable summary of analyze_skins output"""
+    print_skin_validation([primitive_result(result) for result in report['primitives']],
+                          [skin_result(gltf, result) for result in report['skins']])
+
+
+def main():
+    import sys
+
+    paths = sys.argv[1:] or ["human_model_sit_possition.glb"]
+    failures = 0
+    for glb_path in paths:
+        print(f"=== Skin Validation: {glb_path} ===")
+        with open_glb(glb_path) as glb:
+            report = analyze_skins(glb.gltf, glb_accessors(glb))
+            print_skin_report(glb.gltf, report)
+        failures += sum(not result['valid'] for result in report['primitives'])
+        print()
+
+    # Non-zero exit status lets this script act as a QA gate
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
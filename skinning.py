@@ -0,0 +1,189 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from forward_kinematics import ForwardKinematics
+from glb_reader import open_glb
+from gltf_accessors import glb_accessors
+from skin_analysis import skin_attribute_sets, skinned_primitives, stacked_influences
+
+# Bytes of blended matrices per chunk; keeps the working set in cache-friendly blocks
+CHUNK_BYTES = 16 << 20
+
+# Meshes smaller than this are skinned on the calling thread
+THREAD_MIN_VERTICES = 20000
+
+
+class LinearBlendSkinning:
+    """Apply per-frame skinning matrices to a mesh with linear blend skinning
+
+    Joint indices and weights of every JOINTS_n/WEIGHTS_n set are folded
+    into a dense (vertices, joints) weight matrix per chunk of vertices,
+    restricted to the joints that chunk actually uses.  One matrix product
+    against the stacked (joints, 4 x frames x 3) skinning matrices then
+    blends every influence for every frame, and the blended matrices are
+    applied to the positions with broadcast multiply-adds.  With
+    workers > 1 chunks run on a thread pool (NumPy releases the GIL inside
+    the products).
+    """
+
+    def __init__(self, positions, joints, weights, workers=None, chunk_bytes=CHUNK_BYTES):
+        self.positions = np.asarray(positions, dtype=np.float32)
+        self.joints = np.asarray(joints, dtype=np.intp)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        if self.joints.shape != self.weights.shape or len(self.joints) != len(self.positions):
+            raise ValueError("Positions, joints and weights must describe the same vertices")
+        if workers is None:
+            workers = os.cpu_count() if len(self.positions) >= THREAD_MIN_VERTICES else 1
+        self.workers = max(1, workers)
+        self.chunk_bytes = chunk_bytes
+
+    @property
+    def vertex_count(self):
+        return len(self.positions)
+
+    def _chunks(self, frames):
+        size = max(256, self.chunk_bytes // (frames * 12 * 4))
+        return [slice(start, min(start + size, self.vertex_count))
+                for start in range(0, self.vertex_count, size)]
+
+    def _skin_chunk(self, columns, chunk):
+        """Skin one vertex range: stacked (joints, 4 * frames * 3) matrices -> (vertices, frames, 3)"""
+        used, inverse = np.unique(self.joints[chunk], return_inverse=True)
+        inverse = inverse.reshape(self.joints[chunk].shape)
+        weights = self.weights[chunk]
+        count = len(weights)
+        rows = np.arange(count)
+        blend = np.zeros((count, len(used)), dtype=np.float32)
+        for k in range(weights.shape[1]):
+            blend[rows, inverse[:, k]] += weights[:, k]
+
+        # (vertices, column, frames, row) blended 3x4 matrices
+        blended = (blend @ columns[used]).reshape(count, 4, -1, 3)
+        position = self.positions[chunk]
+        posed = blended[:, 3]
+        for axis in range(3):
+            posed += blended[:, axis] * position[:, axis, None, None]
+        return posed
+
+    def _map(self, function, chunks):
+        if self.workers == 1 or len(chunks) == 1:
+            return [function(chunk) for chunk in chunks]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(function, chunks))
+
+    def _prepare(self, matrices):
+        matrices = np.asarray(matrices, dtype=np.float32)
+        if matrices.ndim == 3:
+            matrices = matrices[None]
+        if self.joints.size and int(self.joints.max()) >= matrices.shape[1]:
+            raise ValueError("Joint index exceeds the number of skinning matrices")
+        # The bottom row of an affine matrix is constant; stack the top 3x4
+        # as (joints, column, frame, row) so each blended column is contiguous
+        columns = np.ascontiguousarray(matrices[:, :, :3, :].transpose(1, 3, 0, 2))
+        return len(matrices), columns.reshape(matrices.shape[1], -1)
+
+    def skin(self, matrices, out=None):
+        """Posed positions (frames, vertices, 3) for (frames, joints, 4, 4) skinning matrices"""
+        frames, columns = self._prepare(matrices)
+        if out is None:
+            out = np.empty((frames, self.vertex_count, 3), dtype=np.float32)
+
+        def run(chunk):
+            out[:, chunk] = self._skin_chunk(columns, chunk).transpose(1, 0, 2)
+
+        self._map(run, self._chunks(frames))
+        return out
+
+    def bounds(self, matrices):
+        """Per-frame axis-aligned bounds as (minimum, maximum), each (frames, 3)
+
+        Chunks are reduced as they are skinned, so the full posed mesh is
+        never held in memory.
+        """
+        frames, columns = self._prepare(matrices)
+
+        def run(chunk):
+            posed = self._skin_chunk(columns, chunk)
+            return posed.min(axis=0), posed.max(axis=0)
+
+        parts = self._map(run, self._chunks(frames))
+        if not parts:
+            empty = np.full((frames, 3), np.nan, dtype=np.float32)
+            return empty, empty.copy()
+        return (np.min([low for low, _ in parts], axis=0),
+                np.max([high for _, high in parts], axis=0))
+
+
+def primitive_skinning(accessors, primitive, workers=None):
+    """Build a LinearBlendSkinning from a primitive's POSITION and JOINTS/WEIGHTS sets"""
+    attributes = primitive['attributes']
+    sets = skin_attribute_sets(attributes)
+    joints, weights = stacked_influences(accessors, attributes, sets)
+    return LinearBlendSkinning(accessors.read(attributes['POSITION']), joints, weights, workers)
+
+
+def analyze_posed_bounds(gltf, accessors, rate=None, workers=None):
+    """Per-frame AABBs of every skinned primitive for every animation
+
+    Returns a list of dicts (mesh, primitive, skin, animation, vertices,
+    frames, minimum, maximum) where minimum/maximum are (frames, 3) arrays.
+    The rest pose is reported as animation None.
+    """
+    kinematics = ForwardKinematics(gltf, accessors)
+    animations = [None] + list(range(len(gltf.get('animations', []))))
+    poses = {animation: kinematics.world_matrices(animation, rate=rate) for animation in animations}
+
+    results = []
+    for mesh, index, primitive, skin in skinned_primitives(gltf):
+        if skin is None:
+            continue
+        skinning = primitive_skinning(accessors, primitive, workers)
+        for animation in animations:
+            times, world = poses[animation]
+            minimum, maximum = skinning.bounds(kinematics.skin_matrices(skin, world))
+            results.append({
+                'mesh': mesh, 'primitive': index, 'skin': skin, 'animation': animation,
+                'vertices': skinning.vertex_count, 'frames': len(times),
+                'minimum': minimum, 'maximum': maximum,
+            })
+    return results
+
+
+def print_bounds_report(gltf, results):
+    """Print a human-readable summary of analyze_posed_bounds output"""
+    animations = gltf.get('animations', [])
+    for result in results:
+        animation = result['animation']
+        label = "rest pose" if animation is None else animations[animation].get('name', f"animation {animation}")
+        low = result['minimum'].min(axis=0)
+        high = result['maximum'].max(axis=0)
+        print(f"Mesh {result['mesh']} primitive {result['primitive']} ({label}): "
+              f"{result['vertices']} vertices x {result['frames']} frame(s)")
+        print(f"    Bounds: ({', '.join(f'{v:.3f}' for v in low)}) .. ({', '.join(f'{v:.3f}' for v in high)})")
+        print(f"    Lowest point per frame: {result['minimum'][:, 1].min():.3f} .. {result['minimum'][:, 1].max():.3f}")
+
+
+def main():
+    import time
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Skin meshes on the CPU and report per-frame bounds")
+    parser.add_argument('paths', nargs='*', default=["human_model_sit_possition_002.glb"])
+    parser.add_argument('--rate', type=float, default=None,
+                        help="evaluate at this many frames per second instead of at the key times")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="skinning threads")
+    args = parser.parse_args()
+
+    for glb_path in args.paths:
+        print(f"=== Posed Mesh Bounds: {glb_path} ===")
+        start = time.perf_counter()
+        with open_glb(glb_path) as glb:
+            results = analyze_posed_bounds(glb.gltf, glb_accessors(glb), args.rate, args.workers)
+            print_bounds_report(glb.gltf, results)
+        print(f"Skinned in {time.perf_counter() - start:.3f}s\n")
+
+
+if __name__ == "__main__":
+    main()
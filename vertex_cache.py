@@ -0,0 +1,412 @@
+import os
+import sys
+import time
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from batch_analyze import find_assets
+from glb_optimizer import GLBOptimizer, write_optimized
+from glb_reader import open_glb
+from gltf_accessors import COMPONENT_DTYPES, element_size, glb_accessors
+
+# FIFO post-transform cache size used for optimization and for ACMR/ATVR
+DEFAULT_CACHE_SIZE = 16
+
+# A cluster may be split for overdraw sorting while its ACMR stays within
+# this factor of the cache-optimized order
+OVERDRAW_THRESHOLD = 1.05
+
+# Pre-transform (vertex fetch) cache model: FIFO of 64-byte lines
+FETCH_LINE_BYTES = 64
+FETCH_CACHE_LINES = 128
+
+TRIANGLES = 4
+
+
+def triangle_misses(indices, cache_size=DEFAULT_CACHE_SIZE):
+    """Post-transform cache misses of each triangle under a FIFO cache
+
+    A vertex is resident while fewer than `cache_size` other vertices were
+    loaded after it, so one timestamp per vertex simulates the cache exactly.
+    """
+    flat = np.asarray(indices).reshape(-1).tolist()
+    loaded_at = {}
+    loaded = 0
+    missed = []
+    for vertex in flat:
+        if loaded - loaded_at.get(vertex, -cache_size - 1) > cache_size:
+            loaded_at[vertex] = loaded
+            loaded += 1
+            missed.append(1)
+        else:
+            missed.append(0)
+    return np.asarray(missed, dtype=np.int32).reshape(-1, 3).sum(axis=1)
+
+
+def fetch_bytes(indices, stride, cache_size=DEFAULT_CACHE_SIZE):
+    """Bytes read from the vertex buffers by post-transform cache misses
+
+    Each missed vertex touches the 64-byte lines covering its `stride`
+    bytes; lines are kept in a small FIFO, so vertices stored close to
+    their neighbours in draw order share line loads.
+    """
+    flat = np.asarray(indices).reshape(-1).tolist()
+    vertex_loaded_at, line_loaded_at = {}, {}
+    vertices = lines = 0
+    for vertex in flat:
+        if vertices - vertex_loaded_at.get(vertex, -cache_size - 1) <= cache_size:
+            continue
+        vertex_loaded_at[vertex] = vertices
+        vertices += 1
+        start = vertex * stride
+        for line in range(start // FETCH_LINE_BYTES, (start + stride - 1) // FETCH_LINE_BYTES + 1):
+            if lines - line_loaded_at.get(line, -FETCH_CACHE_LINES - 1) > FETCH_CACHE_LINES:
+                line_loaded_at[line] = lines
+                lines += 1
+    return lines * FETCH_LINE_BYTES
+
+
+def cache_metrics(indices, stride, cache_size=DEFAULT_CACHE_SIZE):
+    """ACMR (misses per triangle), ATVR (misses per referenced vertex) and fetch overfetch"""
+    indices = np.asarray(indices).reshape(-1)
+    triangles = len(indices) // 3
+    referenced = len(np.unique(indices))
+    misses = int(triangle_misses(indices[:triangles * 3], cache_size).sum())
+    fetched = fetch_bytes(indices[:triangles * 3], stride, cache_size)
+    return {
+        'acmr': misses / triangles if triangles else 0.0,
+        'atvr': misses / referenced if referenced else 0.0,
+        'overfetch': fetched / (referenced * stride) if referenced and stride else 0.0,
+    }
+
+
+def _vertex_triangles(triangles, vertex_count):
+    """CSR adjacency (offsets, triangles) listing the triangles that use each vertex"""
+    flat = triangles.reshape(-1)
+    counts = np.bincount(flat, minlength=vertex_count)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    return offsets, np.argsort(flat, kind='stable') // 3
+
+
+def tipsify(triangles, vertex_count, cache_size=DEFAULT_CACHE_SIZE):
+    """Triangle order for a FIFO post-transform cache (Sander et al., "Tipsify")
+
+    Fans around a current vertex, then moves to the adjacent vertex that
+    is still in cache and has the fewest remaining triangles; dead ends
+    fall back to recently used vertices and finally to the next unvisited
+    vertex.  Returns the triangle order as an index array.
+    """
+    offsets, adjacent = _vertex_triangles(triangles, vertex_count)
+    offsets, adjacent, corners = offsets.tolist(), adjacent.tolist(), triangles.tolist()
+    live = np.diff(offsets).tolist()
+    cache_time = [0] * vertex_count
+    emitted = [False] * len(corners)
+    dead_end = []
+    order = []
+    clock = cache_size + 1
+    cursor = 0
+
+    fan = 0
+    while fan < vertex_count and live[fan] == 0:
+        fan += 1
+    while fan < vertex_count:
+        candidates = []
+        for triangle in adjacent[offsets[fan]:offsets[fan + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = True
+            order.append(triangle)
+            for vertex in corners[triangle]:
+                dead_end.append(vertex)
+                candidates.append(vertex)
+                live[vertex] -= 1
+                if clock - cache_time[vertex] > cache_size:
+                    cache_time[vertex] = clock
+                    clock += 1
+
+        best, priority = -1, -1
+        for vertex in candidates:
+            if live[vertex] > 0:
+                age = clock - cache_time[vertex]
+                score = age if age + 2 * live[vertex] <= cache_size else 0
+                if score > priority:
+                    best, priority = vertex, score
+        while best < 0 and dead_end:
+            vertex = dead_end.pop()
+            if live[vertex] > 0:
+                best = vertex
+        if best < 0:
+            while cursor < vertex_count and live[cursor] == 0:
+                cursor += 1
+            best = cursor
+        fan = best
+    return np.asarray(order, dtype=np.intp)
+
+
+def overdraw_clusters(triangles, cache_size=DEFAULT_CACHE_SIZE, threshold=OVERDRAW_THRESHOLD):
+    """Start positions of clusters that can be reordered without hurting the cache much
+
+    Hard boundaries are triangles whose three vertices all miss the cache
+    (a new patch of the cache-optimized order); each patch is then split
+    wherever the running ACMR of a fresh cache is within `threshold` of the
+    patch's own ACMR.
+    """
+    misses = triangle_misses(triangles, cache_size)
+    hard = np.flatnonzero(misses == 3).tolist()
+    if not hard or hard[0] != 0:
+        hard.insert(0, 0)
+    hard.append(len(triangles))
+
+    corners = triangles.tolist()
+    boundaries = []
+    for start, end in zip(hard[:-1], hard[1:]):
+        patch = triangle_misses(triangles[start:end], cache_size).sum()
+        limit = threshold * patch / (end - start)
+        loaded_at = {}
+        loaded = running = 0
+        cluster = start
+        boundaries.append(start)
+        for i in range(start, end):
+            for vertex in corners[i]:
+                if loaded - loaded_at.get(vertex, -cache_size - 1) > cache_size:
+                    loaded_at[vertex] = loaded
+                    loaded += 1
+                    running += 1
+            if i + 1 < end and running / (i + 1 - cluster) <= limit:
+                boundaries.append(i + 1)
+                cluster = i + 1
+                loaded_at = {}
+                loaded = running = 0
+    return np.asarray(boundaries, dtype=np.intp)
+
+
+def overdraw_order(triangles, positions, boundaries):
+    """Cluster order that draws outward-facing clusters first
+
+    Clusters are sorted by the dot product of their area-weighted normal
+    with the offset of their centroid from the mesh centroid, so surfaces
+    on the outside of the mesh occlude inner ones early.
+    """
+    corners = np.asarray(positions, dtype=np.float64)[triangles]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    areas = np.linalg.norm(normals, axis=1)
+    centroids = corners.mean(axis=1)
+    # Degenerate clusters fall back to an unweighted centroid
+    weights = areas + 1e-12
+
+    cluster_area = np.add.reduceat(weights, boundaries)
+    cluster_centroid = np.add.reduceat(centroids * weights[:, None], boundaries) / cluster_area[:, None]
+    cluster_normal = np.add.reduceat(normals, boundaries)
+    length = np.linalg.norm(cluster_normal, axis=1, keepdims=True)
+    cluster_normal = np.divide(cluster_normal, length, out=np.zeros_like(cluster_normal), where=length > 0)
+    center = (centroids * weights[:, None]).sum(axis=0) / weights.sum()
+
+    keys = ((cluster_centroid - center) * cluster_normal).sum(axis=1)
+    return np.argsort(-keys, kind='stable')
+
+
+def optimize_triangles(indices, positions, vertex_count, cache_size=DEFAULT_CACHE_SIZE,
+                       threshold=OVERDRAW_THRESHOLD):
+    """Reorder a triangle list for the post-transform cache, then for overdraw"""
+    triangles = np.asarray(indices, dtype=np.intp).reshape(-1, 3)
+    if not len(triangles):
+        return triangles.reshape(-1)
+    triangles = triangles[tipsify(triangles, vertex_count, cache_size)]
+    boundaries = overdraw_clusters(triangles, cache_size, threshold)
+    ends = np.append(boundaries[1:], len(triangles))
+    clusters = overdraw_order(triangles, positions, boundaries)
+    order = np.concatenate([np.arange(boundaries[c], ends[c]) for c in clusters])
+    return triangles[order].reshape(-1)
+
+
+def fetch_order(indices, vertex_count):
+    """Vertex order by first use in the index buffer (unreferenced vertices last)
+
+    Returns (order, remap): new vertex i is old vertex order[i], and old
+    vertex v becomes remap[v].
+    """
+    flat = np.asarray(indices, dtype=np.intp).reshape(-1)
+    used, first = np.unique(flat, return_index=True)
+    order = used[np.argsort(first, kind='stable')]
+    unused = np.setdiff1d(np.arange(vertex_count), used, assume_unique=True)
+    order = np.concatenate([order, unused]).astype(np.intp)
+    remap = np.empty(vertex_count, dtype=np.intp)
+    remap[order] = np.arange(vertex_count)
+    return order, remap
+
+
+def _primitive_accessors(primitive):
+    indices = list(primitive['attributes'].values())
+    for target in primitive.get('targets', []):
+        indices.extend(target.values())
+    if 'indices' in primitive:
+        indices.append(primitive['indices'])
+    return indices
+
+
+def reorder_primitives(gltf, accessors, cache_size=DEFAULT_CACHE_SIZE, threshold=OVERDRAW_THRESHOLD):
+    """Optimize every indexed triangle primitive
+
+    Returns (results, replacements): one dict per primitive with before and
+    after metrics (or a skip reason), and the accessor index -> raw array
+    map that rewrites the reordered index and vertex data.  Primitives
+    sharing accessors with another primitive are left alone, since
+    reordering their vertices would corrupt the other one.
+    """
+    usage = {}
+    for mesh in gltf.get('meshes', []):
+        for primitive in mesh['primitives']:
+            for index in set(_primitive_accessors(primitive)):
+                usage[index] = usage.get(index, 0) + 1
+
+    results = []
+    replacements = {}
+    for m, mesh in enumerate(gltf.get('meshes', [])):
+        for p, primitive in enumerate(mesh['primitives']):
+            result = {'mesh': m, 'primitive': p, 'name': mesh.get('name', '')}
+            results.append(result)
+            attributes = primitive['attributes']
+            if primitive.get('mode', TRIANGLES) != TRIANGLES:
+                result['skipped'] = "not a triangle list"
+                continue
+            if 'indices' not in primitive or 'POSITION' not in attributes:
+                result['skipped'] = "not indexed" if 'indices' not in primitive else "no POSITION"
+                continue
+            if any(usage[index] > 1 for index in _primitive_accessors(primitive)):
+                result['skipped'] = "shares accessors with another primitive"
+                continue
+
+            vertex_count = gltf['accessors'][attributes['POSITION']]['count']
+            indices = np.asarray(accessors.read(primitive['indices']))
+            if len(indices) % 3 or (indices.size and int(indices.max()) >= vertex_count):
+                result['skipped'] = "malformed index buffer"
+                continue
+            stride = sum(element_size(gltf['accessors'][index]['type'],
+                                      COMPONENT_DTYPES[gltf['accessors'][index]['componentType']])
+                         for index in attributes.values())
+
+            result.update(triangles=len(indices) // 3, vertices=vertex_count, stride=stride,
+                          before=cache_metrics(indices, stride, cache_size))
+            positions = accessors.read(attributes['POSITION'])
+            optimized = optimize_triangles(indices, positions, vertex_count, cache_size, threshold)
+            order, remap = fetch_order(optimized, vertex_count)
+            optimized = remap[optimized]
+            result['after'] = cache_metrics(optimized, stride, cache_size)
+
+            replacements[primitive['indices']] = optimized.astype(indices.dtype)
+            for index in _primitive_accessors(primitive):
+                if index != primitive['indices']:
+                    replacements[index] = np.asarray(accessors.read(index, normalize=False))[order]
+    return results, replacements
+
+
+def default_output(path):
+    root, ext = os.path.splitext(path)
+    return f"{root}_reordered{ext or '.glb'}"
+
+
+def reorder_glb(path, output=None, cache_size=DEFAULT_CACHE_SIZE, threshold=OVERDRAW_THRESHOLD,
+                optimize=False, write=True):
+    """Reorder one GLB's primitives and (with write=True) write the result
+
+    With optimize=True the output is also pruned and quantized by the GLB
+    optimizer.  Returns a dict with the per-primitive results and, when
+    written, the optimizer's size report.
+    """
+    start = time.perf_counter()
+    with open_glb(path) as glb:
+        results, replacements = reorder_primitives(glb.gltf, glb_accessors(glb), cache_size, threshold)
+        report = {'path': path, 'primitives': results}
+        if write:
+            optimizer = GLBOptimizer(glb.gltf, glb_accessors(glb), quantize=optimize, prune=optimize,
+                                     replacements=replacements)
+            report['size'] = write_optimized(glb, optimizer, output or default_output(path))
+    report['seconds'] = time.perf_counter() - start
+    return report
+
+
+def reorder_asset(path, output=None, **options):
+    """reorder_glb for batch use; never raises so one bad file cannot stop a batch"""
+    try:
+        return dict(reorder_glb(path, output, **options), ok=True)
+    except (OSError, ValueError) as e:
+        return {'path': path, 'ok': False, 'error': f"{type(e).__name__}: {e}"}
+
+
+def output_paths(paths, output_dir):
+    """Mirror input paths under output_dir relative to their common directory"""
+    if not output_dir:
+        return [None] * len(paths)
+    absolute = [os.path.abspath(path) for path in paths]
+    root = os.path.commonpath([os.path.dirname(path) for path in absolute])
+    return [os.path.join(output_dir, os.path.relpath(path, root)) for path in absolute]
+
+
+def run_reorder(paths, outputs, workers=None, **options):
+    """Yield reorder_asset records for paths, fanned out over a process pool"""
+    workers = workers or os.cpu_count() or 1
+    task = functools.partial(reorder_asset, **options)
+    if workers == 1 or len(paths) <= 1:
+        yield from map(task, paths, outputs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(task, paths, outputs)
+
+
+def print_reorder_report(record):
+    """Print before/after cache metrics for each primitive of a reorder record"""
+    for result in record['primitives']:
+        label = f"Mesh {result['mesh']} ({result['name']}) primitive {result['primitive']}"
+        if 'skipped' in result:
+            print(f"  {label}: skipped, {result['skipped']}")
+            continue
+        before, after = result['before'], result['after']
+        print(f"  {label}: {result['triangles']} triangles, {result['vertices']} vertices")
+        print(f"      ACMR {before['acmr']:.3f} -> {after['acmr']:.3f}, "
+              f"ATVR {before['atvr']:.3f} -> {after['atvr']:.3f}, "
+              f"overfetch {before['overfetch']:.2f} -> {after['overfetch']:.2f}")
+    if 'size' in record:
+        size = record['size']
+        print(f"  Wrote {size['output']} ({size['output_bytes']:,} bytes)")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reorder GLB index and vertex data for GPU vertex caches")
+    parser.add_argument('paths', nargs='*', default=["human_model_sit_possition_002.glb"],
+                        help="files, directories or glob patterns")
+    parser.add_argument('-o', '--output', help="output directory (default: <name>_reordered.glb next to each file)")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"post-transform cache size (default: {DEFAULT_CACHE_SIZE})")
+    parser.add_argument('--threshold', type=float, default=OVERDRAW_THRESHOLD,
+                        help=f"ACMR slack allowed for overdraw sorting (default: {OVERDRAW_THRESHOLD})")
+    parser.add_argument('--optimize', action='store_true', help="also prune and quantize with the GLB optimizer")
+    parser.add_argument('--metrics-only', action='store_true', help="report metrics without writing files")
+    args = parser.parse_args()
+
+    paths = [path for path in find_assets(args.paths) if path.lower().endswith('.glb')]
+    outputs = output_paths(paths, args.output)
+    for output in outputs:
+        if output:
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+
+    start = time.perf_counter()
+    failures = 0
+    for record in run_reorder(paths, outputs, args.workers, cache_size=args.cache_size,
+                              threshold=args.threshold, optimize=args.optimize, write=not args.metrics_only):
+        print(f"=== Vertex Cache Optimization: {record['path']} ===")
+        if not record['ok']:
+            failures += 1
+            print(f"  Error: {record['error']}")
+            continue
+        print_reorder_report(record)
+    print(f"Processed {len(paths)} file(s) in {time.perf_counter() - start:.2f}s, {failures} failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()